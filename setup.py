@@ -32,6 +32,18 @@ setup(
         'requests==2.31.0',
     ],
     extras_require={
+        'async': [
+            'aiohttp>=3.8',
+        ],
+        'fast': [
+            'orjson>=3.9',
+        ],
+        'zstd': [
+            'zstandard>=0.21',
+        ],
+        'parquet': [
+            'pyarrow>=10.0',
+        ],
         'dev': [
             'pytest==7.4.0',
             'pytest-cov==4.1.0',
@@ -42,6 +54,7 @@ setup(
     entry_points={
         'console_scripts': [
             'tap-facebook=tap_facebook.tap:main',
+            'tap-facebook-fake-graph=tap_facebook.fake_graph:main',
         ],
     },
 )
@@ -0,0 +1,498 @@
+"""
+Asyncio variant of the Facebook Graph API client, built on aiohttp.
+"""
+
+import asyncio
+import time
+import requests
+import singer
+from requests.structures import CaseInsensitiveDict
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from tap_facebook.auth import FacebookOAuthAuthenticator
+from tap_facebook.base_client import BaseFacebookClient, Listing
+from tap_facebook.exceptions import FacebookAPIError
+from tap_facebook.page_size import PageSizer
+from tap_facebook.rate_limit import RateLimitScheduler
+from tap_facebook.response_cache import ResponseCache
+from tap_facebook.retry import RetryPolicy
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+LOGGER = singer.get_logger()
+
+
+class AsyncFacebookClient(BaseFacebookClient):
+    """
+    Facebook Graph API client whose I/O methods are coroutines.
+
+    Mirrors FacebookClient: request, get_page_info, get_post_insights,
+    batch, get_post_insights_batch and get_page_insights are awaitable, and
+    paginate, paginate_pages, get_managed_pages, get_page_posts and
+    get_page_post_pages are async generators. Query building, error
+    parsing, retry classification, paging state, page sizing and
+    usage-header pacing come from BaseFacebookClient, shared with the sync
+    client, so both behave the same against Graph.
+
+    One event loop can keep up to max_concurrency requests in flight (across
+    pages and streams) over a single aiohttp connection pool, still subject
+    to the rate-limit scheduler. Requires the optional aiohttp dependency
+    (pip install tap-facebook-engagement[async]).
+    """
+
+    DEFAULT_MAX_CONCURRENCY = 100
+
+    def __init__(
+        self,
+        authenticator: FacebookOAuthAuthenticator,
+        config: Optional[Dict] = None,
+        scheduler: Optional[RateLimitScheduler] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        page_sizer: Optional[PageSizer] = None,
+        response_cache: Optional[ResponseCache] = None
+    ):
+        """
+        Initialize the async client.
+
+        Args:
+            authenticator: OAuth authenticator instance (tokens are refreshed
+                on a worker thread, off the event loop)
+            config: Tap configuration
+            scheduler: Rate-limit scheduler (built from config if omitted,
+                allowing async_max_concurrency requests in flight)
+            retry_policy: Retry policy (defaults to the authenticator's)
+            page_sizer: Adaptive page sizer (built from config if omitted)
+            response_cache: Cache of GET responses (built from config if
+                omitted; None without response_cache_dir)
+
+        Raises:
+            ImportError: If aiohttp is not installed
+        """
+        if aiohttp is None:
+            raise ImportError(
+                "AsyncFacebookClient requires aiohttp; install tap-facebook-engagement[async]"
+            )
+
+        config = config or {}
+        self.max_concurrency = int(config.get('async_max_concurrency', self.DEFAULT_MAX_CONCURRENCY))
+
+        super().__init__(
+            authenticator,
+            config=config,
+            scheduler=scheduler or RateLimitScheduler.from_config(config, self.max_concurrency),
+            retry_policy=retry_policy,
+            page_sizer=page_sizer,
+            response_cache=response_cache
+        )
+        self.timeout = float(config.get('http_timeout', 30))
+        self._session = None
+
+    async def __aenter__(self) -> 'AsyncFacebookClient':
+        """Use the client as an async context manager (closes the session on exit)."""
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        """Close the client's HTTP session."""
+        await self.close()
+
+    async def close(self) -> None:
+        """Close the aiohttp session, if one was opened."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self) -> 'aiohttp.ClientSession':
+        """Get the client's aiohttp session, opening it on first use inside the running loop."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_concurrency),
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self._session
+
+    async def _get_access_token(self) -> str:
+        """Get a valid access token, refreshing it on a worker thread when needed."""
+        if self.authenticator.needs_refresh():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self.authenticator.get_access_token)
+
+        return self.authenticator.get_access_token()
+
+    async def request(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict] = None,
+        json_body: Optional[Dict] = None,
+        data: Optional[Dict] = None
+    ) -> Any:
+        """
+        Make an authenticated request to the Facebook Graph API.
+
+        Args:
+            method: HTTP method (GET, POST, etc.)
+            endpoint: API endpoint (without base URL)
+            params: Query parameters
+            json_body: JSON body for POST requests
+            data: Form-encoded body for POST requests
+
+        Returns:
+            Response JSON dictionary
+
+        Raises:
+            FacebookAPIError: On HTTP errors (a requests HTTPError subclass)
+        """
+        url = f"{self.base_url}/{endpoint}"
+        params = dict(params or {})
+        params['access_token'] = await self._get_access_token()
+
+        try:
+            response = await self._send(method, url, params=params, json=json_body, data=data)
+            return response.json()
+
+        except requests.exceptions.RequestException as e:
+            self._log_request_error(endpoint, e)
+            raise
+
+    async def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send one Graph API call, retrying transient failures.
+
+        Args:
+            method: HTTP method
+            url: Absolute URL
+            **kwargs: Extra arguments for aiohttp
+
+        Returns:
+            Successful response
+        """
+        description = f"{method} {url.split('?')[0]}"
+        return await self.retry_policy.call_async(
+            lambda: self._send_once(method, url, **kwargs),
+            description
+        )
+
+    async def _send_once(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a single attempt through the rate-limit scheduler.
+
+        aiohttp failures are raised as their requests equivalents (Timeout,
+        ConnectionError) and responses are converted to requests.Response, so
+        the shared retry policy and error types apply unchanged. GET
+        responses go through the response cache as in FacebookClient.
+
+        Args:
+            method: HTTP method
+            url: Absolute URL
+            **kwargs: Extra arguments for aiohttp (params, json, data)
+
+        Returns:
+            Successful response
+
+        Raises:
+            RateLimitError: When Facebook reports throttling
+            FacebookAPIError: On other HTTP errors
+        """
+        if kwargs.get('params'):
+            kwargs['params'] = {key: str(value) for key, value in kwargs['params'].items()}
+
+        cache_key, cached = self._cached_response(method, url, kwargs.get('params'))
+        if cached is not None:
+            return cached
+
+        async with self.scheduler.async_slot():
+            try:
+                async with self._get_session().request(method, url, **kwargs) as raw:
+                    response = await self._to_response(raw)
+
+            except asyncio.TimeoutError as e:
+                raise requests.exceptions.Timeout(f"Request to {url.split('?')[0]} timed out") from e
+
+            except aiohttp.ClientConnectionError as e:
+                raise requests.exceptions.ConnectionError(str(e)) from e
+
+        self._check_response(response)
+        self._store_response(cache_key, url, kwargs.get('params'), response)
+        return response
+
+    async def _to_response(self, raw: 'aiohttp.ClientResponse') -> requests.Response:
+        """Read an aiohttp response into an equivalent requests.Response."""
+        response = requests.Response()
+        response.status_code = raw.status
+        response.headers = CaseInsensitiveDict(raw.headers)
+        response.url = str(raw.url)
+        response.encoding = raw.charset or 'utf-8'
+        response._content = await raw.read()
+        return response
+
+    async def paginate(
+        self,
+        endpoint: str,
+        params: Optional[Dict] = None,
+        data_key: str = 'data'
+    ) -> AsyncIterator[Dict]:
+        """
+        Paginate through API results using cursor-based pagination.
+
+        Args:
+            endpoint: API endpoint to paginate
+            params: Query parameters
+            data_key: Key in response containing the data array
+
+        Yields:
+            Individual records from paginated results
+        """
+        async for records, _ in self.paginate_pages(endpoint, params=params, data_key=data_key):
+            for record in records:
+                yield record
+
+    async def paginate_pages(
+        self,
+        endpoint: str,
+        params: Optional[Dict] = None,
+        data_key: str = 'data',
+        resume_params: Optional[Dict] = None
+    ) -> AsyncIterator[Tuple[List[Dict], Optional[Dict]]]:
+        """
+        Paginate through API results one page at a time.
+
+        Args:
+            endpoint: API endpoint to paginate
+            params: Query parameters
+            data_key: Key in response containing the data array
+            resume_params: Next-page parameters saved by an earlier run
+
+        Yields:
+            Tuples of (page records, next-page params or None on the last
+            page), see FacebookClient.paginate_pages
+        """
+        listing = Listing(endpoint, self.page_sizer, params=params, data_key=data_key, resume_params=resume_params)
+
+        while not listing.done:
+            limit = listing.limit()
+
+            try:
+                data, elapsed, size_bytes = await self._get_page(listing, limit)
+
+            except FacebookAPIError as e:
+                if listing.shrink_for(e):
+                    continue
+                raise
+
+            yield listing.record_page(data, limit, elapsed, size_bytes)
+
+    async def _get_page(self, listing: Listing, limit: int) -> Tuple[Dict, float, int]:
+        """
+        Fetch the next page of a listing, shrinking the page size on timeouts.
+
+        Args:
+            listing: Listing being paginated
+            limit: Page size to request first
+
+        Returns:
+            Tuple of (response JSON, seconds taken, response size in bytes)
+        """
+        url = f"{self.base_url}/{listing.endpoint}"
+        sizes = [limit]
+
+        async def attempt() -> requests.Response:
+            page_params = listing.page_params(sizes[-1], await self._get_access_token())
+            try:
+                return await self._send_once('GET', url, params=page_params)
+
+            except requests.exceptions.Timeout:
+                sizes.append(listing.timed_out(sizes[-1]))
+                raise
+
+        started = time.monotonic()
+
+        try:
+            response = await self.retry_policy.call_async(attempt, f"GET {listing.endpoint}")
+
+        except requests.exceptions.RequestException as e:
+            listing.failed(e)
+            raise
+
+        return response.json(), time.monotonic() - started, len(response.content)
+
+    async def get_page_info(self, page_id: str) -> Dict:
+        """
+        Get information about a Facebook Page.
+
+        Args:
+            page_id: Facebook Page ID
+
+        Returns:
+            Page information dictionary
+        """
+        params = {
+            'fields': self.PAGE_INFO_FIELDS
+        }
+        return await self.request('GET', page_id, params=params)
+
+    async def get_managed_pages(self) -> AsyncIterator[Dict]:
+        """
+        List the Pages the user token can manage (/me/accounts).
+
+        Yields:
+            Page dictionaries with 'id', 'name' and the Page 'access_token'
+        """
+        params = {
+            'fields': self.MANAGED_PAGE_FIELDS
+        }
+        async for page in self.paginate('me/accounts', params=params):
+            yield page
+
+    async def get_page_posts(
+        self,
+        page_id: str,
+        fields: Optional[List[str]] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        insights_metrics: Optional[List[str]] = None
+    ) -> AsyncIterator[Dict]:
+        """
+        Get posts from a Facebook Page with engagement metrics.
+
+        Args:
+            page_id: Facebook Page ID
+            fields: List of fields to retrieve
+            since: Start date (Unix timestamp or strtotime)
+            until: End date (Unix timestamp or strtotime)
+            insights_metrics: Post insight metrics to expand inline
+
+        Yields:
+            Post records with engagement data
+        """
+        pages = self.get_page_post_pages(
+            page_id,
+            fields=fields,
+            since=since,
+            until=until,
+            insights_metrics=insights_metrics
+        )
+
+        async for posts, _ in pages:
+            for post in posts:
+                yield post
+
+    async def get_page_post_pages(
+        self,
+        page_id: str,
+        fields: Optional[List[str]] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        resume_params: Optional[Dict] = None,
+        insights_metrics: Optional[List[str]] = None
+    ) -> AsyncIterator[Tuple[List[Dict], Optional[Dict]]]:
+        """
+        Get posts from a Facebook Page one result page at a time.
+
+        Args:
+            page_id: Facebook Page ID
+            fields: List of fields to retrieve
+            since: Start date (Unix timestamp or strtotime)
+            until: End date (Unix timestamp or strtotime)
+            resume_params: Next-page parameters saved by an earlier run
+            insights_metrics: Post insight metrics to expand inline
+
+        Yields:
+            Tuples of (posts, next-page params or None), see paginate_pages
+        """
+        params = self._post_listing_params(fields, since, until, insights_metrics)
+
+        endpoint = f"{page_id}/posts"
+        async for page in self.paginate_pages(endpoint, params=params, resume_params=resume_params):
+            yield page
+
+    async def get_post_insights(self, post_id: str, metrics: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Get insights/analytics for a specific post.
+
+        Args:
+            post_id: Facebook Post ID
+            metrics: List of metric names to retrieve
+
+        Returns:
+            List of insight data points
+        """
+        params = self._post_insights_params(metrics)
+
+        endpoint = f"{post_id}/insights"
+        data = await self.request('GET', endpoint, params=params)
+        return data.get('data', [])
+
+    async def batch(self, sub_requests: List[Dict]) -> List[Optional[Dict]]:
+        """
+        Send up to MAX_BATCH_SIZE sub-requests in a single Graph batch call.
+
+        Args:
+            sub_requests: Batch entries, each with 'method' and 'relative_url'
+
+        Returns:
+            Raw per-sub-request responses in request order (see FacebookClient.batch)
+        """
+        return await self.request('POST', '', data=self._batch_body(sub_requests))
+
+    async def get_post_insights_batch(
+        self,
+        post_ids: List[str],
+        metrics: Optional[List[str]] = None
+    ) -> List[Dict]:
+        """
+        Get insights for several posts in one batch call.
+
+        Args:
+            post_ids: Up to MAX_BATCH_SIZE Facebook Post IDs
+            metrics: List of metric names to retrieve
+
+        Returns:
+            One result per post, in input order, with failed sub-requests
+            retried as in FacebookClient.get_post_insights_batch
+        """
+        results: Dict[str, Dict] = {}
+        pending = list(post_ids)
+        attempt = 0
+
+        while pending:
+            responses = await self.batch(self._insights_batch_requests(pending, metrics))
+            pending, error = self._collect_batch_results(pending, responses, results)
+
+            if pending:
+                delay = self.retry_policy.next_delay(error, attempt, f"insights of {len(pending)} posts in a batch")
+                if delay is None:
+                    break
+
+                attempt += 1
+                await asyncio.sleep(delay)
+
+        return [results[post_id] for post_id in post_ids]
+
+    async def get_page_insights(
+        self,
+        page_id: str,
+        metrics: Optional[List[str]] = None,
+        period: str = 'day',
+        since: Optional[str] = None,
+        until: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Get page-level insights/analytics.
+
+        Args:
+            page_id: Facebook Page ID
+            metrics: List of metric names
+            period: Time period (day, week, days_28)
+            since: Start date
+            until: End date
+
+        Returns:
+            List of insight data points
+        """
+        params = self._page_insights_params(metrics, period, since, until)
+
+        endpoint = f"{page_id}/insights"
+        data = await self.request('GET', endpoint, params=params)
+        return data.get('data', [])
@@ -2,32 +2,76 @@
 OAuth 2.0 authentication handler for Facebook Graph API.
 """
 
+import threading
 import time
 import requests
 from typing import Dict, Optional
 import singer
+from tap_facebook.exceptions import FacebookAPIError
+from tap_facebook.retry import RetryPolicy
+from tap_facebook.token_cache import TokenCache, get_token_cache
+from tap_facebook.transport import HTTPTransport
 
 LOGGER = singer.get_logger()
 
 
 class FacebookOAuthAuthenticator:
-    """Handles OAuth 2.0 authentication and token refresh for Facebook Graph API."""
+    """
+    Handles OAuth 2.0 authentication and token refresh for Facebook Graph API.
 
-    TOKEN_URL = "https://graph.facebook.com/v18.0/oauth/access_token"
-    TOKEN_EXCHANGE_URL = "https://graph.facebook.com/v18.0/oauth/access_token"
+    With a token cache, a missing or expiring token is first looked up in
+    the cache, and refreshed (and stored) only under the cache's lock, so
+    concurrent runs share one refresh. Once the token is within
+    token_refresh_ahead seconds of expiry it is refreshed on a background
+    thread while requests keep using the current one.
+    """
 
-    def __init__(self, config: Dict):
+    GRAPH_URL = "https://graph.facebook.com"
+    TOKEN_URL = f"{GRAPH_URL}/v18.0/oauth/access_token"
+    TOKEN_EXCHANGE_URL = f"{GRAPH_URL}/v18.0/oauth/access_token"
+
+    # Tokens this close to expiry are refreshed before use
+    EXPIRY_MARGIN = 300
+
+    # Pause after a background refresh before trying another one
+    BACKGROUND_RETRY_SECONDS = 300
+
+    def __init__(
+        self,
+        config: Dict,
+        transport: Optional[HTTPTransport] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        token_cache: Optional[TokenCache] = None
+    ):
         """
         Initialize the authenticator.
 
         Args:
             config: Configuration dictionary containing OAuth credentials
+            transport: Shared HTTP transport (a private one is created if omitted)
+            retry_policy: Shared retry policy (built from config if omitted)
+            token_cache: Token cache shared with other runs (built from
+                token_cache_path if omitted)
         """
+        self.transport = transport or HTTPTransport.from_config(config)
+        self.retry_policy = retry_policy or RetryPolicy.from_config(config)
         self.client_id = config.get('client_id')
         self.client_secret = config.get('client_secret')
         self.refresh_token = config.get('refresh_token')
         self._access_token = config.get('access_token')
         self._token_expiry = config.get('token_expiry', 0)
+        self._refresh_lock = threading.Lock()
+
+        # graph_base_url points token calls at a local Graph stand-in
+        self.graph_url = config.get('graph_base_url', self.GRAPH_URL).rstrip('/')
+        self.token_exchange_url = self.TOKEN_EXCHANGE_URL.replace(self.GRAPH_URL, self.graph_url, 1)
+
+        self.token_cache = token_cache if token_cache is not None else get_token_cache(config)
+        self.refresh_ahead = float(config.get('token_refresh_ahead', 3600))
+        self._cache_key = TokenCache.key(self.client_id, self.refresh_token)
+        self._background_lock = threading.Lock()
+        self._background_refresh: Optional[threading.Thread] = None
+        self._background_after = 0.0
 
     def get_access_token(self) -> str:
         """
@@ -36,15 +80,97 @@ class FacebookOAuthAuthenticator:
         Returns:
             Valid access token string
         """
-        current_time = time.time()
+        if self.needs_refresh():
+            # Only one thread refreshes; the others wait and reuse its token
+            with self._refresh_lock:
+                if self.needs_refresh():
+                    self._obtain_token(self.EXPIRY_MARGIN, "Access token expired or missing, refreshing...")
 
-        # If token is expired or about to expire (within 5 minutes), refresh it
-        if not self._access_token or current_time >= (self._token_expiry - 300):
-            LOGGER.info("Access token expired or missing, refreshing...")
-            self._refresh_access_token()
+        elif self._refresh_due():
+            self._start_background_refresh()
 
         return self._access_token
 
+    def needs_refresh(self) -> bool:
+        """Whether the token is missing, expired or about to expire (within EXPIRY_MARGIN)."""
+        return not self._access_token or time.time() >= (self._token_expiry - self.EXPIRY_MARGIN)
+
+    def _refresh_due(self) -> bool:
+        """Whether the token is within token_refresh_ahead of expiry and due a background refresh."""
+        now = time.time()
+        return self.refresh_ahead > 0 and now >= self._background_after \
+            and now >= self._token_expiry - self.refresh_ahead
+
+    def _obtain_token(self, margin: float, reason: str) -> None:
+        """
+        Adopt a cached token valid for longer than margin, or refresh it.
+
+        Caller holds _refresh_lock.
+
+        Args:
+            margin: Seconds a cached token must stay valid to be reused
+            reason: Log message for a refresh
+        """
+        if self.token_cache is None:
+            LOGGER.info(reason)
+            self._refresh_access_token()
+            return
+
+        if self._adopt_cached_token(margin):
+            return
+
+        with self.token_cache.lock(self._cache_key):
+            # Another run may have refreshed while we waited for the lock
+            if self._adopt_cached_token(margin):
+                return
+
+            LOGGER.info(reason)
+            self._refresh_access_token()
+            self.token_cache.store(self._cache_key, {
+                'access_token': self._access_token,
+                'token_expiry': self._token_expiry
+            })
+
+    def _adopt_cached_token(self, margin: float) -> bool:
+        """Use the cached token if it stays valid for longer than margin."""
+        token = self.token_cache.load(self._cache_key)
+
+        if not token or not token.get('access_token') or \
+                time.time() >= token.get('token_expiry', 0) - margin:
+            return False
+
+        self._token_expiry = token['token_expiry']
+        self._access_token = token['access_token']
+
+        LOGGER.info(f"Using cached access token. Expires in {self._token_expiry - time.time():.0f} seconds.")
+        return True
+
+    def _start_background_refresh(self) -> None:
+        """Refresh the token on a background thread, unless one is already running."""
+        with self._background_lock:
+            if self._background_refresh is not None and self._background_refresh.is_alive():
+                return
+
+            self._background_refresh = threading.Thread(
+                target=self._refresh_in_background,
+                name='token-refresh',
+                daemon=True
+            )
+            self._background_refresh.start()
+
+    def _refresh_in_background(self) -> None:
+        """Refresh the token ahead of expiry; failures are left to the next foreground refresh."""
+        try:
+            with self._refresh_lock:
+                if self._refresh_due():
+                    self._obtain_token(self.refresh_ahead, "Access token expires soon, refreshing in the background...")
+
+        except Exception as e:
+            LOGGER.warning(f"Background access token refresh failed: {str(e)}")
+
+        finally:
+            self._background_after = time.time() + self.BACKGROUND_RETRY_SECONDS
+
     def _refresh_access_token(self) -> None:
         """Refresh the access token using the refresh token."""
         if not self.client_id or not self.client_secret:
@@ -63,8 +189,10 @@ class FacebookOAuthAuthenticator:
             raise ValueError("refresh_token is required for authentication")
 
         try:
-            response = requests.get(self.TOKEN_EXCHANGE_URL, params=params)
-            response.raise_for_status()
+            response = self.retry_policy.call(
+                lambda: self._get(self.token_exchange_url, params),
+                "access token refresh"
+            )
             data = response.json()
 
             self._access_token = data.get('access_token')
@@ -78,6 +206,24 @@ class FacebookOAuthAuthenticator:
             LOGGER.error(f"Failed to refresh access token: {str(e)}")
             raise
 
+    def _get(self, url: str, params: Dict) -> requests.Response:
+        """
+        Send one GET request, raising FacebookAPIError on error responses.
+
+        Args:
+            url: Absolute URL
+            params: Query parameters
+
+        Returns:
+            Successful response
+        """
+        response = self.transport.get(url, params=params)
+
+        if response.status_code >= 400:
+            raise FacebookAPIError.from_response(response)
+
+        return response
+
     def get_long_lived_token(self, short_lived_token: str) -> Dict:
         """
         Exchange a short-lived user access token for a long-lived token.
@@ -95,7 +241,7 @@ class FacebookOAuthAuthenticator:
             'fb_exchange_token': short_lived_token
         }
 
-        response = requests.get(self.TOKEN_EXCHANGE_URL, params=params)
+        response = self.transport.get(self.token_exchange_url, params=params)
         response.raise_for_status()
 
         return response.json()
@@ -108,13 +254,43 @@ class FacebookOAuthAuthenticator:
             Dictionary containing token validation information
         """
         access_token = self.get_access_token()
-        url = "https://graph.facebook.com/debug_token"
+        url = f"{self.graph_url}/debug_token"
         params = {
             'input_token': access_token,
             'access_token': f"{self.client_id}|{self.client_secret}"
         }
 
-        response = requests.get(url, params=params)
+        response = self.transport.get(url, params=params)
         response.raise_for_status()
 
         return response.json()
+
+
+class PageTokenAuthenticator:
+    """
+    Supplies a Page access token for requests made on behalf of one Page.
+
+    Page tokens listed by /me/accounts for a long-lived user token do not
+    expire, so no refresh is needed. The transport and retry policy are
+    shared with the user-token authenticator they were obtained through.
+    """
+
+    def __init__(self, access_token: str, parent: FacebookOAuthAuthenticator):
+        """
+        Initialize the authenticator.
+
+        Args:
+            access_token: Page access token
+            parent: Authenticator of the user token the Page token came from
+        """
+        self.transport = parent.transport
+        self.retry_policy = parent.retry_policy
+        self._access_token = access_token
+
+    def get_access_token(self) -> str:
+        """Get the Page access token."""
+        return self._access_token
+
+    def needs_refresh(self) -> bool:
+        """Page tokens are not refreshed."""
+        return False
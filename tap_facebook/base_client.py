@@ -0,0 +1,516 @@
+"""
+Request building and response handling shared by the sync and async Graph clients.
+
+Nothing here performs I/O: FacebookClient and AsyncFacebookClient send the
+requests and delegate everything else to these classes, so both behave the
+same against Graph.
+"""
+
+import copy
+import json
+import requests
+import singer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse
+from tap_facebook.auth import FacebookOAuthAuthenticator, PageTokenAuthenticator
+from tap_facebook.exceptions import FacebookAPIError, RateLimitError
+from tap_facebook.page_size import PageSizer
+from tap_facebook.rate_limit import RateLimitScheduler
+from tap_facebook.response_cache import ResponseCache
+from tap_facebook.retry import RetryPolicy
+
+LOGGER = singer.get_logger()
+
+
+class Listing:
+    """
+    Paging state of one cursor-paginated listing.
+
+    Tracks the query parameters of the next page, the page size to ask for
+    and when the listing is done; the client fetches each page and hands the
+    response back through record_page.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        page_sizer: PageSizer,
+        params: Optional[Dict] = None,
+        data_key: str = 'data',
+        resume_params: Optional[Dict] = None
+    ):
+        """
+        Initialize the listing.
+
+        Args:
+            endpoint: API endpoint to paginate
+            page_sizer: Adaptive page sizer
+            params: Query parameters
+            data_key: Key in response containing the data array
+            resume_params: Next-page parameters saved by an earlier run
+        """
+        params = dict(params or {})
+
+        if resume_params:
+            LOGGER.info(f"Resuming pagination for {endpoint} from saved cursor")
+            params = dict(resume_params)
+
+        self.endpoint = endpoint
+        self.page_sizer = page_sizer
+        self.data_key = data_key
+        self.done = False
+        self.page_count = 0
+
+        # Cursors do not depend on the page size, so each page can use the
+        # sizer's current size; an explicit limit only caps it
+        self.key = page_sizer.key(endpoint, params)
+        self.max_limit = int(params.pop('limit')) if 'limit' in params and not resume_params else None
+        self.params = params
+
+    def limit(self) -> int:
+        """Page size to request for the next page."""
+        limit = self.page_sizer.size(self.key)
+        return limit if self.max_limit is None else min(limit, self.max_limit)
+
+    def page_params(self, limit: int, access_token: str) -> Dict:
+        """Query parameters fetching the next page with the given size."""
+        return dict(self.params, limit=limit, access_token=access_token)
+
+    def timed_out(self, limit: int) -> int:
+        """
+        Shrink the page size after a timed-out attempt.
+
+        Args:
+            limit: Page size of the attempt
+
+        Returns:
+            Page size for the retry
+        """
+        if self.page_sizer.shrink(self.key, 'timeout'):
+            return min(limit, self.page_sizer.size(self.key))
+
+        return limit
+
+    def shrink_for(self, error: FacebookAPIError) -> bool:
+        """
+        Shrink the page size after Graph refused a page as too large.
+
+        Heavy fields (e.g. expanded insights) can exceed what Graph will
+        return in one page; the same page is then asked for with fewer rows.
+
+        Args:
+            error: Error the page failed with after retries
+
+        Returns:
+            True if the page should be fetched again, False to raise error
+        """
+        return error.is_oversize and self.page_sizer.shrink(self.key, 'reduce the amount of data', floor=1)
+
+    def failed(self, error: requests.exceptions.RequestException) -> None:
+        """Log a page that failed after retries (oversized pages are handled by shrink_for)."""
+        if not (isinstance(error, FacebookAPIError) and error.is_oversize):
+            LOGGER.error(f"Request failed for {self.endpoint}: {error}")
+
+    def record_page(
+        self,
+        data: Dict,
+        limit: int,
+        elapsed: float,
+        size_bytes: int
+    ) -> Tuple[List[Dict], Optional[Dict]]:
+        """
+        Take in one fetched page and move to the next.
+
+        Args:
+            data: Response JSON of the page
+            limit: Page size requested
+            elapsed: Seconds the page took, retries included
+            size_bytes: Response size in bytes
+
+        Returns:
+            Tuple of (page records, next-page params or None on the last page)
+        """
+        self.page_count += 1
+        records = data.get(self.data_key, [])
+        self.page_sizer.record(self.key, limit, len(records), elapsed, size_bytes)
+        LOGGER.info(f"Page {self.page_count}: Retrieved {len(records)} records from {self.endpoint} (limit {limit})")
+
+        next_params = next_page_params(data.get('paging', {}))
+
+        if next_params:
+            self.params = dict(next_params)
+            self.params.pop('limit', None)
+        else:
+            self.done = True
+            LOGGER.info(
+                f"Pagination complete for {self.endpoint}. Total pages: {self.page_count}, "
+                f"page size: {self.page_sizer.size(self.key)}"
+            )
+
+        return records, next_params
+
+
+def next_page_params(paging: Dict) -> Optional[Dict]:
+    """
+    Extract the query parameters of the next page from a paging object.
+
+    Args:
+        paging: The response's 'paging' object
+
+    Returns:
+        Next-page query parameters without the access token, or None
+    """
+    next_url = paging.get('next')
+    if not next_url:
+        return None
+
+    next_params = dict(parse_qsl(urlparse(next_url).query))
+    next_params.pop('access_token', None)
+    return next_params
+
+
+class BaseFacebookClient:
+    """
+    Graph API client state and the request/response logic without I/O.
+
+    Subclasses implement request, batch and pagination over their own HTTP
+    stack and reuse the query builders, error parsing, rate-limit feedback,
+    response cache lookups and batch result handling defined here.
+    """
+
+    GRAPH_URL = "https://graph.facebook.com"
+    API_VERSION = "v18.0"
+    BASE_URL = f"{GRAPH_URL}/{API_VERSION}"
+    DEFAULT_PAGE_SIZE = 100
+    MAX_BATCH_SIZE = 50  # Graph API limit on sub-requests per batch call
+
+    DEFAULT_POST_FIELDS = [
+        'id',
+        'message',
+        'created_time',
+        'updated_time',
+        'permalink_url',
+        'type',
+        'status_type',
+        'shares',
+        'reactions.summary(total_count).limit(0)',
+        'comments.summary(total_count).limit(0)',
+        'likes.summary(total_count).limit(0)'
+    ]
+
+    DEFAULT_POST_METRICS = [
+        'post_impressions',
+        'post_impressions_unique',
+        'post_engaged_users',
+        'post_clicks',
+        'post_reactions_by_type_total'
+    ]
+
+    DEFAULT_PAGE_METRICS = [
+        'page_impressions',
+        'page_impressions_unique',
+        'page_engaged_users',
+        'page_post_engagements',
+        'page_fans',
+        'page_fan_adds',
+        'page_fan_removes'
+    ]
+
+    PAGE_INFO_FIELDS = 'id,name,username,fan_count,category,about'
+    MANAGED_PAGE_FIELDS = 'id,name,access_token'
+
+    def __init__(
+        self,
+        authenticator: FacebookOAuthAuthenticator,
+        config: Optional[Dict] = None,
+        scheduler: Optional[RateLimitScheduler] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        page_sizer: Optional[PageSizer] = None,
+        response_cache: Optional[ResponseCache] = None
+    ):
+        """
+        Initialize the client state.
+
+        Args:
+            authenticator: OAuth authenticator instance
+            config: Tap configuration
+            scheduler: Rate-limit scheduler (built from config if omitted)
+            retry_policy: Retry policy (defaults to the authenticator's)
+            page_sizer: Adaptive page sizer (built from config if omitted)
+            response_cache: Cache of GET responses (built from config if
+                omitted; None without response_cache_dir)
+        """
+        self.authenticator = authenticator
+        self.config = config or {}
+        self.scheduler = scheduler or RateLimitScheduler.from_config(self.config)
+        self.retry_policy = retry_policy or authenticator.retry_policy
+        self.page_sizer = page_sizer or PageSizer.from_config(self.config, self.DEFAULT_PAGE_SIZE)
+        self.response_cache = response_cache or ResponseCache.from_config(self.config)
+
+        # graph_base_url points the client at a local Graph stand-in
+        self.base_url = f"{self.config.get('graph_base_url', self.GRAPH_URL).rstrip('/')}/{self.API_VERSION}"
+
+    def for_page(self, access_token: str) -> 'BaseFacebookClient':
+        """
+        Get a client that calls Graph with a Page access token.
+
+        The new client shares this client's HTTP connections, rate-limit
+        scheduler, retry policy, page sizer and response cache, so every page
+        synced in one run draws on the same concurrency and rate budget.
+
+        Args:
+            access_token: Page access token (see get_managed_pages)
+
+        Returns:
+            Client for that Page
+        """
+        page_client = copy.copy(self)
+        page_client.authenticator = PageTokenAuthenticator(access_token, self.authenticator)
+        return page_client
+
+    def get_rate_limit_budget(self) -> Dict:
+        """
+        Get the scheduler's current rate-limit budget state.
+
+        Returns:
+            Budget snapshot (see RateLimitScheduler.budget)
+        """
+        return self.scheduler.budget()
+
+    def _log_request_error(self, endpoint: str, error: requests.exceptions.RequestException) -> None:
+        """Log a request that failed after retries."""
+        if isinstance(error, requests.exceptions.HTTPError):
+            LOGGER.error(f"HTTP error for {endpoint}: {error}")
+            if error.response is not None:
+                LOGGER.error(f"Response: {error.response.text}")
+        else:
+            LOGGER.error(f"Request failed for {endpoint}: {error}")
+
+    def _cached_response(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict]
+    ) -> Tuple[Optional[str], Optional[requests.Response]]:
+        """
+        Look a request up in the response cache.
+
+        Args:
+            method: HTTP method
+            url: Absolute URL
+            params: Query parameters
+
+        Returns:
+            Tuple of (cache key, or None when the request is not cacheable;
+            cached response, or None on a miss)
+        """
+        if self.response_cache is None or method != 'GET':
+            return None, None
+
+        cache_key = self.response_cache.key(method, self._endpoint_of(url), params)
+        return cache_key, self.response_cache.get(cache_key)
+
+    def _store_response(
+        self,
+        cache_key: Optional[str],
+        url: str,
+        params: Optional[Dict],
+        response: requests.Response
+    ) -> None:
+        """Store a successful response under its cache key (see _cached_response)."""
+        if cache_key is not None:
+            self.response_cache.put(cache_key, response, self.response_cache.ttl(self._endpoint_of(url), params))
+
+    def _endpoint_of(self, url: str) -> str:
+        """API endpoint of an absolute URL (its path below base_url)."""
+        if url.startswith(self.base_url):
+            return url[len(self.base_url):].split('?')[0]
+
+        return urlparse(url).path
+
+    def _check_response(self, response: requests.Response) -> None:
+        """
+        Feed a response's usage headers to the scheduler and raise on errors.
+
+        Args:
+            response: Response to one attempt
+
+        Raises:
+            RateLimitError: When Facebook reports throttling
+            FacebookAPIError: On other HTTP errors
+        """
+        self.scheduler.update(response.headers)
+
+        if response.status_code >= 400:
+            error = FacebookAPIError.from_response(response)
+
+            if error.code in RateLimitScheduler.THROTTLE_ERROR_CODES:
+                self.scheduler.record_throttle(self._retry_after(response))
+                raise RateLimitError(str(error), code=error.code, subcode=error.subcode, response=response)
+
+            raise error
+
+    def _retry_after(self, response: requests.Response) -> Optional[float]:
+        """Seconds from a Retry-After header, if present and numeric."""
+        try:
+            return float(response.headers.get('Retry-After'))
+        except (TypeError, ValueError):
+            return None
+
+    def _post_listing_params(
+        self,
+        fields: Optional[List[str]],
+        since: Optional[str],
+        until: Optional[str],
+        insights_metrics: Optional[List[str]]
+    ) -> Dict:
+        """Query parameters of a {page_id}/posts listing (see get_page_post_pages)."""
+        if fields is None:
+            fields = self.DEFAULT_POST_FIELDS
+
+        if insights_metrics:
+            fields = list(fields) + [f"insights.metric({','.join(insights_metrics)})"]
+
+        params = {
+            'fields': ','.join(fields)
+        }
+
+        if since:
+            params['since'] = since
+        if until:
+            params['until'] = until
+
+        return params
+
+    def _post_insights_params(self, metrics: Optional[List[str]]) -> Dict:
+        """Query parameters of a {post_id}/insights call (see get_post_insights)."""
+        if metrics is None:
+            metrics = self.DEFAULT_POST_METRICS
+
+        return {
+            'metric': ','.join(metrics)
+        }
+
+    def _page_insights_params(
+        self,
+        metrics: Optional[List[str]],
+        period: str,
+        since: Optional[str],
+        until: Optional[str]
+    ) -> Dict:
+        """Query parameters of a {page_id}/insights call (see get_page_insights)."""
+        if metrics is None:
+            metrics = self.DEFAULT_PAGE_METRICS
+
+        params = {
+            'metric': ','.join(metrics),
+            'period': period
+        }
+
+        if since:
+            params['since'] = since
+        if until:
+            params['until'] = until
+
+        return params
+
+    def _batch_body(self, sub_requests: List[Dict]) -> Dict:
+        """Form body of a batch call, checking the sub-request limit (see batch)."""
+        if len(sub_requests) > self.MAX_BATCH_SIZE:
+            raise ValueError(
+                f"Batch size {len(sub_requests)} exceeds the limit of {self.MAX_BATCH_SIZE}"
+            )
+
+        return {
+            'batch': json.dumps(sub_requests),
+            'include_headers': 'false'
+        }
+
+    def _insights_batch_requests(self, post_ids: List[str], metrics: Optional[List[str]]) -> List[Dict]:
+        """Batch sub-requests fetching insights for each post (see get_post_insights_batch)."""
+        query = urlencode(self._post_insights_params(metrics))
+        return [
+            {'method': 'GET', 'relative_url': f"{post_id}/insights?{query}"}
+            for post_id in post_ids
+        ]
+
+    def _collect_batch_results(
+        self,
+        post_ids: List[str],
+        responses: List[Optional[Dict]],
+        results: Dict[str, Dict]
+    ) -> Tuple[List[str], Optional[FacebookAPIError]]:
+        """
+        Parse one round of an insights batch call into results.
+
+        Args:
+            post_ids: Post IDs of the round's sub-requests, in order
+            responses: Raw sub-responses of the round
+            results: Results by post ID, updated in place
+
+        Returns:
+            Tuple of (IDs of the posts to retry, the error of the last of them)
+        """
+        retry_ids = []
+        retry_error = None
+        regain_seconds = None
+
+        for index, post_id in enumerate(post_ids):
+            response = responses[index] if index < len(responses) else None
+            result, error = self._parse_batch_response(post_id, response)
+            results[post_id] = result
+
+            if result['retryable']:
+                retry_ids.append(post_id)
+                retry_error = error
+
+                if isinstance(error, RateLimitError):
+                    regain_seconds = max(regain_seconds or 0, self._retry_after(error.response) or 0)
+
+        # One pause for the round, however many of its sub-requests were throttled
+        if regain_seconds is not None:
+            self.scheduler.record_throttle(regain_seconds)
+
+        return retry_ids, retry_error
+
+    def _parse_batch_response(
+        self,
+        post_id: str,
+        response: Optional[Dict]
+    ) -> Tuple[Dict, Optional[FacebookAPIError]]:
+        """
+        Turn one raw batch sub-response into a result dictionary.
+
+        Failed sub-responses are classified with the retry policy, so
+        throttling and transient errors are told apart from permanent ones
+        (e.g. a post without insights).
+
+        Args:
+            post_id: Post ID the sub-request was for
+            response: Raw sub-response from the batch call (None when Graph
+                did not complete the sub-request)
+
+        Returns:
+            Tuple of (result dictionary with 'post_id', 'data', 'error' and
+            'retryable'; the error, or None on success)
+        """
+        if response is not None and response.get('code') == 200:
+            try:
+                body = json.loads(response.get('body') or '{}')
+            except ValueError:
+                body = {}
+
+            return {'post_id': post_id, 'data': body.get('data', []), 'error': None, 'retryable': False}, None
+
+        error = FacebookAPIError.from_batch_response(response)
+
+        if error.code in RateLimitScheduler.THROTTLE_ERROR_CODES:
+            error = RateLimitError(str(error), code=error.code, subcode=error.subcode, response=error.response)
+
+        result = {
+            'post_id': post_id,
+            'data': None,
+            'error': str(error),
+            'retryable': self.retry_policy.classify(error) is not None
+        }
+        return result, error
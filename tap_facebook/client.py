@@ -2,28 +2,57 @@
 Facebook Graph API client with pagination and error handling.
 """
 
+import time
 import requests
 import singer
-from typing import Dict, Iterator, Optional, List
+from typing import Any, Dict, Iterator, Optional, List, Tuple
 from tap_facebook.auth import FacebookOAuthAuthenticator
+from tap_facebook.base_client import BaseFacebookClient, Listing
+from tap_facebook.exceptions import FacebookAPIError
+from tap_facebook.page_size import PageSizer
+from tap_facebook.rate_limit import RateLimitScheduler
+from tap_facebook.response_cache import ResponseCache
+from tap_facebook.retry import RetryPolicy
+from tap_facebook.transport import HTTPTransport
 
 LOGGER = singer.get_logger()
 
 
-class FacebookClient:
+class FacebookClient(BaseFacebookClient):
     """Client for interacting with Facebook Graph API."""
 
-    BASE_URL = "https://graph.facebook.com/v18.0"
-    DEFAULT_PAGE_SIZE = 100
-
-    def __init__(self, authenticator: FacebookOAuthAuthenticator):
+    def __init__(
+        self,
+        authenticator: FacebookOAuthAuthenticator,
+        config: Optional[Dict] = None,
+        transport: Optional[HTTPTransport] = None,
+        scheduler: Optional[RateLimitScheduler] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        page_sizer: Optional[PageSizer] = None,
+        response_cache: Optional[ResponseCache] = None
+    ):
         """
         Initialize the Facebook API client.
 
         Args:
             authenticator: OAuth authenticator instance
+            config: Tap configuration
+            transport: Shared HTTP transport (defaults to the authenticator's)
+            scheduler: Rate-limit scheduler (built from config if omitted)
+            retry_policy: Retry policy (defaults to the authenticator's)
+            page_sizer: Adaptive page sizer (built from config if omitted)
+            response_cache: Cache of GET responses (built from config if
+                omitted; None without response_cache_dir)
         """
-        self.authenticator = authenticator
+        super().__init__(
+            authenticator,
+            config=config,
+            scheduler=scheduler,
+            retry_policy=retry_policy,
+            page_sizer=page_sizer,
+            response_cache=response_cache
+        )
+        self.transport = transport or authenticator.transport
 
     def _get_headers(self) -> Dict[str, str]:
         """Get request headers with authentication."""
@@ -37,8 +66,9 @@ class FacebookClient:
         method: str,
         endpoint: str,
         params: Optional[Dict] = None,
-        json_body: Optional[Dict] = None
-    ) -> Dict:
+        json_body: Optional[Dict] = None,
+        data: Optional[Dict] = None
+    ) -> Any:
         """
         Make an authenticated request to the Facebook Graph API.
 
@@ -47,40 +77,86 @@ class FacebookClient:
             endpoint: API endpoint (without base URL)
             params: Query parameters
             json_body: JSON body for POST requests
+            data: Form-encoded body for POST requests
 
         Returns:
             Response JSON dictionary
 
         Raises:
-            requests.exceptions.HTTPError: On HTTP errors
+            FacebookAPIError: On HTTP errors (a requests HTTPError subclass)
         """
-        url = f"{self.BASE_URL}/{endpoint}"
+        url = f"{self.base_url}/{endpoint}"
         params = params or {}
 
         # Add access token to params (alternative to header)
         params['access_token'] = self.authenticator.get_access_token()
 
         try:
-            response = requests.request(
-                method=method,
-                url=url,
+            response = self._send(
+                method,
+                url,
                 params=params,
                 json=json_body,
-                timeout=30
+                data=data
             )
-            response.raise_for_status()
             return response.json()
 
-        except requests.exceptions.HTTPError as e:
-            LOGGER.error(f"HTTP error for {endpoint}: {e}")
-            if e.response is not None:
-                LOGGER.error(f"Response: {e.response.text}")
-            raise
-
         except requests.exceptions.RequestException as e:
-            LOGGER.error(f"Request failed for {endpoint}: {e}")
+            self._log_request_error(endpoint, e)
             raise
 
+    def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send one Graph API call, retrying transient failures.
+
+        Args:
+            method: HTTP method
+            url: Absolute URL
+            **kwargs: Extra arguments for the transport
+
+        Returns:
+            Successful response
+
+        Raises:
+            RateLimitError: When Facebook keeps reporting throttling
+            FacebookAPIError: On fatal HTTP errors or exhausted retries
+        """
+        description = f"{method} {url.split('?')[0]}"
+        return self.retry_policy.call(
+            lambda: self._send_once(method, url, **kwargs),
+            description
+        )
+
+    def _send_once(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a single attempt through the rate-limit scheduler.
+
+        GET responses come from the response cache when it holds a fresh
+        copy, and successful ones are stored there.
+
+        Args:
+            method: HTTP method
+            url: Absolute URL
+            **kwargs: Extra arguments for the transport
+
+        Returns:
+            Successful response
+
+        Raises:
+            RateLimitError: When Facebook reports throttling
+            FacebookAPIError: On other HTTP errors
+        """
+        cache_key, cached = self._cached_response(method, url, kwargs.get('params'))
+        if cached is not None:
+            return cached
+
+        with self.scheduler.slot():
+            response = self.transport.request(method, url, **kwargs)
+
+        self._check_response(response)
+        self._store_response(cache_key, url, kwargs.get('params'), response)
+        return response
+
     def paginate(
         self,
         endpoint: str,
@@ -98,41 +174,84 @@ class FacebookClient:
         Yields:
             Individual records from paginated results
         """
-        params = params or {}
-        params.setdefault('limit', self.DEFAULT_PAGE_SIZE)
+        for records, _ in self.paginate_pages(endpoint, params=params, data_key=data_key):
+            yield from records
+
+    def paginate_pages(
+        self,
+        endpoint: str,
+        params: Optional[Dict] = None,
+        data_key: str = 'data',
+        resume_params: Optional[Dict] = None
+    ) -> Iterator[Tuple[List[Dict], Optional[Dict]]]:
+        """
+        Paginate through API results one page at a time.
+
+        Alongside each page, yields the query parameters that fetch the next
+        page (taken from paging.next, without the access token). Saving them
+        in state lets an interrupted sync resume from the exact page it
+        stopped on by passing them back as resume_params.
+
+        Args:
+            endpoint: API endpoint to paginate
+            params: Query parameters
+            data_key: Key in response containing the data array
+            resume_params: Next-page parameters saved by an earlier run
 
-        next_url = None
-        page_count = 0
+        Yields:
+            Tuples of (page records, next-page params or None on the last page)
+        """
+        listing = Listing(endpoint, self.page_sizer, params=params, data_key=data_key, resume_params=resume_params)
+
+        while not listing.done:
+            limit = listing.limit()
 
-        while True:
-            page_count += 1
+            try:
+                data, elapsed, size_bytes = self._get_page(listing, limit)
 
-            if next_url:
-                # Use the full next URL provided by Facebook
-                response = requests.get(
-                    next_url,
-                    timeout=30
-                )
-                response.raise_for_status()
-                data = response.json()
-            else:
-                # First request
-                data = self.request('GET', endpoint, params=params)
+            except FacebookAPIError as e:
+                if listing.shrink_for(e):
+                    continue
+                raise
 
-            # Yield records from current page
-            records = data.get(data_key, [])
-            LOGGER.info(f"Page {page_count}: Retrieved {len(records)} records from {endpoint}")
+            yield listing.record_page(data, limit, elapsed, size_bytes)
 
-            for record in records:
-                yield record
+    def _get_page(self, listing: Listing, limit: int) -> Tuple[Dict, float, int]:
+        """
+        Fetch the next page of a listing, shrinking the page size on timeouts.
 
-            # Check for next page
-            paging = data.get('paging', {})
-            next_url = paging.get('next')
+        A timed-out attempt lowers the size before the retry policy retries
+        it, so the retry asks for a smaller page.
+
+        Args:
+            listing: Listing being paginated
+            limit: Page size to request first
+
+        Returns:
+            Tuple of (response JSON, seconds taken, response size in bytes)
+        """
+        url = f"{self.base_url}/{listing.endpoint}"
+        sizes = [limit]
+
+        def attempt() -> requests.Response:
+            page_params = listing.page_params(sizes[-1], self.authenticator.get_access_token())
+            try:
+                return self._send_once('GET', url, params=page_params)
+
+            except requests.exceptions.Timeout:
+                sizes.append(listing.timed_out(sizes[-1]))
+                raise
+
+        started = time.monotonic()
+
+        try:
+            response = self.retry_policy.call(attempt, f"GET {listing.endpoint}")
+
+        except requests.exceptions.RequestException as e:
+            listing.failed(e)
+            raise
 
-            if not next_url:
-                LOGGER.info(f"Pagination complete for {endpoint}. Total pages: {page_count}")
-                break
+        return response.json(), time.monotonic() - started, len(response.content)
 
     def get_page_info(self, page_id: str) -> Dict:
         """
@@ -145,16 +264,29 @@ class FacebookClient:
             Page information dictionary
         """
         params = {
-            'fields': 'id,name,username,fan_count,category,about'
+            'fields': self.PAGE_INFO_FIELDS
         }
         return self.request('GET', page_id, params=params)
 
+    def get_managed_pages(self) -> Iterator[Dict]:
+        """
+        List the Pages the user token can manage (/me/accounts).
+
+        Yields:
+            Page dictionaries with 'id', 'name' and the Page 'access_token'
+        """
+        params = {
+            'fields': self.MANAGED_PAGE_FIELDS
+        }
+        yield from self.paginate('me/accounts', params=params)
+
     def get_page_posts(
         self,
         page_id: str,
         fields: Optional[List[str]] = None,
         since: Optional[str] = None,
-        until: Optional[str] = None
+        until: Optional[str] = None,
+        insights_metrics: Optional[List[str]] = None
     ) -> Iterator[Dict]:
         """
         Get posts from a Facebook Page with engagement metrics.
@@ -164,36 +296,53 @@ class FacebookClient:
             fields: List of fields to retrieve
             since: Start date (Unix timestamp or strtotime)
             until: End date (Unix timestamp or strtotime)
+            insights_metrics: Post insight metrics to expand inline
 
         Yields:
             Post records with engagement data
         """
-        if fields is None:
-            fields = [
-                'id',
-                'message',
-                'created_time',
-                'updated_time',
-                'permalink_url',
-                'type',
-                'status_type',
-                'shares',
-                'reactions.summary(total_count).limit(0)',
-                'comments.summary(total_count).limit(0)',
-                'likes.summary(total_count).limit(0)'
-            ]
+        pages = self.get_page_post_pages(
+            page_id,
+            fields=fields,
+            since=since,
+            until=until,
+            insights_metrics=insights_metrics
+        )
+
+        for posts, _ in pages:
+            yield from posts
+
+    def get_page_post_pages(
+        self,
+        page_id: str,
+        fields: Optional[List[str]] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        resume_params: Optional[Dict] = None,
+        insights_metrics: Optional[List[str]] = None
+    ) -> Iterator[Tuple[List[Dict], Optional[Dict]]]:
+        """
+        Get posts from a Facebook Page one result page at a time.
 
-        params = {
-            'fields': ','.join(fields)
-        }
+        With insights_metrics, each post's insights are expanded inline
+        (insights.metric(...)) and returned under the post's 'insights' key,
+        replacing one insights request per post.
 
-        if since:
-            params['since'] = since
-        if until:
-            params['until'] = until
+        Args:
+            page_id: Facebook Page ID
+            fields: List of fields to retrieve
+            since: Start date (Unix timestamp or strtotime)
+            until: End date (Unix timestamp or strtotime)
+            resume_params: Next-page parameters saved by an earlier run
+            insights_metrics: Post insight metrics to expand inline
+
+        Yields:
+            Tuples of (posts, next-page params or None), see paginate_pages
+        """
+        params = self._post_listing_params(fields, since, until, insights_metrics)
 
         endpoint = f"{page_id}/posts"
-        yield from self.paginate(endpoint, params=params)
+        yield from self.paginate_pages(endpoint, params=params, resume_params=resume_params)
 
     def get_post_insights(self, post_id: str, metrics: Optional[List[str]] = None) -> List[Dict]:
         """
@@ -206,23 +355,70 @@ class FacebookClient:
         Returns:
             List of insight data points
         """
-        if metrics is None:
-            metrics = [
-                'post_impressions',
-                'post_impressions_unique',
-                'post_engaged_users',
-                'post_clicks',
-                'post_reactions_by_type_total'
-            ]
-
-        params = {
-            'metric': ','.join(metrics)
-        }
+        params = self._post_insights_params(metrics)
 
         endpoint = f"{post_id}/insights"
         data = self.request('GET', endpoint, params=params)
         return data.get('data', [])
 
+    def batch(self, sub_requests: List[Dict]) -> List[Optional[Dict]]:
+        """
+        Send up to MAX_BATCH_SIZE sub-requests in a single Graph batch call.
+
+        Args:
+            sub_requests: Batch entries, each with 'method' and 'relative_url'
+
+        Returns:
+            Raw per-sub-request responses in request order. An entry is None
+            when Facebook did not complete that sub-request.
+
+        Raises:
+            ValueError: If more than MAX_BATCH_SIZE sub-requests are given
+        """
+        return self.request('POST', '', data=self._batch_body(sub_requests))
+
+    def get_post_insights_batch(
+        self,
+        post_ids: List[str],
+        metrics: Optional[List[str]] = None
+    ) -> List[Dict]:
+        """
+        Get insights for several posts in one batch call.
+
+        Each post is an isolated sub-request, so a post without insights
+        does not fail the rest of the batch. Sub-requests that failed with a
+        retryable error (throttling, transient Graph errors, 5xx, or not
+        completed) are batched again after a backoff, once the scheduler's
+        throttling pause is over, and count against the retry budgets.
+
+        Args:
+            post_ids: Up to MAX_BATCH_SIZE Facebook Post IDs
+            metrics: List of metric names to retrieve
+
+        Returns:
+            One result per post, in input order, with keys 'post_id',
+            'data' (insight data points, or None on failure), 'error'
+            (error message, or None on success) and 'retryable' (whether
+            the error was transient, i.e. retries ran out)
+        """
+        results: Dict[str, Dict] = {}
+        pending = list(post_ids)
+        attempt = 0
+
+        while pending:
+            responses = self.batch(self._insights_batch_requests(pending, metrics))
+            pending, error = self._collect_batch_results(pending, responses, results)
+
+            if pending:
+                delay = self.retry_policy.next_delay(error, attempt, f"insights of {len(pending)} posts in a batch")
+                if delay is None:
+                    break
+
+                attempt += 1
+                time.sleep(delay)
+
+        return [results[post_id] for post_id in post_ids]
+
     def get_page_insights(
         self,
         page_id: str,
@@ -244,26 +440,7 @@ class FacebookClient:
         Returns:
             List of insight data points
         """
-        if metrics is None:
-            metrics = [
-                'page_impressions',
-                'page_impressions_unique',
-                'page_engaged_users',
-                'page_post_engagements',
-                'page_fans',
-                'page_fan_adds',
-                'page_fan_removes'
-            ]
-
-        params = {
-            'metric': ','.join(metrics),
-            'period': period
-        }
-
-        if since:
-            params['since'] = since
-        if until:
-            params['until'] = until
+        params = self._page_insights_params(metrics, period, since, until)
 
         endpoint = f"{page_id}/insights"
         data = self.request('GET', endpoint, params=params)
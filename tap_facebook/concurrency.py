@@ -0,0 +1,245 @@
+"""
+Concurrency helpers for fetching Graph API data with bounded worker pools.
+"""
+
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple, TypeVar
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+# Config options that set how many Graph requests a stream may run at once
+WORKER_OPTIONS = ('max_workers', 'posts_backfill_workers', 'page_insights_max_workers')
+
+# Pages synced at once when page_ids is set
+DEFAULT_MAX_CONCURRENT_PAGES = 4
+
+# Stream chains issuing requests side by side with parallel_streams:
+# posts -> post_insights, and page_insights
+PARALLEL_STREAM_CHAINS = 2
+
+
+def max_concurrent_pages(config: Dict) -> int:
+    """
+    Get the number of pages synced at the same time.
+
+    Args:
+        config: Tap configuration
+
+    Returns:
+        max_concurrent_pages (default DEFAULT_MAX_CONCURRENT_PAGES) when
+        page_ids is set, else 1
+    """
+    if not config.get('page_ids'):
+        return 1
+
+    return max(1, int(config.get('max_concurrent_pages') or DEFAULT_MAX_CONCURRENT_PAGES))
+
+
+def max_concurrent_requests(config: Dict) -> int:
+    """
+    Get the maximum number of Graph requests in flight across the tap.
+
+    Args:
+        config: Tap configuration
+
+    Returns:
+        max_concurrent_requests if set, else the largest worker option or
+        number of concurrent pages, times PARALLEL_STREAM_CHAINS with
+        parallel_streams
+    """
+    if config.get('max_concurrent_requests'):
+        return int(config['max_concurrent_requests'])
+
+    workers = max(int(config.get(option) or 1) for option in WORKER_OPTIONS)
+    workers = max(workers, max_concurrent_pages(config))
+
+    if config.get('parallel_streams'):
+        workers *= PARALLEL_STREAM_CHAINS
+
+    return workers
+
+
+def ordered_map(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    max_workers: int = 1,
+    max_pending: int = None
+) -> Iterator[R]:
+    """
+    Apply func to items on a thread pool, yielding results in input order.
+
+    Unlike ThreadPoolExecutor.map, items are consumed lazily and at most
+    max_pending calls are in flight, so memory stays bounded for long inputs.
+    Results are yielded on the calling thread, which keeps a single writer.
+
+    Args:
+        func: Function to apply to each item
+        items: Input items (consumed lazily)
+        max_workers: Number of worker threads; 1 or less runs serially
+        max_pending: Maximum submitted-but-unyielded calls (default: 2 * max_workers)
+
+    Yields:
+        func(item) for each item, in the order of items
+
+    Raises:
+        Exception: Re-raises the first exception raised by func, in input order
+    """
+    if max_workers <= 1:
+        for item in items:
+            yield func(item)
+        return
+
+    max_pending = max_pending or max_workers * 2
+    pending = deque()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        try:
+            for item in items:
+                pending.append(executor.submit(func, item))
+
+                if len(pending) >= max_pending:
+                    yield pending.popleft().result()
+
+            while pending:
+                yield pending.popleft().result()
+
+        finally:
+            # Don't run queued work if the consumer stopped early or failed
+            for future in pending:
+                future.cancel()
+
+
+_DONE = object()
+
+
+def parallel_iterate(
+    sources: List[Callable[[], Iterable[T]]],
+    max_workers: int = 1,
+    max_queued: int = 16
+) -> Iterator[Tuple[int, T]]:
+    """
+    Drain several iterables concurrently, yielding their items as they arrive.
+
+    Each source is a zero-argument callable returning an iterable; up to
+    max_workers of them run at once on worker threads. Items are handed to the
+    calling thread through a bounded queue, so slow consumers apply
+    backpressure and writes stay on a single thread. Items from one source
+    keep their relative order; items from different sources interleave.
+
+    Args:
+        sources: Callables producing the iterables to drain
+        max_workers: Number of sources drained at the same time
+        max_queued: Maximum items buffered between workers and the consumer
+
+    Yields:
+        Tuples of (source index, item)
+
+    Raises:
+        Exception: Re-raises the first exception raised by any source
+    """
+    if max_workers <= 1:
+        for index, source in enumerate(sources):
+            for item in source():
+                yield index, item
+        return
+
+    yield from _threaded_iterate(sources, max_workers, max_queued)
+
+
+def prefetch(source: Callable[[], Iterable[T]], max_queued: int = 1000) -> Iterator[T]:
+    """
+    Run an iterable on a background thread, buffering up to max_queued items.
+
+    Lets a producer (e.g. a paginated listing) keep fetching while the caller
+    processes earlier items, with memory bounded by the queue size.
+
+    Args:
+        source: Callable producing the iterable to drain
+        max_queued: Maximum items buffered ahead of the consumer
+
+    Yields:
+        Items of the iterable, in order
+    """
+    for _, item in _threaded_iterate([source], 1, max_queued):
+        yield item
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """
+    Group items into lists of up to size items, consuming items lazily.
+
+    Args:
+        items: Input items
+        size: Maximum items per group
+
+    Yields:
+        Lists of consecutive items
+    """
+    batch = []
+
+    for item in items:
+        batch.append(item)
+
+        if len(batch) >= size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def _threaded_iterate(
+    sources: List[Callable[[], Iterable[T]]],
+    max_workers: int,
+    max_queued: int
+) -> Iterator[Tuple[int, T]]:
+    """Drain sources on worker threads through a bounded queue (see parallel_iterate)."""
+    items = queue.Queue(maxsize=max_queued)
+    stopped = threading.Event()
+
+    def put(entry) -> bool:
+        # Give up once the consumer has gone away instead of blocking forever
+        while not stopped.is_set():
+            try:
+                items.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def drain(index: int) -> None:
+        if stopped.is_set():
+            return
+        try:
+            for item in sources[index]():
+                if not put((index, item, None)):
+                    return
+            put((index, _DONE, None))
+        except BaseException as e:
+            put((index, _DONE, e))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for index in range(len(sources)):
+            executor.submit(drain, index)
+
+        try:
+            remaining = len(sources)
+
+            while remaining:
+                index, item, error = items.get()
+
+                if error is not None:
+                    raise error
+
+                if item is _DONE:
+                    remaining -= 1
+                    continue
+
+                yield index, item
+
+        finally:
+            stopped.set()
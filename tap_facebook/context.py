@@ -0,0 +1,55 @@
+"""
+Per-run state shared between the streams of one sync.
+"""
+
+from typing import Dict, Iterable, Optional
+from tap_facebook.fingerprints import FingerprintStore
+from tap_facebook.metric_catalog import MetricCatalog
+from tap_facebook.post_index import PostIndex
+from tap_facebook.writer import MessageWriter
+
+
+class SyncContext:
+    """Objects shared by every stream syncing one page in a single sync run."""
+
+    def __init__(
+        self,
+        config: Dict,
+        selected_streams: Iterable[str] = (),
+        page_id: Optional[str] = None,
+        writer: Optional[MessageWriter] = None,
+        metric_catalog: Optional[MetricCatalog] = None,
+        fingerprints: Optional[FingerprintStore] = None
+    ):
+        """
+        Initialize the context.
+
+        Args:
+            config: Tap configuration
+            selected_streams: IDs of the streams selected for this run
+            page_id: Page synced with this context when several pages are
+                synced in one run; stream state is then kept per page
+            writer: Message writer, shared by the contexts of pages synced
+                concurrently
+            metric_catalog: Catalog the insights streams add their metrics
+                to, shared by the contexts of every page of the run (None
+                when insight_metrics is not selected)
+            fingerprints: Store used to suppress unchanged records, shared by
+                the contexts of every page of the run (None when
+                fingerprint_db is not set)
+        """
+        selected_streams = set(selected_streams)
+        self.page_id = page_id
+        self.writer = writer or MessageWriter()
+        self.metric_catalog = metric_catalog
+        self.fingerprints = fingerprints
+
+        # Only worth building when a later stream can reuse the posts listing
+        self.post_index: Optional[PostIndex] = None
+        if {'posts', 'post_insights'} <= selected_streams:
+            self.post_index = PostIndex.from_config(config)
+
+    def close(self) -> None:
+        """Release resources held for the run."""
+        if self.post_index is not None:
+            self.post_index.close()
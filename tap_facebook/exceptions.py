@@ -0,0 +1,100 @@
+"""
+Exceptions raised by the Facebook Graph API client.
+"""
+
+import requests
+from typing import Dict, Optional
+
+
+class FacebookAPIError(requests.exceptions.HTTPError):
+    """HTTP error response from the Graph API, with the parsed Graph error fields."""
+
+    def __init__(
+        self,
+        message: str,
+        code: Optional[int] = None,
+        subcode: Optional[int] = None,
+        response: Optional[requests.Response] = None,
+        is_transient: bool = False
+    ):
+        """
+        Initialize the error.
+
+        Args:
+            message: Error message
+            code: Graph API error code (error.code)
+            subcode: Graph API error subcode (error.error_subcode)
+            response: Response that carried the error
+            is_transient: Whether Facebook flagged the error as transient
+        """
+        super().__init__(message, response=response)
+        self.code = code
+        self.subcode = subcode
+        self.is_transient = is_transient
+
+    @property
+    def is_oversize(self) -> bool:
+        """Whether Graph asked for less data per request ("reduce the amount of data")."""
+        return self.code == 1 and 'reduce the amount of data' in str(self).lower()
+
+    @classmethod
+    def from_response(cls, response: requests.Response) -> 'FacebookAPIError':
+        """
+        Build an error from a failed Graph API response.
+
+        Args:
+            response: Response with a 4xx/5xx status
+
+        Returns:
+            FacebookAPIError carrying the Graph error code and message
+        """
+        try:
+            error = response.json().get('error', {})
+        except ValueError:
+            error = {}
+
+        if not isinstance(error, dict):
+            error = {}
+
+        message = error.get('message') or f"{response.status_code} Error for url: {response.url}"
+
+        return cls(
+            message=f"{response.status_code} {message}",
+            code=error.get('code'),
+            subcode=error.get('error_subcode'),
+            response=response,
+            is_transient=bool(error.get('is_transient', False))
+        )
+
+    @classmethod
+    def from_batch_response(cls, sub_response: Optional[Dict]) -> 'FacebookAPIError':
+        """
+        Build an error from a failed sub-response of a batch call.
+
+        Args:
+            sub_response: Raw sub-response ({"code": ..., "headers": [...],
+                "body": "..."}), or None for a sub-request Graph did not complete
+
+        Returns:
+            FacebookAPIError carrying the sub-response's status, headers and
+            Graph error, as if it had been a response of its own
+        """
+        response = requests.Response()
+        response.url = 'batch sub-request'
+
+        if sub_response is None:
+            # Graph leaves the sub-requests it ran out of time for as null
+            response.status_code = 504
+            response._content = b'{"error": {"message": "Batch sub-request did not complete"}}'
+        else:
+            response.status_code = int(sub_response.get('code') or 500)
+            response._content = (sub_response.get('body') or '').encode('utf-8')
+
+            for header in sub_response.get('headers') or []:
+                response.headers[header.get('name')] = header.get('value')
+
+        return cls.from_response(response)
+
+
+class RateLimitError(FacebookAPIError):
+    """Graph API throttling error (codes 4, 17, 32, 613 and business use case limits)."""
@@ -0,0 +1,523 @@
+"""
+Local stand-in for the Graph API endpoints the tap calls, for benchmarks.
+
+Serves synthetic pages whose posts are generated on demand, so a page with
+a million posts costs nothing to set up. Run it and point the tap at it
+with graph_base_url:
+
+    tap-facebook-fake-graph --port 8765 --posts 1000000 --latency 0.05
+    # config.json: {"graph_base_url": "http://127.0.0.1:8765", ...}
+"""
+
+import argparse
+import base64
+import json
+import math
+import random
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+API_VERSION = 'v18.0'
+
+REACTION_TYPES = ['like', 'love', 'wow', 'haha', 'sad', 'angry']
+
+
+def _value(*parts) -> int:
+    """Deterministic pseudo-random metric value for a set of keys."""
+    return zlib.crc32('|'.join(str(part) for part in parts).encode('utf-8')) % 1000
+
+
+def _parse_time(value: str) -> datetime:
+    """Parse a since/until parameter (unix time, ISO date or datetime) as UTC."""
+    if value.isdigit():
+        return datetime.fromtimestamp(int(value), tz=timezone.utc)
+
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00').replace('+0000', '+00:00'))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _format_time(value: datetime) -> str:
+    """Format a time the way Graph does."""
+    return value.strftime('%Y-%m-%dT%H:%M:%S+0000')
+
+
+def _split_fields(fields: str) -> List[str]:
+    """Split a fields parameter on the commas outside parentheses and braces."""
+    parts, depth, current = [], 0, ''
+
+    for char in fields:
+        if char in '({':
+            depth += 1
+        elif char in ')}':
+            depth -= 1
+
+        if char == ',' and depth == 0:
+            parts.append(current)
+            current = ''
+        else:
+            current += char
+
+    if current:
+        parts.append(current)
+
+    return parts
+
+
+class SyntheticPage:
+    """
+    A page with post_count posts, one every interval seconds back from newest.
+
+    Post i (0 is the newest) and its insights are computed from i, so
+    listings, cursors and since/until windows work without storing posts.
+    """
+
+    def __init__(self, page_id: str, post_count: int, newest: datetime, interval: int = 3600):
+        """
+        Initialize the page.
+
+        Args:
+            page_id: Page ID
+            post_count: Number of posts
+            newest: Creation time of the newest post
+            interval: Seconds between consecutive posts
+        """
+        self.page_id = page_id
+        self.post_count = post_count
+        self.newest = int(newest.timestamp())
+        self.interval = max(1, interval)
+
+    def post_id(self, index: int) -> str:
+        """ID of post index."""
+        return f"{self.page_id}_{index}"
+
+    def index_range(self, since: Optional[str], until: Optional[str]) -> Tuple[int, int]:
+        """
+        Indexes of the posts created in [since, until]; like Graph, both
+        bounds are inclusive.
+
+        Returns:
+            (first, last + 1) indexes, newest first
+        """
+        first, stop = 0, self.post_count
+
+        if until:
+            first = max(0, -((int(_parse_time(until).timestamp()) - self.newest) // self.interval))
+        if since:
+            stop = min(stop, (self.newest - int(_parse_time(since).timestamp())) // self.interval + 1)
+
+        return first, max(first, stop)
+
+    def post(self, index: int, fields: List[str]) -> Dict:
+        """A post with the requested fields."""
+        created = _format_time(datetime.fromtimestamp(self.newest - index * self.interval, tz=timezone.utc))
+        post = {'id': self.post_id(index)}
+
+        for field in fields:
+            name = field.split('.')[0].split('{')[0]
+
+            if name in ('created_time', 'updated_time'):
+                post[name] = created
+            elif name == 'message':
+                post[name] = f"Synthetic post {index} of page {self.page_id}"
+            elif name == 'permalink_url':
+                post[name] = f"https://www.facebook.com/{self.page_id}/posts/{index}"
+            elif name == 'type':
+                post[name] = 'status'
+            elif name == 'status_type':
+                post[name] = 'mobile_status_update'
+            elif name == 'shares':
+                post[name] = {'count': _value(self.page_id, index, 'shares') % 50}
+            elif name in ('likes', 'comments', 'reactions'):
+                post[name] = {'data': [], 'summary': {'total_count': _value(self.page_id, index, name)}}
+            elif name == 'insights' and '.metric(' in field:
+                metrics = field[field.index('(') + 1:field.rindex(')')].split(',')
+                post[name] = {'data': self.post_insights(index, metrics)}
+
+        return post
+
+    def post_insights(self, index: int, metrics: List[str]) -> List[Dict]:
+        """Lifetime insights of post index."""
+        insights = []
+
+        for metric in metrics:
+            if metric == 'post_reactions_by_type_total':
+                value = {reaction: _value(self.page_id, index, metric, reaction) for reaction in REACTION_TYPES[:3]}
+            else:
+                value = _value(self.page_id, index, metric)
+
+            insights.append({
+                'name': metric,
+                'period': 'lifetime',
+                'values': [{'value': value}],
+                'title': f"Lifetime {metric.replace('_', ' ').title()}",
+                'description': f"Lifetime: synthetic {metric} of the post.",
+                'id': f"{self.post_id(index)}/insights/{metric}/lifetime"
+            })
+
+        return insights
+
+    def page_insights(self, metrics: List[str], period: str, since: Optional[str], until: Optional[str]) -> List[Dict]:
+        """Daily page insights for each day in [since, until)."""
+        end = _parse_time(until).date() if until else datetime.now(timezone.utc).date()
+        start = _parse_time(since).date() if since else end - timedelta(days=2)
+        days = [start + timedelta(days=offset) for offset in range((end - start).days)]
+
+        return [
+            {
+                'name': metric,
+                'period': period,
+                'values': [
+                    {
+                        'value': _value(self.page_id, metric, day.isoformat()),
+                        'end_time': f"{(day + timedelta(days=1)).isoformat()}T07:00:00+0000"
+                    }
+                    for day in days
+                ],
+                'title': f"Daily {metric.replace('_', ' ').title()}",
+                'description': f"Daily: synthetic {metric} of the page.",
+                'id': f"{self.page_id}/insights/{metric}/{period}"
+            }
+            for metric in metrics
+        ]
+
+
+class FakeGraphAPI:
+    """
+    Routes Graph API requests to synthetic pages.
+
+    Every call (including each batch sub-request) counts against a usage
+    budget of calls_per_window calls per window_seconds, reported in
+    X-App-Usage headers; once it is used up, calls fail with the Graph
+    application rate-limit error (and a Retry-After of the rest of the
+    window) until the window ends. throttle_rate additionally fails that
+    fraction of calls with a Page-level throttling error. Each HTTP request
+    takes latency seconds (plus up to jitter).
+    """
+
+    def __init__(
+        self,
+        pages: Dict[str, SyntheticPage],
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        calls_per_window: int = 0,
+        window_seconds: float = 60.0,
+        throttle_rate: float = 0.0,
+        seed: int = 0
+    ):
+        """
+        Initialize the API.
+
+        Args:
+            pages: Synthetic pages by Page ID
+            latency: Seconds each HTTP request takes
+            jitter: Extra random seconds (uniform, up to this) per request
+            calls_per_window: Call budget per window (0 for unlimited)
+            window_seconds: Length of a usage window
+            throttle_rate: Fraction of calls failed with a throttling error
+            seed: Seed for jitter and random throttling
+        """
+        self.pages = pages
+        self.latency = latency
+        self.jitter = jitter
+        self.calls_per_window = calls_per_window
+        self.window_seconds = window_seconds
+        self.throttle_rate = throttle_rate
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_calls = 0
+        self._stats: Dict[str, int] = {}
+
+    def handle(self, method: str, path: str, params: Dict, base_url: str) -> Tuple[int, Dict, Dict]:
+        """
+        Answer one HTTP request.
+
+        Args:
+            method: HTTP method
+            path: URL path
+            params: Query and form parameters
+            base_url: Scheme and host the server was reached at, for paging links
+
+        Returns:
+            Tuple of (status code, extra headers, JSON body)
+        """
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+
+        if path == '/__stats':
+            return 200, {}, self.stats()
+
+        path = path.split(f"/{API_VERSION}", 1)[-1].strip('/')
+
+        if method == 'POST' and path == '' and 'batch' in params:
+            self._count('batch')
+            responses = self._batch(json.loads(params['batch']), base_url)
+            return 200, self._usage_headers(calls=0), responses
+
+        return self._call(method, path, params, base_url)
+
+    def stats(self) -> Dict[str, int]:
+        """Calls served by kind (posts, post_insights, batch, throttled, ...)."""
+        with self._lock:
+            return dict(self._stats)
+
+    def _call(self, method: str, path: str, params: Dict, base_url: str) -> Tuple[int, Dict, Dict]:
+        """Answer one Graph call (a request or a batch sub-request)."""
+        headers = self._usage_headers(calls=1)
+        usage_pct = json.loads(headers['X-App-Usage'])['call_count']
+
+        if path == 'oauth/access_token':
+            self._count('oauth')
+            return 200, headers, {'access_token': 'fake-user-token', 'token_type': 'bearer', 'expires_in': 5184000}
+
+        if not params.get('access_token'):
+            return 400, headers, self._error(104, 'An access token is required to request this resource.')
+
+        if usage_pct >= 100:
+            self._count('throttled')
+            headers['Retry-After'] = str(self._window_remaining())
+            return 400, headers, self._error(4, '(#4) Application request limit reached')
+
+        if self.throttle_rate and self._random.random() < self.throttle_rate:
+            self._count('throttled')
+            headers['Retry-After'] = '1'
+            return 400, headers, self._error(80001, 'There have been too many calls to this Page account.')
+
+        parts = path.split('/')
+        page = self.pages.get(parts[0].split('_')[0])
+
+        if path == 'me/accounts':
+            self._count('accounts')
+            return 200, headers, {'data': [
+                {'id': page_id, 'name': f"Page {page_id}", 'access_token': f"fake-page-token-{page_id}"}
+                for page_id in self.pages
+            ]}
+
+        if page is None or method != 'GET':
+            self._count('unknown')
+            return 404, headers, self._error(803, f"(#803) Some of the aliases you requested do not exist: {path}")
+
+        if parts[1:] == ['posts']:
+            self._count('posts')
+            return 200, headers, self._posts(page, path, params, base_url)
+
+        if parts[1:] == ['insights'] and '_' in parts[0]:
+            self._count('post_insights')
+            index = int(parts[0].split('_')[1])
+            if index >= page.post_count:
+                return 404, headers, self._error(100, 'Unsupported get request.')
+            return 200, headers, {'data': page.post_insights(index, params.get('metric', '').split(','))}
+
+        if parts[1:] == ['insights']:
+            self._count('page_insights')
+            return 200, headers, {'data': page.page_insights(
+                params.get('metric', '').split(','),
+                params.get('period', 'day'),
+                params.get('since'),
+                params.get('until')
+            )}
+
+        if len(parts) == 1:
+            self._count('page')
+            return 200, headers, {'id': page.page_id, 'name': f"Page {page.page_id}", 'fan_count': 1000}
+
+        self._count('unknown')
+        return 400, headers, self._error(100, 'Unsupported get request.')
+
+    def _posts(self, page: SyntheticPage, path: str, params: Dict, base_url: str) -> Dict:
+        """One page of a {page_id}/posts listing with cursor pagination."""
+        first, stop = page.index_range(params.get('since'), params.get('until'))
+        limit = min(int(params.get('limit', 25)), 100 if 'insights' in params.get('fields', '') else 1000)
+
+        if params.get('after'):
+            first = max(first, int(base64.b64decode(params['after']).decode('ascii')))
+
+        indexes = range(first, min(stop, first + limit))
+        fields = _split_fields(params.get('fields', 'id,created_time,message'))
+        body = {'data': [page.post(index, fields) for index in indexes]}
+
+        if indexes:
+            body['paging'] = {'cursors': {
+                'before': base64.b64encode(str(indexes[0]).encode('ascii')).decode('ascii'),
+                'after': base64.b64encode(str(indexes[-1] + 1).encode('ascii')).decode('ascii')
+            }}
+
+            if indexes[-1] + 1 < stop:
+                next_params = dict(params, limit=limit, after=body['paging']['cursors']['after'])
+                body['paging']['next'] = f"{base_url}/{API_VERSION}/{path}?{urlencode(next_params)}"
+
+        return body
+
+    def _batch(self, sub_requests: List[Dict], base_url: str) -> List[Dict]:
+        """Answer the sub-requests of a batch call."""
+        responses = []
+
+        for sub_request in sub_requests:
+            url = urlparse(sub_request.get('relative_url', ''))
+            params = dict(parse_qsl(url.query), access_token='batch')
+            code, headers, body = self._call(sub_request.get('method', 'GET'), url.path.strip('/'), params, base_url)
+            responses.append({
+                'code': code,
+                'headers': [{'name': name, 'value': value} for name, value in headers.items()],
+                'body': json.dumps(body)
+            })
+
+        return responses
+
+    def _usage_headers(self, calls: int) -> Dict[str, str]:
+        """Count calls against the usage window and report its usage as X-App-Usage."""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= self.window_seconds:
+                self._window_start = now
+                self._window_calls = 0
+
+            self._window_calls += calls
+            usage_pct = int(self._window_calls * 100 / self.calls_per_window) if self.calls_per_window else 0
+
+        return {'X-App-Usage': json.dumps({
+            'call_count': usage_pct,
+            'total_cputime': usage_pct // 2,
+            'total_time': usage_pct // 2
+        })}
+
+    def _window_remaining(self) -> int:
+        """Whole seconds until the usage window resets."""
+        with self._lock:
+            return max(1, math.ceil(self.window_seconds - (time.monotonic() - self._window_start)))
+
+    def _count(self, kind: str) -> None:
+        """Count a served call by kind."""
+        with self._lock:
+            self._stats[kind] = self._stats.get(kind, 0) + 1
+
+    def _error(self, code: int, message: str) -> Dict:
+        """Graph error body."""
+        return {'error': {'message': message, 'type': 'OAuthException', 'code': code, 'fbtrace_id': 'fake'}}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """HTTP handler passing requests to the server's FakeGraphAPI."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self._respond('GET')
+
+    def do_POST(self):
+        self._respond('POST')
+
+    def _respond(self, method: str) -> None:
+        url = urlparse(self.path)
+        params = dict(parse_qsl(url.query))
+
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            params.update(parse_qsl(self.rfile.read(length).decode('utf-8')))
+
+        base_url = f"http://{self.headers.get('Host') or '%s:%s' % self.server.server_address[:2]}"
+        status, headers, body = self.server.api.handle(method, url.path, params, base_url)
+        content = json.dumps(body).encode('utf-8')
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=UTF-8')
+        self.send_header('Content-Length', str(len(content)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        """Keep request logging off the benchmark's output."""
+        pass
+
+
+class FakeGraphServer(ThreadingHTTPServer):
+    """Threaded HTTP server for a FakeGraphAPI."""
+
+    daemon_threads = True
+
+    def __init__(self, api: FakeGraphAPI, host: str = '127.0.0.1', port: int = 0):
+        """
+        Initialize the server.
+
+        Args:
+            api: API answering the requests
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free one)
+        """
+        super().__init__((host, port), _Handler)
+        self.api = api
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL to use as graph_base_url."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'FakeGraphServer':
+        """Serve on a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, name='fake-graph', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    """Run a fake Graph API server until interrupted."""
+    parser = argparse.ArgumentParser(description='Local stand-in for the Facebook Graph API')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to listen on')
+    parser.add_argument('--port', type=int, default=8765, help='Port to listen on')
+    parser.add_argument('--pages', type=int, default=1, help='Number of synthetic pages')
+    parser.add_argument('--posts', type=int, default=1000, help='Posts per page')
+    parser.add_argument('--post-interval', type=int, default=3600, help='Seconds between posts')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds each request takes')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Extra random seconds per request')
+    parser.add_argument('--calls-per-window', type=int, default=0, help='Call budget per usage window (0: unlimited)')
+    parser.add_argument('--window-seconds', type=float, default=60.0, help='Length of a usage window')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Fraction of calls failed as throttled')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+
+    newest = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    pages = {
+        str(100000 + number): SyntheticPage(str(100000 + number), args.posts, newest, args.post_interval)
+        for number in range(args.pages)
+    }
+    api = FakeGraphAPI(
+        pages,
+        latency=args.latency,
+        jitter=args.jitter,
+        calls_per_window=args.calls_per_window,
+        window_seconds=args.window_seconds,
+        throttle_rate=args.throttle_rate,
+        seed=args.seed
+    )
+    server = FakeGraphServer(api, args.host, args.port)
+
+    print(f"Fake Graph API listening on {server.url}; pages: {', '.join(pages)}", flush=True)
+    print(f'Tap config: "graph_base_url": "{server.url}", "page_id": "{next(iter(pages))}"', flush=True)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Calls served: {json.dumps(api.stats(), sort_keys=True)}", flush=True)
+
+
+if __name__ == '__main__':
+    main()
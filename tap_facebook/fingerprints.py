@@ -0,0 +1,183 @@
+"""
+Fingerprints of emitted records, kept across runs to suppress unchanged ones.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional
+
+
+class FingerprintStore:
+    """
+    SQLite table of the last emitted value of every record key.
+
+    Each key (stream name plus key property values) and each record are
+    reduced to 64-bit hashes, so a row takes a couple of dozen bytes on disk
+    and tens of millions of keys fit in a file of a few hundred MB, while
+    memory stays at the SQLite page cache. A record whose hash matches the
+    stored one is unchanged and is not emitted again.
+
+    New fingerprints are staged in an open transaction and only committed
+    once the writer has emitted a STATE message after their records, so
+    records from a run that fails before its next STATE are emitted again
+    by the next run rather than lost.
+
+    A committed fingerprint still only proves the record reached stdout,
+    not that the target stored it. Each run therefore gets a generation,
+    carried in its STATE messages under STATE_KEY, and a fingerprint counts
+    only if its generation is no newer than the one in the STATE the run
+    was started with. When a target fails and the job is rerun from an
+    earlier STATE, the fingerprints of the runs after it are ignored and
+    their records emitted again.
+    """
+
+    DEFAULT_STREAMS = ['post_insights']
+
+    # State key holding the generation of the run that wrote the STATE
+    STATE_KEY = 'fingerprint_generation'
+
+    # SQLite page cache in KiB
+    CACHE_KB = 64 * 1024
+
+    def __init__(self, path: str, streams: Optional[Iterable[str]] = None):
+        """
+        Initialize the store.
+
+        Args:
+            path: SQLite file (created if missing)
+            streams: Streams whose unchanged records are suppressed
+                (DEFAULT_STREAMS if omitted)
+        """
+        self.path = os.path.abspath(os.path.expanduser(path))
+        self.streams = set(self.DEFAULT_STREAMS if streams is None else streams)
+        self._lock = threading.Lock()
+        self._changed = 0
+        self._unchanged = 0
+
+        # Set by start()
+        self.generation: Optional[int] = None
+        self.trusted_generation = 0
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute(f'PRAGMA cache_size=-{self.CACHE_KB}')
+
+        columns = [row[1] for row in self._db.execute('PRAGMA table_info(fingerprints)')]
+        if columns and 'generation' not in columns:
+            # Fingerprints from before generations cannot be trusted
+            self._db.execute('DROP TABLE fingerprints')
+
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS fingerprints '
+            '(key INTEGER PRIMARY KEY, fingerprint INTEGER NOT NULL, generation INTEGER NOT NULL)'
+        )
+        self._db.execute('CREATE TABLE IF NOT EXISTS generations (generation INTEGER PRIMARY KEY)')
+        self._db.commit()
+
+    @classmethod
+    def from_config(cls, config: Dict) -> Optional['FingerprintStore']:
+        """
+        Build a store from tap configuration.
+
+        Args:
+            config: Tap configuration
+
+        Returns:
+            Store at fingerprint_db for fingerprint_streams, or None when
+            fingerprint_db is not set
+        """
+        path = config.get('fingerprint_db')
+        return cls(path, config.get('fingerprint_streams')) if path else None
+
+    def start(self, state: Dict) -> None:
+        """
+        Begin a run from the state the tap was started with.
+
+        Trusts the fingerprints of the generation recorded in state and
+        older ones, and gives the run a new generation, newer than every
+        earlier one, which is recorded in state for its STATE messages.
+
+        Args:
+            state: Input state (updated in place)
+        """
+        with self._lock:
+            self.trusted_generation = int(state.get(self.STATE_KEY) or 0)
+
+            latest = self._db.execute('SELECT MAX(generation) FROM generations').fetchone()[0] or 0
+            self.generation = max(latest, self.trusted_generation) + 1
+            self._db.execute('INSERT INTO generations (generation) VALUES (?)', (self.generation,))
+            self._db.commit()
+
+        state[self.STATE_KEY] = self.generation
+
+    def tracks(self, stream_name: str) -> bool:
+        """Whether unchanged records of a stream are suppressed."""
+        return stream_name in self.streams
+
+    def changed(self, stream_name: str, key_values: List, record: Dict) -> bool:
+        """
+        Check a record against the stored fingerprint of its key, staging its own.
+
+        Args:
+            stream_name: Stream name
+            key_values: Values of the stream's key properties in the record
+            record: Record about to be emitted
+
+        Returns:
+            False if the key's last emitted record, as of the trusted
+            generation, was identical, else True
+
+        Raises:
+            RuntimeError: If start() was not called
+        """
+        if self.generation is None:
+            raise RuntimeError("FingerprintStore.start() must be called before checking records")
+
+        key = self._hash('\x1f'.join([stream_name] + [str(value) for value in key_values]))
+        fingerprint = self._hash(json.dumps(record, sort_keys=True, default=str))
+
+        with self._lock:
+            row = self._db.execute('SELECT fingerprint, generation FROM fingerprints WHERE key = ?', (key,)).fetchone()
+
+            if row is not None and row[0] == fingerprint and row[1] <= self.trusted_generation:
+                self._unchanged += 1
+                return False
+
+            self._db.execute(
+                'INSERT OR REPLACE INTO fingerprints (key, fingerprint, generation) VALUES (?, ?, ?)',
+                (key, fingerprint, self.generation)
+            )
+            self._changed += 1
+            return True
+
+    def commit(self) -> None:
+        """Make the staged fingerprints permanent. Call once a STATE has been emitted after their records."""
+        with self._lock:
+            self._db.commit()
+
+    def close(self) -> None:
+        """Close the store, discarding fingerprints staged since the last commit."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get change-detection counters for the run.
+
+        Returns:
+            Dictionary with changed (emitted) and unchanged (suppressed) records
+        """
+        with self._lock:
+            return {'changed': self._changed, 'unchanged': self._unchanged}
+
+    def _hash(self, value: str) -> int:
+        """64-bit signed hash of a string (SQLite's INTEGER range)."""
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest()
+        return int.from_bytes(digest, 'big', signed=True)
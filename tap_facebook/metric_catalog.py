@@ -0,0 +1,59 @@
+"""
+Per-run catalog of the insight metrics seen while syncing.
+"""
+
+import threading
+from typing import Dict, List, Optional, Tuple
+
+
+class MetricCatalog:
+    """
+    Titles and descriptions of the insight metrics returned during one run.
+
+    The insights streams add each metric's metadata as they sync (once per
+    metric and period in every response, not once per row), and the
+    insight_metrics stream writes the catalog out after every page has
+    synced. It is shared by the contexts of all pages of the run.
+    """
+
+    def __init__(self):
+        """Initialize an empty catalog."""
+        self._lock = threading.Lock()
+        self._metrics: Dict[Tuple[str, Optional[str]], Tuple[Optional[str], Optional[str]]] = {}
+
+    def add(self, metric_name: str, period: Optional[str], title: Optional[str], description: Optional[str]) -> None:
+        """
+        Record a metric's metadata.
+
+        Args:
+            metric_name: Metric name as written to the insights records
+            period: Metric period (day, lifetime, etc.)
+            title: Human-readable metric title
+            description: Description of what the metric measures
+        """
+        with self._lock:
+            self._metrics[(metric_name, period)] = (title, description)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._metrics)
+
+    def entries(self) -> List[Dict]:
+        """
+        Get the catalog as insight_metrics records.
+
+        Returns:
+            Record dictionaries sorted by metric name and period
+        """
+        with self._lock:
+            items = sorted(self._metrics.items(), key=lambda item: (item[0][0] or '', item[0][1] or ''))
+
+        return [
+            {
+                'metric_name': metric_name,
+                'period': period,
+                'metric_title': title,
+                'metric_description': description
+            }
+            for (metric_name, period), (title, description) in items
+        ]
@@ -0,0 +1,148 @@
+"""
+Adaptive page sizing for paginated Graph API listings.
+"""
+
+import threading
+import singer
+from typing import Dict, Optional, Tuple
+
+LOGGER = singer.get_logger()
+
+
+class PageSizer:
+    """
+    Chooses the `limit` of paginated requests per endpoint and field set.
+
+    Pages start at initial_size. The size is halved when Graph times out or
+    asks to "reduce the amount of data", and grown by half when a full page
+    comes back quickly and small, up to max_size but never back to a size
+    that already failed. The size reached is kept for the rest of the run,
+    so later pages (and later listings of the same endpoint and fields)
+    start from it. Page and record counts are tracked per key for the
+    end-of-run summary.
+    """
+
+    # A full page under both thresholds is cheap enough to grow
+    FAST_SECONDS = 2.0
+    SMALL_BYTES = 1024 * 1024
+
+    def __init__(self, initial_size: int = 100, min_size: int = 5, max_size: int = 500):
+        """
+        Initialize the sizer.
+
+        Args:
+            initial_size: Page size for keys not seen yet
+            min_size: Smallest page size to shrink to on timeouts
+            max_size: Largest page size to grow to
+        """
+        self.min_size = max(1, min_size)
+        self.max_size = max(self.min_size, max_size)
+        self.initial_size = min(max(initial_size, self.min_size), self.max_size)
+
+        self._lock = threading.Lock()
+        self._sizes: Dict[Tuple[str, str], int] = {}
+        self._ceilings: Dict[Tuple[str, str], int] = {}
+        self._stats: Dict[Tuple[str, str], Dict[str, int]] = {}
+
+    @classmethod
+    def from_config(cls, config: Dict, default_size: int = 100) -> 'PageSizer':
+        """
+        Build a sizer from tap configuration.
+
+        Args:
+            config: Tap configuration
+            default_size: Initial page size when page_size is not set
+
+        Returns:
+            Configured sizer
+        """
+        return cls(
+            initial_size=int(config.get('page_size', default_size)),
+            min_size=int(config.get('page_size_min', 5)),
+            max_size=int(config.get('page_size_max', 500))
+        )
+
+    def key(self, endpoint: str, params: Optional[Dict] = None) -> Tuple[str, str]:
+        """
+        Key under which a listing's page size is remembered.
+
+        Args:
+            endpoint: API endpoint being paginated
+            params: Query parameters of the listing
+
+        Returns:
+            (endpoint, requested fields) tuple
+        """
+        return endpoint, (params or {}).get('fields', '')
+
+    def size(self, key: Tuple[str, str]) -> int:
+        """Current page size for a key."""
+        with self._lock:
+            return self._sizes.get(key, self.initial_size)
+
+    def shrink(self, key: Tuple[str, str], reason: str, floor: Optional[int] = None) -> bool:
+        """
+        Halve the page size for a key.
+
+        Args:
+            key: Listing key (see key())
+            reason: Why the page was too large, for log messages
+            floor: Smallest size to shrink to (defaults to min_size)
+
+        Returns:
+            True if the size was reduced, False if it was already at the floor
+        """
+        floor = self.min_size if floor is None else floor
+
+        with self._lock:
+            current = self._sizes.get(key, self.initial_size)
+            if current <= floor:
+                return False
+
+            self._sizes[key] = max(floor, current // 2)
+            self._ceilings[key] = min(self._ceilings.get(key, self.max_size), current - 1)
+
+        LOGGER.warning(f"Reducing page size for {key[0]} to {self._sizes[key]} ({reason})")
+        return True
+
+    def record(self, key: Tuple[str, str], limit: int, records: int, elapsed: float, size_bytes: int) -> None:
+        """
+        Record a fetched page and grow the size if it was full, fast and small.
+
+        Args:
+            key: Listing key (see key())
+            limit: Page size the page was requested with
+            records: Records the page returned
+            elapsed: Seconds the request took
+            size_bytes: Response body size in bytes
+        """
+        with self._lock:
+            stats = self._stats.setdefault(key, {'pages': 0, 'records': 0})
+            stats['pages'] += 1
+            stats['records'] += records
+
+            current = self._sizes.get(key, self.initial_size)
+            ceiling = self._ceilings.get(key, self.max_size)
+            full_page = records >= limit
+
+            # Endpoints that cap limit return short pages; growing is pointless
+            if full_page and current == limit and current < ceiling \
+                    and elapsed < self.FAST_SECONDS and size_bytes < self.SMALL_BYTES:
+                self._sizes[key] = min(ceiling, current + max(1, current // 2))
+                LOGGER.debug(f"Growing page size for {key[0]} to {self._sizes[key]}")
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Get per-listing page counts and current page sizes.
+
+        Returns:
+            Dictionary of "endpoint [fields]" to pages, records and page_size
+        """
+        with self._lock:
+            return {
+                f"{endpoint} [{fields}]" if fields else endpoint: dict(
+                    stats,
+                    page_size=self._sizes.get((endpoint, fields), self.initial_size)
+                )
+                for (endpoint, fields), stats in self._stats.items()
+            }
@@ -0,0 +1,205 @@
+"""
+Per-run index of a page's posts, shared between streams.
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import singer
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional
+
+LOGGER = singer.get_logger()
+
+
+class PostIndex:
+    """
+    Index of post IDs listed during one sync run.
+
+    PostsStream fills the index while it paginates {page_id}/posts, and later
+    streams (e.g. PostInsightsStream) read it instead of paginating the same
+    listing again. The index only serves readers once a full, uninterrupted
+    listing from its start date has completed.
+
+    When a later stream asks for it, the listing also expands each post's
+    insights inline (insights.metric(...)) and the index keeps them, so that
+    stream needs no insight requests at all.
+
+    Posts are kept in memory by default. With a directory, they are stored
+    in a temporary SQLite file there instead, for pages with too many posts
+    to hold in memory.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        """
+        Initialize the index.
+
+        Args:
+            directory: Directory for a disk-backed index (in memory if omitted)
+        """
+        self._lock = threading.Lock()
+        self._since: Optional[str] = None
+        self._complete = False
+        self._posts: Dict[str, tuple] = {}
+        self._requested_metrics: List[str] = []
+        self._insights_metrics: List[str] = []
+        self._db = None
+        self._path = None
+
+        if directory:
+            fd, self._path = tempfile.mkstemp(prefix='post_index_', suffix='.sqlite', dir=directory)
+            os.close(fd)
+            self._db = sqlite3.connect(self._path, check_same_thread=False)
+            self._db.execute('CREATE TABLE posts (id TEXT PRIMARY KEY, created_time TEXT, insights TEXT)')
+
+    @classmethod
+    def from_config(cls, config: Dict) -> 'PostIndex':
+        """
+        Build an index from tap configuration.
+
+        Args:
+            config: Tap configuration
+
+        Returns:
+            Disk-backed index if post_index_dir is set, else an in-memory one
+        """
+        return cls(directory=config.get('post_index_dir'))
+
+    def request_insights(self, metrics: List[str]) -> None:
+        """
+        Ask the stream filling the index to expand these insights inline.
+
+        Args:
+            metrics: Post insight metric names
+        """
+        self._requested_metrics = list(metrics)
+
+    @property
+    def requested_metrics(self) -> List[str]:
+        """Insight metrics a reader asked to have expanded inline."""
+        return self._requested_metrics
+
+    def begin(self, since: Optional[str], insights_metrics: Optional[List[str]] = None) -> None:
+        """
+        Start filling the index from a new listing, discarding older content.
+
+        Args:
+            since: Start date of the listing (None for the whole history)
+            insights_metrics: Insight metrics expanded inline by the listing
+        """
+        with self._lock:
+            self._since = since
+            self._insights_metrics = list(insights_metrics or [])
+            self._complete = False
+            self._posts.clear()
+
+            if self._db:
+                self._db.execute('DELETE FROM posts')
+
+    def add(
+        self,
+        post_id: str,
+        created_time: Optional[str] = None,
+        insights: Optional[List[Dict]] = None
+    ) -> None:
+        """
+        Add a post to the index.
+
+        Args:
+            post_id: Facebook Post ID
+            created_time: Post creation time, if known
+            insights: Raw insight data points expanded inline, if any
+        """
+        with self._lock:
+            if self._db:
+                self._db.execute(
+                    'INSERT OR REPLACE INTO posts (id, created_time, insights) VALUES (?, ?, ?)',
+                    (post_id, created_time, json.dumps(insights) if insights is not None else None)
+                )
+            else:
+                self._posts[post_id] = (created_time, insights)
+
+    def complete(self) -> None:
+        """Mark the listing as complete, making the index readable."""
+        with self._lock:
+            if self._db:
+                self._db.commit()
+            self._complete = True
+
+        LOGGER.info(f"Post index complete with {len(self)} posts since {self._since}")
+
+    def covers(self, since: Optional[str]) -> bool:
+        """
+        Whether the index holds every post created since a date.
+
+        Args:
+            since: Start date the reader needs (None for the whole history)
+
+        Returns:
+            True if the index is complete and starts no later than since
+        """
+        if not self._complete:
+            return False
+
+        if self._since is None:
+            return True
+
+        if since is None:
+            return False
+
+        return self._parse(self._since) <= self._parse(since)
+
+    def has_insights(self, metrics: List[str]) -> bool:
+        """
+        Whether the indexed posts carry inline insights for these metrics.
+
+        Args:
+            metrics: Post insight metric names
+
+        Returns:
+            True if the listing expanded at least these metrics
+        """
+        return bool(self._insights_metrics) and set(metrics) <= set(self._insights_metrics)
+
+    def iter_posts(self) -> Iterator[Dict]:
+        """
+        Iterate over the indexed posts.
+
+        Yields:
+            Dictionaries with 'id', 'created_time' and, when the listing
+            expanded them, 'insights' (raw insight data points)
+        """
+        if self._db:
+            cursor = self._db.execute('SELECT id, created_time, insights FROM posts ORDER BY created_time DESC')
+            for post_id, created_time, insights in cursor:
+                yield self._entry(post_id, created_time, json.loads(insights) if insights else None)
+        else:
+            for post_id, (created_time, insights) in list(self._posts.items()):
+                yield self._entry(post_id, created_time, insights)
+
+    def _entry(self, post_id: str, created_time: Optional[str], insights: Optional[List[Dict]]) -> Dict:
+        """Build the dictionary yielded for one indexed post."""
+        entry = {'id': post_id, 'created_time': created_time}
+        if insights is not None:
+            entry['insights'] = insights
+        return entry
+
+    def close(self) -> None:
+        """Release the index and delete its temporary file, if any."""
+        if self._db:
+            self._db.close()
+            self._db = None
+            os.remove(self._path)
+
+    def __len__(self) -> int:
+        """Number of indexed posts."""
+        if self._db:
+            return self._db.execute('SELECT COUNT(*) FROM posts').fetchone()[0]
+        return len(self._posts)
+
+    def _parse(self, value: str) -> datetime:
+        """Parse an ISO 8601 date or datetime into an aware datetime."""
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00').replace('+0000', '+00:00'))
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
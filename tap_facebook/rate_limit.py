@@ -0,0 +1,303 @@
+"""
+Rate-limit-aware request scheduling driven by Graph API usage headers.
+"""
+
+import asyncio
+import json
+import threading
+import time
+import singer
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Dict, Iterator, Mapping, Optional, Tuple
+from tap_facebook.concurrency import max_concurrent_requests
+
+LOGGER = singer.get_logger()
+
+
+class RateLimitScheduler:
+    """
+    Paces Graph API calls so usage stays just under Facebook's rate limits.
+
+    Every response carries X-App-Usage, X-Page-Usage and/or
+    X-Business-Use-Case-Usage headers reporting the percentage of the call
+    count, CPU time and total time budgets already used. The scheduler keeps
+    the latest values and, as the highest of them rises past slowdown_pct,
+    spaces out request starts and lowers the number of requests allowed in
+    flight. At target_pct only one request runs at a time, and when a budget
+    is exhausted (or a throttling error is seen) all requests wait until
+    Facebook's estimated time to regain access. Once that pause is over,
+    the stale usage is dropped and full concurrency restored until new
+    usage headers say otherwise.
+    """
+
+    USAGE_HEADERS = ('X-App-Usage', 'X-Page-Usage')
+    BUSINESS_USAGE_HEADER = 'X-Business-Use-Case-Usage'
+    USAGE_FIELDS = ('call_count', 'total_cputime', 'total_time')
+
+    # Graph error codes meaning the app, user or page has been throttled
+    # (80000-80014: Business Use Case rate limits)
+    THROTTLE_ERROR_CODES = {4, 17, 32, 613, 80000, 80001, 80002, 80003, 80004, 80005, 80006, 80008, 80014}
+
+    # Seconds between checks for a free slot in async_slot()
+    ASYNC_POLL_INTERVAL = 0.05
+
+    def __init__(
+        self,
+        max_concurrency: int = 1,
+        slowdown_pct: float = 60.0,
+        target_pct: float = 90.0,
+        max_interval: float = 5.0,
+        cooldown: float = 300.0
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            max_concurrency: Requests allowed in flight while usage is low
+            slowdown_pct: Usage percentage at which pacing starts
+            target_pct: Usage percentage to stay under
+            max_interval: Seconds between request starts at target_pct
+            cooldown: Seconds to pause when throttled without a regain estimate
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.slowdown_pct = slowdown_pct
+        self.target_pct = max(target_pct, slowdown_pct + 1)
+        self.max_interval = max_interval
+        self.cooldown = cooldown
+
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._concurrency_limit = self.max_concurrency
+        self._interval = 0.0
+        self._next_start = 0.0
+        self._blocked_until = 0.0
+        self._paused = False
+        self._usage: Dict[str, Dict[str, float]] = {}
+        self._throttle_count = 0
+
+    @classmethod
+    def from_config(cls, config: Dict, max_concurrency: Optional[int] = None) -> 'RateLimitScheduler':
+        """
+        Build a scheduler from tap configuration.
+
+        Args:
+            config: Tap configuration
+            max_concurrency: Requests allowed in flight (default: max_concurrent_requests)
+
+        Returns:
+            Configured scheduler instance
+        """
+        return cls(
+            max_concurrency=max_concurrency or max_concurrent_requests(config),
+            slowdown_pct=float(config.get('rate_limit_slowdown_pct', 60.0)),
+            target_pct=float(config.get('rate_limit_target_pct', 90.0)),
+            max_interval=float(config.get('rate_limit_max_interval', 5.0)),
+            cooldown=float(config.get('rate_limit_cooldown', 300.0))
+        )
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """
+        Hold a request slot for the duration of one Graph API call.
+
+        Blocks while the concurrency limit is reached or requests are paused,
+        then waits for the current pacing interval before returning.
+        """
+        self._acquire()
+        try:
+            yield
+        finally:
+            self._release()
+
+    @asynccontextmanager
+    async def async_slot(self) -> AsyncIterator[None]:
+        """
+        Hold a request slot for one Graph API call made from asyncio code.
+
+        Same limits and pacing as slot(), but waits by sleeping the task
+        instead of blocking the event loop's thread.
+        """
+        while True:
+            with self._cond:
+                start, blocked_for = self._take_slot()
+
+            if start is not None:
+                break
+
+            await asyncio.sleep(blocked_for if blocked_for > 0 else self.ASYNC_POLL_INTERVAL)
+
+        try:
+            delay = start - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield
+        finally:
+            self._release()
+
+    def _acquire(self) -> None:
+        """Wait for a free slot and this request's paced start time."""
+        with self._cond:
+            while True:
+                start, blocked_for = self._take_slot()
+                if start is not None:
+                    break
+
+                self._cond.wait(timeout=blocked_for if blocked_for > 0 else None)
+
+        delay = start - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _take_slot(self) -> Tuple[Optional[float], float]:
+        """
+        Take a slot if one is free. Caller holds the lock.
+
+        Returns:
+            Tuple of (paced start time, or None if no slot was taken,
+            seconds until paused requests resume)
+        """
+        now = time.monotonic()
+        blocked_for = self._blocked_until - now
+
+        if self._paused and blocked_for <= 0:
+            self._resume()
+
+        if blocked_for > 0 or self._in_flight >= self._concurrency_limit:
+            return None, blocked_for
+
+        self._in_flight += 1
+        start = max(now, self._next_start)
+        self._next_start = start + self._interval
+        return start, 0.0
+
+    def _resume(self) -> None:
+        """Restore full concurrency once a pause has expired. Caller holds the lock."""
+        self._paused = False
+        self._usage.clear()
+        self._concurrency_limit = self.max_concurrency
+        self._interval = 0.0
+        self._cond.notify_all()
+        LOGGER.info(f"Graph API pause over; resuming with up to {self.max_concurrency} requests in flight")
+
+    def _release(self) -> None:
+        """Return a request slot."""
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def update(self, headers: Mapping[str, str]) -> None:
+        """
+        Update budgets and pacing from a response's usage headers.
+
+        Args:
+            headers: Response headers (case-insensitive mapping)
+        """
+        usage = {}
+        regain_seconds = 0.0
+
+        for header in self.USAGE_HEADERS:
+            parsed = self._parse_header(headers.get(header))
+            if isinstance(parsed, dict):
+                usage[header] = self._extract_usage(parsed)
+
+        business = self._parse_header(headers.get(self.BUSINESS_USAGE_HEADER))
+        if isinstance(business, dict):
+            for business_id, entries in business.items():
+                for entry in entries if isinstance(entries, list) else []:
+                    key = f"{self.BUSINESS_USAGE_HEADER}:{business_id}:{entry.get('type')}"
+                    usage[key] = self._extract_usage(entry)
+                    regain_seconds = max(
+                        regain_seconds,
+                        float(entry.get('estimated_time_to_regain_access') or 0) * 60
+                    )
+
+        if not usage:
+            return
+
+        with self._cond:
+            self._usage.update(usage)
+            self._adjust(regain_seconds)
+            self._cond.notify_all()
+
+    def record_throttle(self, regain_seconds: Optional[float] = None) -> None:
+        """
+        Pause all requests after a throttling error.
+
+        Args:
+            regain_seconds: Seconds until access is regained, if known
+        """
+        pause = regain_seconds if regain_seconds else self.cooldown
+
+        with self._cond:
+            self._throttle_count += 1
+            self._concurrency_limit = 1
+            self._interval = self.max_interval
+            self._blocked_until = max(self._blocked_until, time.monotonic() + pause)
+            self._paused = True
+
+        LOGGER.warning(f"Graph API throttled; pausing requests for {pause:.0f} seconds")
+
+    def _adjust(self, regain_seconds: float) -> None:
+        """Recompute pacing from the current usage. Caller holds the lock."""
+        usage_pct = self._max_usage_pct()
+
+        if usage_pct >= 100:
+            pause = regain_seconds or self.cooldown
+            self._blocked_until = max(self._blocked_until, time.monotonic() + pause)
+            self._paused = True
+            LOGGER.warning(f"Graph API usage at {usage_pct:.0f}%; pausing requests for {pause:.0f} seconds")
+
+        if usage_pct < self.slowdown_pct:
+            self._concurrency_limit = self.max_concurrency
+            self._interval = 0.0
+        elif usage_pct >= self.target_pct:
+            self._concurrency_limit = 1
+            self._interval = self.max_interval
+        else:
+            pressure = (usage_pct - self.slowdown_pct) / (self.target_pct - self.slowdown_pct)
+            self._concurrency_limit = max(1, round(self.max_concurrency * (1 - pressure)))
+            self._interval = self.max_interval * pressure
+
+    def _max_usage_pct(self) -> float:
+        """Highest usage percentage across all tracked budgets."""
+        return max(
+            (max(budget.values(), default=0.0) for budget in self._usage.values()),
+            default=0.0
+        )
+
+    def _extract_usage(self, entry: Dict) -> Dict[str, float]:
+        """Pull the call/CPU/time percentages out of one usage entry."""
+        return {
+            field: float(entry.get(field) or 0)
+            for field in self.USAGE_FIELDS
+        }
+
+    def _parse_header(self, value: Optional[str]) -> Optional[Dict]:
+        """Parse a JSON usage header, ignoring malformed values."""
+        if not value:
+            return None
+
+        try:
+            return json.loads(value)
+        except ValueError:
+            LOGGER.debug(f"Ignoring malformed usage header: {value}")
+            return None
+
+    def budget(self) -> Dict:
+        """
+        Get a snapshot of the current rate-limit budget state.
+
+        Returns:
+            Dictionary with the highest usage percentage, per-header usage,
+            current concurrency limit and pacing interval, seconds until
+            requests resume, and the number of throttling errors seen
+        """
+        with self._cond:
+            return {
+                'usage_pct': self._max_usage_pct(),
+                'usage': {header: dict(values) for header, values in self._usage.items()},
+                'concurrency_limit': self._concurrency_limit,
+                'interval': self._interval,
+                'paused_for': max(0.0, self._blocked_until - time.monotonic()),
+                'throttle_count': self._throttle_count
+            }
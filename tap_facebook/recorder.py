@@ -0,0 +1,169 @@
+"""
+Record Graph API sessions to fixture files and replay them.
+"""
+
+import json
+import re
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlparse
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+
+# Parameters carrying credentials, left out of fixtures and fixture keys
+SECRET_PARAMS = ('access_token', 'appsecret_proof', 'client_secret', 'fb_exchange_token')
+
+# Response headers worth keeping (content type and usage reporting)
+RECORDED_HEADERS = ('Content-Type', 'X-App-Usage', 'X-Page-Usage', 'X-Business-Use-Case-Usage', 'Retry-After')
+
+_SECRET_QUERY = re.compile(r'((?:%s)=)[^&"\\]+' % '|'.join(SECRET_PARAMS))
+
+
+def _fixture_key(method: str, url: str, body: Optional[str]) -> Tuple:
+    """Key matching a request to its recorded responses, whatever its host or token."""
+    parsed = urlparse(url)
+    params = sorted((name, value) for name, value in parse_qsl(parsed.query) if name not in SECRET_PARAMS)
+    form = sorted((name, value) for name, value in parse_qsl(body or '') if name not in SECRET_PARAMS)
+    return method.upper(), parsed.path, json.dumps(params), json.dumps(form)
+
+
+def _redact(value):
+    """Replace credentials in a decoded JSON body."""
+    if isinstance(value, dict):
+        return {
+            name: 'REDACTED' if name in SECRET_PARAMS else _redact(item)
+            for name, item in value.items()
+        }
+    if isinstance(value, list):
+        return [_redact(item) for item in value]
+    if isinstance(value, str):
+        return _SECRET_QUERY.sub(r'\1REDACTED', value)
+    return value
+
+
+def _body_text(request: requests.PreparedRequest) -> Optional[str]:
+    """Request body as text."""
+    body = request.body
+    return body.decode('utf-8') if isinstance(body, bytes) else body
+
+
+class RecordingAdapter(HTTPAdapter):
+    """
+    Pooled adapter that appends every exchange to a JSONL fixture file.
+
+    Credentials are redacted from the recorded URLs and bodies (including
+    tokens in /me/accounts listings and paging links), so fixtures can be
+    committed and replayed with ReplayAdapter.
+    """
+
+    def __init__(self, path: str, **kwargs):
+        """
+        Initialize the adapter.
+
+        Args:
+            path: Fixture file, appended to
+            **kwargs: Pool options passed to HTTPAdapter
+        """
+        super().__init__(**kwargs)
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        """Send a request and record the exchange."""
+        response = super().send(request, **kwargs)
+        body = _body_text(request)
+
+        try:
+            content = json.dumps(_redact(response.json()))
+        except ValueError:
+            content = _redact(response.text)
+
+        entry = {
+            'method': request.method,
+            'url': _redact(request.url.split('?')[0]),
+            'key': _fixture_key(request.method, request.url, body),
+            'status': response.status_code,
+            'headers': {name: response.headers[name] for name in RECORDED_HEADERS if name in response.headers},
+            'body': content
+        }
+
+        with self._lock:
+            self._file.write(json.dumps(entry) + '\n')
+            self._file.flush()
+
+        return response
+
+    def close(self) -> None:
+        """Close pooled connections and the fixture file."""
+        super().close()
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Adapter serving recorded responses instead of calling the network.
+
+    Requests are matched on method, path, query and form parameters
+    (credentials excluded, host ignored). Repeated requests get the recorded
+    responses in order, the last one again once they run out; unrecorded
+    requests get a 404 Graph error.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the adapter.
+
+        Args:
+            path: Fixture file written by RecordingAdapter
+        """
+        super().__init__()
+        self.path = path
+        self._lock = threading.Lock()
+        self._responses: Dict[Tuple, deque] = {}
+        self.misses: List[str] = []
+
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._responses.setdefault(tuple(entry['key']), deque()).append(entry)
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        """Answer a request from the fixtures."""
+        key = _fixture_key(request.method, request.url, _body_text(request))
+
+        with self._lock:
+            entries = self._responses.get(key)
+
+            if entries:
+                entry = entries.popleft() if len(entries) > 1 else entries[0]
+            else:
+                self.misses.append(f"{request.method} {request.url.split('?')[0]}")
+                entry = {
+                    'status': 404,
+                    'headers': {'Content-Type': 'application/json'},
+                    'body': json.dumps({'error': {
+                        'message': f"No recorded response for {key[0]} {key[1]}",
+                        'type': 'ReplayError',
+                        'code': 803
+                    }})
+                }
+
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.headers.update(entry['headers'])
+        response._content = entry['body'].encode('utf-8')
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        response.reason = 'OK' if entry['status'] < 400 else 'Error'
+        return response
+
+    def close(self) -> None:
+        """Nothing to release."""
+        pass
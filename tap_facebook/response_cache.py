@@ -0,0 +1,286 @@
+"""
+On-disk cache of Graph API GET responses.
+"""
+
+import fnmatch
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import requests
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+
+class ResponseCache:
+    """
+    Successful GET responses stored as files, reused until they expire.
+
+    Entries are keyed by method, endpoint and query parameters (sorted, and
+    without the access token), so reruns and retries of the same listing
+    or insights window are served from disk whatever token they use.
+
+    The TTL of an entry is that of the first pattern in ttls matching its
+    endpoint. Otherwise, insights requests (SETTLED_PATTERN) for a window
+    whose 'until' lies more than SETTLED_DAYS in the past get settled_ttl,
+    as their data no longer changes, and everything else default_ttl.
+    Listings such as */posts also take 'until' but keep changing (edits,
+    deletions, counters), so they never count as settled. Once the files exceed max_bytes, the least recently used
+    entries are evicted.
+    """
+
+    # Windows ending this many days ago or earlier are settled
+    SETTLED_DAYS = 3
+
+    # Endpoints whose windows settle
+    SETTLED_PATTERN = '*/insights'
+
+    DEFAULT_TTLS = {'*/posts': 300}
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = 512 * 1024 * 1024,
+        default_ttl: float = 3600,
+        ttls: Optional[Dict[str, float]] = None,
+        settled_ttl: float = 7 * 86400
+    ):
+        """
+        Initialize the cache, indexing the entries already on disk.
+
+        Args:
+            directory: Cache directory (created if missing)
+            max_bytes: Total size of cached files before LRU eviction
+            default_ttl: Seconds entries stay fresh when no pattern matches
+            ttls: Seconds by endpoint glob pattern (e.g. "*/insights"),
+                DEFAULT_TTLS if omitted
+            settled_ttl: Seconds for requests of settled windows
+        """
+        self.directory = os.path.abspath(os.path.expanduser(directory))
+        self.max_bytes = max(0, max_bytes)
+        self.default_ttl = default_ttl
+        self.ttls = self.DEFAULT_TTLS if ttls is None else ttls
+        self.settled_ttl = settled_ttl
+
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, int]' = OrderedDict()
+        self._size = 0
+        self._counters = {'hits': 0, 'misses': 0, 'expired': 0, 'stores': 0, 'evictions': 0}
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._load_index()
+
+    @classmethod
+    def from_config(cls, config: Dict) -> Optional['ResponseCache']:
+        """
+        Build a cache from tap configuration.
+
+        Args:
+            config: Tap configuration
+
+        Returns:
+            Cache in response_cache_dir, or None when it is not set
+        """
+        directory = config.get('response_cache_dir')
+        if not directory:
+            return None
+
+        return cls(
+            directory,
+            max_bytes=int(float(config.get('response_cache_max_mb', 512)) * 1024 * 1024),
+            default_ttl=float(config.get('response_cache_ttl', 3600)),
+            ttls=config.get('response_cache_ttls'),
+            settled_ttl=float(config.get('response_cache_settled_ttl', 7 * 86400))
+        )
+
+    def key(self, method: str, endpoint: str, params: Optional[Dict] = None) -> str:
+        """
+        Cache key of a request.
+
+        Args:
+            method: HTTP method
+            endpoint: API endpoint (URL path)
+            params: Query parameters (the access token is left out)
+
+        Returns:
+            Hex digest identifying the request
+        """
+        normalized = sorted(
+            (str(name), str(value)) for name, value in (params or {}).items()
+            if name not in ('access_token', 'appsecret_proof')
+        )
+        return hashlib.sha256(json.dumps([method.upper(), endpoint.strip('/'), normalized]).encode('utf-8')).hexdigest()
+
+    def ttl(self, endpoint: str, params: Optional[Dict] = None) -> float:
+        """
+        Seconds a response for a request stays fresh.
+
+        Args:
+            endpoint: API endpoint (URL path)
+            params: Query parameters
+
+        Returns:
+            The first matching pattern's TTL, else settled_ttl for settled
+            insights windows, else default_ttl
+        """
+        endpoint = endpoint.strip('/')
+        for pattern, ttl in self.ttls.items():
+            if fnmatch.fnmatch(endpoint, pattern):
+                return float(ttl)
+
+        if fnmatch.fnmatch(endpoint, self.SETTLED_PATTERN) and self._is_settled((params or {}).get('until')):
+            return self.settled_ttl
+
+        return self.default_ttl
+
+    def get(self, key: str) -> Optional[requests.Response]:
+        """
+        Get a fresh cached response.
+
+        Args:
+            key: Cache key (see key())
+
+        Returns:
+            Response rebuilt from the cache, or None on a miss
+        """
+        path = self._path(key)
+
+        with self._lock:
+            if key not in self._entries:
+                self._counters['misses'] += 1
+                return None
+
+            try:
+                with open(path, 'rb') as f:
+                    meta = json.loads(f.readline())
+                    content = f.read()
+            except (OSError, ValueError):
+                self._remove(key)
+                self._counters['misses'] += 1
+                return None
+
+            if meta['expires'] <= time.time():
+                self._remove(key)
+                self._counters['expired'] += 1
+                self._counters['misses'] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._counters['hits'] += 1
+
+            # The file's mtime orders entries for later runs' LRU index
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+
+        response = requests.Response()
+        response.status_code = meta['status']
+        response.url = meta['url']
+        response.headers['Content-Type'] = meta.get('content_type') or 'application/json'
+        response._content = content
+        return response
+
+    def put(self, key: str, response: requests.Response, ttl: float) -> None:
+        """
+        Cache a successful response.
+
+        Args:
+            key: Cache key (see key())
+            response: Response to store
+            ttl: Seconds the entry stays fresh
+        """
+        if ttl <= 0 or response.status_code >= 300:
+            return
+
+        meta = {
+            'url': response.url.split('?')[0] if response.url else None,
+            'status': response.status_code,
+            'content_type': response.headers.get('Content-Type'),
+            'expires': time.time() + ttl
+        }
+        data = json.dumps(meta).encode('utf-8') + b'\n' + response.content
+
+        if len(data) > self.max_bytes:
+            return
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix='.entry_', dir=os.path.dirname(path))
+
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+        with self._lock:
+            self._size -= self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            self._size += len(data)
+            self._counters['stores'] += 1
+
+            while self._size > self.max_bytes and self._entries:
+                self._remove(next(iter(self._entries)))
+                self._counters['evictions'] += 1
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get cache counters for the run.
+
+        Returns:
+            Dictionary of hits, misses, expired, stores and evictions, plus
+            the entries and bytes cached
+        """
+        with self._lock:
+            return dict(self._counters, entries=len(self._entries), bytes=self._size)
+
+    def _load_index(self) -> None:
+        """Index the entries on disk, least recently used first."""
+        found = []
+
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.startswith('.'):
+                    continue
+
+                stat = os.stat(os.path.join(root, name))
+                found.append((stat.st_mtime, name, stat.st_size))
+
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._size += size
+
+    def _remove(self, key: str) -> None:
+        """Delete an entry's file and forget it. Caller holds the lock."""
+        self._size -= self._entries.pop(key, 0)
+
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _path(self, key: str) -> str:
+        """File of an entry, spread over 256 subdirectories."""
+        return os.path.join(self.directory, key[:2], key)
+
+    def _is_settled(self, until: Optional[str]) -> bool:
+        """Whether a window ending at until (date, datetime or epoch) is settled."""
+        if not until:
+            return False
+
+        try:
+            if str(until).isdigit():
+                end = datetime.fromtimestamp(int(until), tz=timezone.utc)
+            else:
+                end = datetime.fromisoformat(str(until).replace('Z', '+00:00').replace('+0000', '+00:00'))
+                end = end if end.tzinfo else end.replace(tzinfo=timezone.utc)
+        except ValueError:
+            return False
+
+        return (datetime.now(timezone.utc) - end).days >= self.SETTLED_DAYS
@@ -0,0 +1,241 @@
+"""
+Retry policy with exponential backoff for Graph API calls.
+"""
+
+import asyncio
+import random
+import threading
+import time
+import requests
+import singer
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+from tap_facebook.exceptions import FacebookAPIError, RateLimitError
+
+LOGGER = singer.get_logger()
+
+T = TypeVar('T')
+
+
+class RetryPolicy:
+    """
+    Retries transient Graph API failures with jittered exponential backoff.
+
+    Errors are classified as retryable (timeouts, connection errors, 5xx,
+    throttling and Graph's transient error codes) or fatal (everything else,
+    e.g. invalid tokens or permissions). Each call gets at most max_retries
+    retries, and all calls together share a global budget of max_total_retries
+    so a persistently failing API cannot stall the sync indefinitely.
+    """
+
+    RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+    # 1: unknown/temporary error, 2: service temporarily unavailable,
+    # 4/17/32/613/80000+: throttling, 341: application limit reached
+    RETRYABLE_ERROR_CODES = {1, 2, 4, 17, 32, 341, 613, 80000, 80001, 80002, 80003, 80004, 80005, 80006, 80008, 80014}
+
+    def __init__(
+        self,
+        max_retries: int = 5,
+        max_total_retries: int = 200,
+        base_delay: float = 1.0,
+        max_delay: float = 120.0
+    ):
+        """
+        Initialize the retry policy.
+
+        Args:
+            max_retries: Retries allowed for a single call
+            max_total_retries: Retries allowed across all calls in the run
+            base_delay: Backoff delay in seconds before the first retry
+            max_delay: Upper bound on a single backoff delay in seconds
+        """
+        self.max_retries = max_retries
+        self.max_total_retries = max_total_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._lock = threading.Lock()
+        self._total_retries = 0
+        self._total_delay = 0.0
+        self._retries_by_reason: Dict[str, int] = {}
+
+    @classmethod
+    def from_config(cls, config: Dict) -> 'RetryPolicy':
+        """
+        Build a retry policy from tap configuration.
+
+        Args:
+            config: Tap configuration
+
+        Returns:
+            Configured retry policy
+        """
+        return cls(
+            max_retries=int(config.get('max_retries', 5)),
+            max_total_retries=int(config.get('max_total_retries', 200)),
+            base_delay=float(config.get('retry_base_delay', 1.0)),
+            max_delay=float(config.get('retry_max_delay', 120.0))
+        )
+
+    def call(self, func: Callable[[], T], description: str) -> T:
+        """
+        Run func, retrying retryable failures.
+
+        Args:
+            func: Zero-argument callable performing one attempt
+            description: What is being called, for log messages
+
+        Returns:
+            Result of the first successful attempt
+
+        Raises:
+            Exception: The last error, once it is fatal or retries are exhausted
+        """
+        attempt = 0
+
+        while True:
+            try:
+                return func()
+
+            except requests.exceptions.RequestException as e:
+                delay = self.next_delay(e, attempt, description)
+                if delay is None:
+                    raise
+
+                attempt += 1
+                time.sleep(delay)
+
+    async def call_async(self, func: Callable[[], Awaitable[T]], description: str) -> T:
+        """
+        Await func(), retrying retryable failures (asyncio version of call()).
+
+        Args:
+            func: Zero-argument callable returning an awaitable for one attempt
+            description: What is being called, for log messages
+
+        Returns:
+            Result of the first successful attempt
+
+        Raises:
+            Exception: The last error, once it is fatal or retries are exhausted
+        """
+        attempt = 0
+
+        while True:
+            try:
+                return await func()
+
+            except requests.exceptions.RequestException as e:
+                delay = self.next_delay(e, attempt, description)
+                if delay is None:
+                    raise
+
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    def next_delay(self, error: Exception, attempt: int, description: str) -> Optional[float]:
+        """
+        Decide whether a failed attempt is retried, and after how long.
+
+        Used by call() and call_async(), and by callers retrying part of a
+        request themselves (e.g. failed sub-requests of a batch call), so
+        every retry counts against the same budgets.
+
+        Args:
+            error: Exception raised by the attempt
+            attempt: Number of retries already made for this call
+            description: What is being called, for log messages
+
+        Returns:
+            Seconds to wait before retrying, or None to give up
+        """
+        reason = self.classify(error)
+
+        if reason is None or attempt >= self.max_retries or not self._consume_budget():
+            return None
+
+        delay = self._delay(attempt, error)
+        self._record(reason, delay)
+
+        LOGGER.warning(
+            f"Retrying {description} in {delay:.1f}s "
+            f"(attempt {attempt + 1}/{self.max_retries}, {reason}): {error}"
+        )
+        return delay
+
+    def classify(self, error: Exception) -> Optional[str]:
+        """
+        Classify an error as retryable or fatal.
+
+        Args:
+            error: Exception raised by an attempt
+
+        Returns:
+            Short retry reason (e.g. "timeout", "throttled", "http_503"),
+            or None if the error is fatal
+        """
+        if isinstance(error, RateLimitError):
+            return 'throttled'
+
+        if isinstance(error, requests.exceptions.Timeout):
+            return 'timeout'
+
+        if isinstance(error, requests.exceptions.ConnectionError):
+            return 'connection'
+
+        if isinstance(error, FacebookAPIError):
+            # Repeating an oversized request cannot succeed; callers shrink it instead
+            if error.is_oversize:
+                return None
+
+            if error.is_transient or error.code in self.RETRYABLE_ERROR_CODES:
+                return f"graph_{error.code}"
+
+        response = getattr(error, 'response', None)
+        if response is not None and response.status_code in self.RETRYABLE_STATUS_CODES:
+            return f"http_{response.status_code}"
+
+        return None
+
+    def _delay(self, attempt: int, error: Exception) -> float:
+        """Backoff delay for the given attempt, honoring Retry-After."""
+        response = getattr(error, 'response', None)
+
+        if response is not None:
+            try:
+                return min(float(response.headers.get('Retry-After')), self.max_delay)
+            except (TypeError, ValueError):
+                pass
+
+        # Full jitter: uniform in [0, base * 2^attempt], capped
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _consume_budget(self) -> bool:
+        """Take one retry from the global budget, if any is left."""
+        with self._lock:
+            if self._total_retries >= self.max_total_retries:
+                LOGGER.error(f"Global retry budget of {self.max_total_retries} exhausted")
+                return False
+            self._total_retries += 1
+            return True
+
+    def _record(self, reason: str, delay: float) -> None:
+        """Count a retry and its backoff delay."""
+        with self._lock:
+            self._total_delay += delay
+            self._retries_by_reason[reason] = self._retries_by_reason.get(reason, 0) + 1
+
+    def stats(self) -> Dict:
+        """
+        Get retry counters for the run.
+
+        Returns:
+            Dictionary with the total retries, seconds spent backing off, and
+            retries per reason
+        """
+        with self._lock:
+            return {
+                'retries': self._total_retries,
+                'backoff_seconds': round(self._total_delay, 3),
+                'by_reason': dict(self._retries_by_reason)
+            }
@@ -3,5 +3,6 @@
 from tap_facebook.streams.posts import PostsStream
 from tap_facebook.streams.post_insights import PostInsightsStream
 from tap_facebook.streams.page_insights import PageInsightsStream
+from tap_facebook.streams.insight_metrics import InsightMetricsStream
 
-__all__ = ['PostsStream', 'PostInsightsStream', 'PageInsightsStream']
+__all__ = ['PostsStream', 'PostInsightsStream', 'PageInsightsStream', 'InsightMetricsStream']
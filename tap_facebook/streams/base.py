@@ -1,9 +1,14 @@
 """Base stream class for Facebook tap."""
 
+import copy
+import time
 import singer
-from typing import Dict, Iterator, Optional, List
+from singer import metadata
+from typing import Dict, Iterator, Optional, List, Set
 from abc import ABC, abstractmethod
 from tap_facebook.client import FacebookClient
+from tap_facebook.context import SyncContext
+from tap_facebook.writer import MessageWriter
 
 LOGGER = singer.get_logger()
 
@@ -18,16 +23,62 @@ class FacebookStream(ABC):
     key_properties: List[str] = ["id"]
     schema: Dict = {}
 
-    def __init__(self, client: FacebookClient, config: Dict):
+    # Insight metrics the stream can request (override in insights streams)
+    AVAILABLE_METRICS: List[str] = []
+
+    # Streams this one must sync after when both are selected, even when
+    # streams run concurrently (parallel_streams)
+    SYNC_AFTER: List[str] = []
+
+    # Synced once after every page instead of once per page
+    ONCE_PER_RUN = False
+
+    # Metric metadata repeated on every insights row, left out (and written
+    # to the insight_metrics stream only) when include_metric_metadata is false
+    METRIC_METADATA_PROPERTIES = ['metric_title', 'metric_description']
+
+    # Default checkpoint cadence (overridable via config)
+    CHECKPOINT_RECORDS = 1000
+    CHECKPOINT_SECONDS = 60
+
+    def __init__(
+        self,
+        client: FacebookClient,
+        config: Dict,
+        catalog_entry: Optional[Dict] = None,
+        context: Optional[SyncContext] = None
+    ):
         """
         Initialize the stream.
 
         Args:
             client: Facebook API client
             config: Tap configuration
+            catalog_entry: This stream's catalog entry, used for field selection
+            context: Objects shared with the other streams of the sync run
         """
         self.client = client
         self.config = config
+        self.catalog_entry = catalog_entry or {}
+        self.context = context
+        # Shared with the streams syncing concurrently in this run
+        self.writer = context.writer if context is not None else MessageWriter()
+
+        # Suppresses records identical to the ones emitted by earlier runs
+        self.fingerprints = context.fingerprints if context is not None else None
+        if self.fingerprints is not None and not self.fingerprints.tracks(self.name):
+            self.fingerprints = None
+        self.include_metric_metadata = config.get('include_metric_metadata', True)
+
+        if self.AVAILABLE_METRICS and not self.include_metric_metadata:
+            self.schema = {
+                prop: definition for prop, definition in self.schema.items()
+                if prop not in self.METRIC_METADATA_PROPERTIES
+            }
+
+        self.selected_properties = self._get_selected_properties()
+        self._records_since_checkpoint = 0
+        self._last_checkpoint = time.monotonic()
 
     @abstractmethod
     def get_records(self, state: Optional[Dict] = None) -> Iterator[Dict]:
@@ -59,7 +110,8 @@ class FacebookStream(ABC):
         Get stream metadata for catalog.
 
         Returns:
-            Metadata dictionary
+            Metadata dictionary, including Singer breadcrumb metadata so
+            individual properties (and insight metrics) can be selected
         """
         return {
             "tap_stream_id": self.name,
@@ -67,14 +119,161 @@ class FacebookStream(ABC):
             "key_properties": self.key_properties,
             "replication_key": self.replication_key,
             "replication_method": self.replication_method,
-            "schema": self.get_schema()
+            "schema": self.get_schema(),
+            "metadata": self._get_breadcrumb_metadata()
         }
 
+    def _get_breadcrumb_metadata(self) -> List[Dict]:
+        """Build Singer breadcrumb metadata for the stream and its properties."""
+        mdata = metadata.to_map(metadata.get_standard_metadata(
+            schema=self.get_schema(),
+            schema_name=self.name,
+            key_properties=self.key_properties,
+            valid_replication_keys=[self.replication_key] if self.replication_key else [],
+            replication_method=self.replication_method
+        ))
+
+        mdata = metadata.write(mdata, (), 'selected-by-default', True)
+
+        if self.replication_key:
+            mdata = metadata.write(mdata, ('properties', self.replication_key), 'inclusion', 'automatic')
+
+        for prop in self.schema:
+            mdata = metadata.write(mdata, ('properties', prop), 'selected-by-default', True)
+
+        if self.AVAILABLE_METRICS:
+            mdata = metadata.write(mdata, (), 'available-metrics', self.AVAILABLE_METRICS)
+
+        return metadata.to_list(mdata)
+
+    def _get_selected_properties(self) -> Optional[Set[str]]:
+        """
+        Work out which schema properties the catalog selects.
+
+        Returns:
+            Selected property names, or None when every property is selected
+            (no catalog entry, or legacy stream-level metadata)
+        """
+        raw_metadata = self.catalog_entry.get('metadata')
+        if not isinstance(raw_metadata, list):
+            return None
+
+        mdata = metadata.to_map(raw_metadata)
+        selected = set()
+
+        for prop in self.schema:
+            prop_mdata = mdata.get(('properties', prop), {})
+
+            if prop_mdata.get('inclusion') == 'automatic' or prop in self.key_properties \
+                    or prop == self.replication_key:
+                selected.add(prop)
+            elif prop_mdata.get('inclusion') != 'unsupported' \
+                    and prop_mdata.get('selected', prop_mdata.get('selected-by-default', True)):
+                selected.add(prop)
+
+        return None if selected == set(self.schema) else selected
+
+    def is_property_selected(self, prop: str) -> bool:
+        """
+        Whether a schema property is selected in the catalog.
+
+        Args:
+            prop: Property name
+
+        Returns:
+            True if the property should be requested and emitted
+        """
+        return self.selected_properties is None or prop in self.selected_properties
+
+    def metric_metadata(
+        self,
+        metric_name: str,
+        period: Optional[str],
+        title: Optional[str],
+        description: Optional[str]
+    ) -> Dict:
+        """
+        Get the metadata properties of an insights record.
+
+        Also adds the metric to the run's metric catalog when the
+        insight_metrics stream is selected.
+
+        Args:
+            metric_name: Metric name as written to the records
+            period: Metric period
+            title: Human-readable metric title
+            description: Description of what the metric measures
+
+        Returns:
+            metric_title and metric_description, or an empty dictionary when
+            include_metric_metadata is false
+        """
+        metric_catalog = self.context.metric_catalog if self.context else None
+        if metric_catalog is not None:
+            metric_catalog.add(metric_name, period, title, description)
+
+        if not self.include_metric_metadata:
+            return {}
+
+        return {'metric_title': title, 'metric_description': description}
+
+    def get_selected_metrics(self) -> List[str]:
+        """
+        Get the insight metrics to request.
+
+        Uses the 'selected-metrics' list from the stream-level catalog
+        metadata when present, otherwise every metric in AVAILABLE_METRICS.
+
+        Returns:
+            Metric names, in AVAILABLE_METRICS order
+
+        Raises:
+            ValueError: If none of the selected metrics is available
+        """
+        raw_metadata = self.catalog_entry.get('metadata')
+        if not isinstance(raw_metadata, list):
+            return self.AVAILABLE_METRICS
+
+        requested = metadata.to_map(raw_metadata).get((), {}).get('selected-metrics')
+        if not requested:
+            return self.AVAILABLE_METRICS
+
+        unknown = sorted(set(requested) - set(self.AVAILABLE_METRICS))
+        metrics = [metric for metric in self.AVAILABLE_METRICS if metric in requested]
+
+        if not metrics:
+            raise ValueError(
+                f"None of the metrics selected for {self.name} are available: {unknown} "
+                f"(available: {self.AVAILABLE_METRICS})"
+            )
+
+        if unknown:
+            LOGGER.warning(f"Ignoring unknown metrics selected for {self.name}: {unknown}")
+
+        return metrics
+
+    def get_selected_schema(self) -> Dict:
+        """
+        Get the JSON schema restricted to selected properties.
+
+        Returns:
+            JSON schema dictionary
+        """
+        schema = self.get_schema()
+
+        if self.selected_properties is not None:
+            schema['properties'] = {
+                prop: definition for prop, definition in schema['properties'].items()
+                if prop in self.selected_properties
+            }
+
+        return schema
+
     def write_schema(self):
         """Write schema message to stdout."""
-        singer.write_schema(
+        self.writer.write_schema(
             stream_name=self.name,
-            schema=self.get_schema(),
+            schema=self.get_selected_schema(),
             key_properties=self.key_properties
         )
 
@@ -85,7 +284,19 @@ class FacebookStream(ABC):
         Args:
             record: Record dictionary
         """
-        singer.write_record(stream_name=self.name, record=record)
+        if self.selected_properties is not None:
+            record = {key: value for key, value in record.items() if key in self.selected_properties}
+
+        if self.fingerprints is None:
+            self.writer.write_record(stream_name=self.name, record=record)
+            return
+
+        # The fingerprint is staged and the record written together, so a
+        # STATE written in between covers both or neither
+        with self.writer.lock:
+            key_values = [record.get(prop) for prop in self.key_properties]
+            if self.fingerprints.changed(self.name, key_values, record):
+                self.writer.write_record(stream_name=self.name, record=record)
 
     def write_state(self, state: Dict):
         """
@@ -94,4 +305,82 @@ class FacebookStream(ABC):
         Args:
             state: State dictionary
         """
-        singer.write_state(state)
+        self.writer.write_state(state)
+
+    def _page_state(self, state: Dict) -> Dict:
+        """
+        Get the part of the state holding this stream's page.
+
+        With a single page_id the stream entries sit at the top level of the
+        state; when several pages are synced they sit under pages.<page_id>.
+        """
+        page_id = self.context.page_id if self.context is not None else None
+
+        if page_id is None:
+            return state
+
+        return state.setdefault('pages', {}).setdefault(page_id, {})
+
+    def get_stream_state(self, state: Dict) -> Dict:
+        """
+        Get this stream's entry in the state.
+
+        Args:
+            state: Full state dictionary
+
+        Returns:
+            This stream's state dictionary (empty if none saved)
+        """
+        with self.writer.lock:
+            return self._page_state(state).get(self.name) or {}
+
+    def count_record(self) -> None:
+        """Count an emitted record towards the next checkpoint."""
+        self._records_since_checkpoint += 1
+
+    def checkpoint_due(self) -> bool:
+        """
+        Whether enough records or time have passed to checkpoint state.
+
+        Returns:
+            True once state_checkpoint_records records were counted or
+            state_checkpoint_seconds seconds passed since the last checkpoint
+        """
+        max_records = int(self.config.get('state_checkpoint_records', self.CHECKPOINT_RECORDS))
+        max_seconds = float(self.config.get('state_checkpoint_seconds', self.CHECKPOINT_SECONDS))
+
+        return (
+            self._records_since_checkpoint >= max_records
+            or time.monotonic() - self._last_checkpoint >= max_seconds
+        )
+
+    def checkpoint(self, state: Dict, stream_state: Dict) -> None:
+        """
+        Save this stream's state and write it to stdout.
+
+        Args:
+            state: Full state dictionary
+            stream_state: New state for this stream
+        """
+        with self.writer.lock:
+            # A copy, so concurrent checkpoints never serialize an entry
+            # this stream is still updating
+            self._page_state(state)[self.name] = copy.deepcopy(stream_state)
+            self.write_state(state)
+
+        self._records_since_checkpoint = 0
+        self._last_checkpoint = time.monotonic()
+
+    def commit_fingerprints(self, state: Dict) -> None:
+        """
+        Write STATE, so the fingerprints of the records written before it are committed.
+
+        The store commits once the writer has emitted the STATE (see
+        FingerprintStore), which a BatchMessageWriter may hold back until
+        its files are announced. Lets streams that never checkpoint
+        (FULL_TABLE) cover their records at the end of the sync.
+
+        Args:
+            state: Full state dictionary
+        """
+        self.write_state(state)
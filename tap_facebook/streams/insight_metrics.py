@@ -0,0 +1,66 @@
+"""Insight metrics dimension stream describing the metrics of the insights streams."""
+
+import singer
+from typing import Dict, Iterator, Optional
+from tap_facebook.streams.base import FacebookStream
+
+LOGGER = singer.get_logger()
+
+
+class InsightMetricsStream(FacebookStream):
+    """
+    Stream of insight metric titles and descriptions, written once per run.
+
+    The records come from the metrics the post_insights and page_insights
+    streams received during the run, so those streams can leave the
+    repeated metric_title and metric_description out of every row
+    (include_metric_metadata: false) and targets join on metric_name and
+    period instead.
+    """
+
+    name = "insight_metrics"
+    replication_method = "FULL_TABLE"
+    replication_key = None
+    key_properties = ["metric_name", "period"]
+
+    schema = {
+        "metric_name": {
+            "type": ["null", "string"],
+            "description": "Name of the metric, as in the insights streams"
+        },
+        "period": {
+            "type": ["null", "string"],
+            "description": "Time period for the metric (lifetime, day, etc.)"
+        },
+        "metric_title": {
+            "type": ["null", "string"],
+            "description": "Human-readable metric title"
+        },
+        "metric_description": {
+            "type": ["null", "string"],
+            "description": "Description of what the metric measures"
+        }
+    }
+
+    # Describes the metrics of every page, so it syncs after all of them
+    ONCE_PER_RUN = True
+
+    def get_records(self, state: Optional[Dict] = None) -> Iterator[Dict]:
+        """
+        Retrieve the metrics seen by the insights streams this run.
+
+        Args:
+            state: Current state (unused for full table replication)
+
+        Yields:
+            Insight metric record dictionaries
+        """
+        metric_catalog = self.context.metric_catalog if self.context else None
+
+        if not metric_catalog:
+            LOGGER.warning("No insight metrics seen this run; select post_insights or page_insights too")
+            return
+
+        LOGGER.info(f"Writing {len(metric_catalog)} insight metrics")
+
+        yield from metric_catalog.entries()
@@ -1,8 +1,10 @@
 """Page insights stream for page-level analytics."""
 
+import functools
 import singer
-from typing import Dict, Iterator, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 from datetime import datetime, timedelta
+from tap_facebook.concurrency import ordered_map
 from tap_facebook.streams.base import FacebookStream
 
 LOGGER = singer.get_logger()
@@ -68,6 +70,8 @@ class PageInsightsStream(FacebookStream):
         'page_posts_impressions_unique', # Unique impressions from posts
     ]
 
+    AVAILABLE_METRICS = DAILY_METRICS
+
     def get_records(self, state: Optional[Dict] = None) -> Iterator[Dict]:
         """
         Retrieve page insight records.
@@ -83,8 +87,8 @@ class PageInsightsStream(FacebookStream):
             raise ValueError("page_id is required in configuration")
 
         # Get bookmark from state for incremental sync
-        state = state or {}
-        last_date = state.get(self.name, {}).get(self.replication_key)
+        state = {} if state is None else state
+        last_date = self.get_stream_state(state).get(self.replication_key)
         start_date = last_date or self.config.get('start_date')
 
         LOGGER.info(f"Syncing page insights for page {page_id} since {start_date}")
@@ -94,39 +98,85 @@ class PageInsightsStream(FacebookStream):
         until = datetime.utcnow().date()
 
         # Split into chunks if needed (93-day limit)
-        date_chunks = self._split_date_range(since, until, max_days=90)
+        date_chunks = list(self._split_date_range(since, until, max_days=90))
+        metric_groups = self._metric_groups()
+        max_workers = int(self.config.get('page_insights_max_workers', self.config.get('max_workers', 1)))
 
         max_date = start_date
 
-        for chunk_since, chunk_until in date_chunks:
-            LOGGER.info(f"Fetching insights from {chunk_since} to {chunk_until}")
+        # Each (chunk, metric group) pair is one request; requests run
+        # concurrently but results are consumed in order, so a chunk is only
+        # processed once every earlier chunk has been written
+        tasks = [
+            (chunk_since, chunk_until, metrics, group_index == len(metric_groups) - 1)
+            for chunk_since, chunk_until in date_chunks
+            for group_index, metrics in enumerate(metric_groups)
+        ]
+        fetch = functools.partial(self._fetch_chunk, page_id)
+
+        for (chunk_since, chunk_until, _, chunk_complete), insights in zip(
+            tasks, ordered_map(fetch, tasks, max_workers=max_workers)
+        ):
+            for insight in insights:
+                records = self._transform_insight(insight, page_id)
+                for record in records:
+                    # Track the latest date for state
+                    if record.get('date') and record['date'] > max_date:
+                        max_date = record['date']
+
+                    yield record
+                    self.count_record()
+
+            # Chunks are consumed oldest first, so every finished chunk is a safe bookmark
+            if chunk_complete and max_date and self.checkpoint_due():
+                self.checkpoint(state, {self.replication_key: max_date})
+
+        # Update state with latest bookmark
+        if max_date:
+            self.checkpoint(state, {self.replication_key: max_date})
 
-            try:
-                insights = self.client.get_page_insights(
-                    page_id=page_id,
-                    metrics=self.DAILY_METRICS,
-                    period='day',
-                    since=chunk_since.isoformat(),
-                    until=chunk_until.isoformat()
-                )
+    def _fetch_chunk(self, page_id: str, task: Tuple) -> List[Dict]:
+        """
+        Fetch one metric group for one date chunk.
+
+        Args:
+            page_id: Facebook Page ID
+            task: Tuple of (chunk start, chunk end, metrics, last group flag)
 
-                for insight in insights:
-                    records = self._transform_insight(insight, page_id)
-                    for record in records:
-                        # Track the latest date for state
-                        if record.get('date') and record['date'] > max_date:
-                            max_date = record['date']
+        Returns:
+            Raw insight data points
+        """
+        chunk_since, chunk_until, metrics, _ = task
+        LOGGER.info(f"Fetching {len(metrics)} insights from {chunk_since} to {chunk_until}")
 
-                        yield record
+        try:
+            return self.client.get_page_insights(
+                page_id=page_id,
+                metrics=metrics,
+                period='day',
+                since=chunk_since.isoformat(),
+                until=chunk_until.isoformat()
+            )
+
+        except Exception as e:
+            LOGGER.error(f"Error fetching page insights: {str(e)}")
+            raise
+
+    def _metric_groups(self) -> List[List[str]]:
+        """
+        Split the selected metrics into request-sized groups.
 
-            except Exception as e:
-                LOGGER.error(f"Error fetching page insights: {str(e)}")
-                raise
+        Returns:
+            Metric groups of page_insights_metric_group_size metrics each
+            (a single group with every metric when unset)
+        """
+        metrics = self.get_selected_metrics()
+        group_size = int(self.config.get('page_insights_metric_group_size', 0)) or len(metrics)
 
-        # Update state with latest bookmark
-        if max_date:
-            state[self.name] = {self.replication_key: max_date}
-            self.write_state(state)
+        return [
+            metrics[i:i + group_size]
+            for i in range(0, len(metrics), group_size)
+        ]
 
     def _transform_insight(self, insight: Dict, page_id: str) -> Iterator[Dict]:
         """
@@ -141,8 +191,7 @@ class PageInsightsStream(FacebookStream):
         """
         metric_name = insight.get('name')
         period = insight.get('period')
-        title = insight.get('title')
-        description = insight.get('description')
+        metric_metadata = self.metric_metadata(metric_name, period, insight.get('title'), insight.get('description'))
 
         # Insights have time-series values
         values = insight.get('values', [])
@@ -160,8 +209,7 @@ class PageInsightsStream(FacebookStream):
                     'date': date,
                     'metric_name': metric_name,
                     'metric_value': int(value),
-                    'metric_title': title,
-                    'metric_description': description,
+                    **metric_metadata,
                     'period': period
                 }
 
@@ -1,7 +1,10 @@
 """Post insights stream for detailed engagement analytics."""
 
 import singer
-from typing import Dict, Iterator, Optional
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional, Set
+from tap_facebook.concurrency import batched, ordered_map, prefetch
+from tap_facebook.post_index import PostIndex
 from tap_facebook.streams.base import FacebookStream
 
 LOGGER = singer.get_logger()
@@ -54,49 +57,337 @@ class PostInsightsStream(FacebookStream):
         'post_reactions_by_type_total'   # Reactions broken down by type
     ]
 
+    # Reads the post listing the posts stream leaves in the post index
+    SYNC_AFTER = ['posts']
+
+    # Post IDs buffered between the post listing and the insight workers
+    POST_QUEUE_SIZE = 1000
+
+    # Refresh schedule of posts older than the hot window when
+    # post_insights_hot_days is set: [max age in days (None for any age),
+    # days between refreshes]
+    DEFAULT_REFRESH_TIERS = [[90, 7], [365, 30], [None, 90]]
+
+    # Tiers of posts always refreshed, and of posts older than every tier
+    HOT_TIER = 'hot'
+    RETIRED_TIER = 'retired'
+
+    def __init__(self, *args, **kwargs):
+        """Initialize the stream (see FacebookStream)."""
+        super().__init__(*args, **kwargs)
+        self.metrics = self.get_selected_metrics()
+
+        # With a hot window, posts are refreshed on a schedule tracked per tier
+        self.hot_days = int(self.config.get('post_insights_hot_days', 0))
+        self.refresh_tiers = self.config.get('post_insights_refresh_tiers', self.DEFAULT_REFRESH_TIERS)
+        if self.hot_days > 0:
+            self.replication_method = "INCREMENTAL"
+
+        # In expansion mode, have the posts stream fetch our insights inline
+        # so the shared listing serves both streams
+        post_index = self.context.post_index if self.context else None
+        if post_index is not None and self.config.get('post_insights_mode', 'batch') == 'expansion':
+            post_index.request_insights(self.metrics)
+
     def get_records(self, state: Optional[Dict] = None) -> Iterator[Dict]:
         """
         Retrieve post insight records.
 
         Args:
-            state: Current state (unused for full table replication)
+            state: Current state; with post_insights_hot_days it holds the
+                date each refresh tier was last fetched
 
         Yields:
             Post insight record dictionaries
+
+        Raises:
+            RuntimeError: After the other posts are done, when some posts'
+                insights kept failing with retryable errors
         """
         page_id = self.config.get('page_id')
         if not page_id:
             raise ValueError("page_id is required in configuration")
 
-        # First, get all posts to fetch insights for
-        LOGGER.info(f"Fetching posts to retrieve insights for page {page_id}")
+        state = {} if state is None else state
+        tiered = self.hot_days > 0
+        today = datetime.utcnow().date()
 
-        posts = list(self.client.get_page_posts(
-            page_id=page_id,
-            fields=['id'],
-            since=self.config.get('start_date')
-        ))
+        # State keeps one date per tier rather than one per post, so it stays
+        # the same size however many posts the page has
+        tier_dates = dict(self.get_stream_state(state).get('refreshed_tiers', {})) if tiered else {}
+        due_tiers = self._due_tiers(tier_dates, today) if tiered else set()
+        counts: Dict[str, int] = {}
+
+        batch_size = int(self.config.get('post_insights_batch_size', self.client.MAX_BATCH_SIZE))
+        batch_size = max(1, min(batch_size, self.client.MAX_BATCH_SIZE))
+        max_workers = int(self.config.get('max_workers', 1))
+        queue_size = int(self.config.get('post_insights_queue_size', self.POST_QUEUE_SIZE))
+
+        inline = self._use_inline_insights()
+
+        LOGGER.info(f"Fetching insights for posts of page {page_id}" + (" inline" if inline else ""))
+
+        # The post listing runs on its own thread and feeds a bounded queue,
+        # so insight requests start with the first page of posts and memory
+        # stays flat however many posts the page has
+        posts = prefetch(lambda: self._list_posts(page_id, inline), max_queued=queue_size)
+
+        if tiered:
+            LOGGER.info(f"Refreshing insights of post tiers {sorted(due_tiers)}")
+            posts = self._due_posts(posts, due_tiers, today, counts)
+
+        if inline:
+            # Insights came with the listing; no per-post requests needed
+            result_groups = (
+                [{'post_id': post['id'], 'data': post.get('insights', []), 'error': None, 'retryable': False}]
+                for post in posts
+            )
+        else:
+            # Batches are fetched concurrently but consumed in order, so
+            # records are written from this thread in a deterministic order
+            batches = batched((post['id'] for post in posts), batch_size)
+            fetch = self._fetch_batch if batch_size > 1 else self._fetch_single
+            result_groups = ordered_map(fetch, batches, max_workers=max_workers)
+
+        post_count = 0
+        failed: List[str] = []
+
+        for results in result_groups:
+            for result in results:
+                post_count += 1
+
+                if result['error'] and result['retryable']:
+                    # Throttled or transient even after retries: the post is
+                    # reported at the end instead of silently losing its rows
+                    LOGGER.error(f"Giving up on insights for post {result['post_id']}: {result['error']}")
+                    failed.append(result['post_id'])
+                    continue
+
+                if result['error']:
+                    # Some posts may not have insights available
+                    LOGGER.warning(f"Could not fetch insights for post {result['post_id']}: {result['error']}")
+                    continue
+
+                for insight in result['data']:
+                    for record in self._transform_insight(insight, result['post_id']):
+                        yield record
+                        self.count_record()
+
+            # Tier dates only advance once the run is done; an interrupted
+            # run refreshes the same tiers again
+            if tiered and self.checkpoint_due():
+                self.checkpoint(state, {'refreshed_tiers': tier_dates})
+
+        LOGGER.info(f"Fetched insights for {post_count} posts")
 
-        LOGGER.info(f"Fetching insights for {len(posts)} posts")
+        if tiered:
+            LOGGER.info(f"Skipped {counts.get('skipped', 0)} posts not due for an insights refresh")
 
+            # Tiers with posts that kept failing stay due for the next run
+            if not failed:
+                tier_dates.update({tier: today.isoformat() for tier in due_tiers if tier != self.HOT_TIER})
+            self.checkpoint(state, {'refreshed_tiers': tier_dates})
+
+        budget = self.client.get_rate_limit_budget()
+        LOGGER.info(
+            f"Post insights complete. Rate-limit usage {budget['usage_pct']:.0f}%, "
+            f"throttled {budget['throttle_count']} times"
+        )
+
+        if failed:
+            raise RuntimeError(
+                f"Could not fetch insights for {len(failed)} of {post_count} posts after retries "
+                f"(first: {failed[:10]})"
+            )
+
+    def _due_tiers(self, tier_dates: Dict[str, str], today: date) -> Set[str]:
+        """
+        Get the refresh tiers due this run.
+
+        The hot tier is always due, a tier whose interval has passed since
+        it was last refreshed is due, and so is any tier never refreshed
+        (the retired tier only then).
+
+        Args:
+            tier_dates: Date each tier was last refreshed, by tier key
+            today: Current UTC date
+
+        Returns:
+            Keys of the due tiers (see _refresh_tier)
+        """
+        due = {self.HOT_TIER}
+
+        for max_age, interval in self.refresh_tiers:
+            tier = self._tier_key(max_age)
+            last_refreshed = tier_dates.get(tier)
+            if last_refreshed is None or (today - date.fromisoformat(last_refreshed)).days >= interval:
+                due.add(tier)
+
+        if self.RETIRED_TIER not in tier_dates:
+            due.add(self.RETIRED_TIER)
+
+        return due
+
+    def _due_posts(
+        self,
+        posts: Iterator[Dict],
+        due_tiers: Set[str],
+        today: date,
+        counts: Dict[str, int]
+    ) -> Iterator[Dict]:
+        """
+        Filter the listing down to posts in a due refresh tier.
+
+        Args:
+            posts: Listed posts with 'id' and 'created_time'
+            due_tiers: Keys of the tiers due this run (see _due_tiers)
+            today: Current UTC date
+            counts: Updated with the number of 'skipped' posts
+
+        Yields:
+            Posts due for a refresh
+        """
         for post in posts:
-            post_id = post['id']
+            if self._refresh_tier(post.get('created_time'), today) in due_tiers:
+                yield post
+            else:
+                counts['skipped'] = counts.get('skipped', 0) + 1
 
+    def _refresh_tier(self, created_time: Optional[str], today: date) -> str:
+        """
+        Refresh tier of a post of a given age.
+
+        Args:
+            created_time: Post creation time (posts without one count as hot)
+            today: Current UTC date
+
+        Returns:
+            HOT_TIER inside the hot window, the key of the first tier the
+            post is younger than, or RETIRED_TIER when it is older than
+            every tier
+        """
+        if not created_time:
+            return self.HOT_TIER
+
+        created = datetime.fromisoformat(created_time.replace('Z', '+00:00').replace('+0000', '+00:00'))
+        age = (today - created.date()).days
+
+        if age < self.hot_days:
+            return self.HOT_TIER
+
+        for max_age, _ in self.refresh_tiers:
+            if max_age is None or age < max_age:
+                return self._tier_key(max_age)
+
+        return self.RETIRED_TIER
+
+    def _tier_key(self, max_age: Optional[int]) -> str:
+        """State key of the tier with a given max age (days)."""
+        return 'any' if max_age is None else str(max_age)
+
+    def _get_post_index(self) -> Optional[PostIndex]:
+        """Get the run's post index if it covers every post since start_date."""
+        post_index = self.context.post_index if self.context else None
+
+        if post_index is not None and post_index.covers(self.config.get('start_date')):
+            return post_index
+
+        return None
+
+    def _use_inline_insights(self) -> bool:
+        """
+        Whether insights come inline with the post listing.
+
+        True in 'expansion' mode, or when the posts stream already expanded
+        the selected metrics into the run's post index.
+        """
+        if self.config.get('post_insights_mode', 'batch') == 'expansion':
+            return True
+
+        post_index = self._get_post_index()
+        return post_index is not None and post_index.has_insights(self.metrics)
+
+    def _list_posts(self, page_id: str, inline: bool) -> Iterator[Dict]:
+        """
+        List the posts to fetch insights for.
+
+        Reuses the run's post index when the posts stream already listed
+        every post since start_date, instead of paginating the listing again.
+
+        Args:
+            page_id: Facebook Page ID
+            inline: Whether each post must carry its insights inline
+
+        Returns:
+            Iterator of post dictionaries with an 'id' key (and 'insights'
+            when inline)
+        """
+        post_index = self._get_post_index()
+
+        if post_index is not None and (not inline or post_index.has_insights(self.metrics)):
+            LOGGER.info(f"Reusing {len(post_index)} posts listed by the posts stream")
+            return post_index.iter_posts()
+
+        posts = self.client.get_page_posts(
+            page_id=page_id,
+            fields=['id', 'created_time'] if self.hot_days > 0 else ['id'],
+            since=self.config.get('start_date'),
+            insights_metrics=self.metrics if inline else None
+        )
+
+        if not inline:
+            return posts
+
+        return (
+            {
+                'id': post['id'],
+                'created_time': post.get('created_time'),
+                'insights': post.get('insights', {}).get('data', [])
+            }
+            for post in posts
+        )
+
+    def _fetch_batch(self, post_ids: List[str]) -> List[Dict]:
+        """
+        Fetch insights for a group of posts with one Graph batch call.
+
+        Args:
+            post_ids: Post IDs to fetch insights for
+
+        Returns:
+            Per-post result dictionaries (see FacebookClient.get_post_insights_batch)
+        """
+        return self.client.get_post_insights_batch(
+            post_ids=post_ids,
+            metrics=self.metrics
+        )
+
+    def _fetch_single(self, post_ids: List[str]) -> List[Dict]:
+        """
+        Fetch insights for posts one request at a time.
+
+        Args:
+            post_ids: Post IDs to fetch insights for
+
+        Returns:
+            Per-post result dictionaries in the same shape as batch results
+        """
+        results = []
+
+        for post_id in post_ids:
             try:
                 insights = self.client.get_post_insights(
                     post_id=post_id,
-                    metrics=self.AVAILABLE_METRICS
+                    metrics=self.metrics
                 )
-
-                for insight in insights:
-                    records = self._transform_insight(insight, post_id)
-                    for record in records:
-                        yield record
+                results.append({'post_id': post_id, 'data': insights, 'error': None, 'retryable': False})
 
             except Exception as e:
-                # Some posts may not have insights available
-                LOGGER.warning(f"Could not fetch insights for post {post_id}: {str(e)}")
-                continue
+                # The client already retried transient errors; flag them as such
+                retryable = self.client.retry_policy.classify(e) is not None
+                results.append({'post_id': post_id, 'data': None, 'error': str(e), 'retryable': retryable})
+
+        return results
 
     def _transform_insight(self, insight: Dict, post_id: str) -> Iterator[Dict]:
         """
@@ -116,6 +407,7 @@ class PostInsightsStream(FacebookStream):
 
         # Insights can have multiple values (e.g., breakdown by type)
         values = insight.get('values', [])
+        metric_metadata = None
 
         for value_obj in values:
             value = value_obj.get('value')
@@ -128,16 +420,17 @@ class PostInsightsStream(FacebookStream):
                         'post_id': post_id,
                         'metric_name': f"{metric_name}_{key}",
                         'metric_value': count,
-                        'metric_title': f"{title} - {key}",
-                        'metric_description': description,
+                        **self.metric_metadata(f"{metric_name}_{key}", period, f"{title} - {key}", description),
                         'period': period
                     }
             elif isinstance(value, (int, float)):
+                if metric_metadata is None:
+                    metric_metadata = self.metric_metadata(metric_name, period, title, description)
+
                 yield {
                     'post_id': post_id,
                     'metric_name': metric_name,
                     'metric_value': int(value),
-                    'metric_title': title,
-                    'metric_description': description,
+                    **metric_metadata,
                     'period': period
                 }
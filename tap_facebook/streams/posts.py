@@ -1,8 +1,11 @@
 """Posts stream for Facebook engagement data."""
 
+import functools
 import singer
-from typing import Dict, Iterator, Optional
-from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+from datetime import datetime, timedelta, timezone
+from tap_facebook.concurrency import parallel_iterate
+from tap_facebook.post_index import PostIndex
 from tap_facebook.streams.base import FacebookStream
 
 LOGGER = singer.get_logger()
@@ -70,6 +73,22 @@ class PostsStream(FacebookStream):
         }
     }
 
+    # Graph API fields needed for each schema property
+    FIELD_MAP = {
+        'id': ['id'],
+        'message': ['message'],
+        'created_time': ['created_time'],
+        'updated_time': ['updated_time'],
+        'permalink_url': ['permalink_url'],
+        'type': ['type'],
+        'status_type': ['status_type'],
+        'likes_count': ['likes.summary(total_count).limit(0)'],
+        'comments_count': ['comments.summary(total_count).limit(0)'],
+        'shares_count': ['shares'],
+        'reactions_count': ['reactions.summary(total_count).limit(0)'],
+        'page_id': []
+    }
+
     def get_records(self, state: Optional[Dict] = None) -> Iterator[Dict]:
         """
         Retrieve post records with engagement metrics.
@@ -85,50 +104,295 @@ class PostsStream(FacebookStream):
             raise ValueError("page_id is required in configuration")
 
         # Get bookmark from state for incremental sync
-        state = state or {}
-        last_updated = state.get(self.name, {}).get(self.replication_key)
+        state = {} if state is None else state
+        stream_state = self.get_stream_state(state)
+        last_updated = stream_state.get(self.replication_key)
         start_date = last_updated or self.config.get('start_date')
 
-        LOGGER.info(f"Syncing posts for page {page_id} since {start_date}")
-
-        # Define fields to retrieve
-        fields = [
-            'id',
-            'message',
-            'created_time',
-            'updated_time',
-            'permalink_url',
-            'type',
-            'status_type',
-            'shares',
-            'reactions.summary(total_count).limit(0)',
-            'comments.summary(total_count).limit(0)',
-            'likes.summary(total_count).limit(0)'
-        ]
+        # An interrupted run leaves its cursor and running maximum behind
+        resume = stream_state.get('resume') or {}
+
+        # First syncs can split the history into windows paginated in parallel
+        window_days = int(self.config.get('posts_backfill_window_days', 0))
+        if stream_state.get('backfill') or (window_days > 0 and not last_updated and not resume):
+            yield from self._get_records_backfill(state, page_id, start_date, window_days)
+            return
+
+        max_updated_time = resume.get('max_updated_time') or start_date
+
+        if resume:
+            start_date = resume.get('since', start_date)
+            LOGGER.info(f"Resuming posts for page {page_id} from saved cursor (window since {start_date})")
+        elif last_updated and self.context and self.context.post_index is not None:
+            # A later stream lists every post since start_date anyway, so
+            # list them once here and share the listing
+            start_date = self.config.get('start_date')
+            LOGGER.info(f"Syncing posts for page {page_id} since {start_date} to share the listing; "
+                        f"emitting posts updated since {last_updated}")
+        else:
+            LOGGER.info(f"Syncing posts for page {page_id} since {start_date}")
 
-        # Fetch posts from Facebook API
-        posts = self.client.get_page_posts(
+        # A listing starting before the bookmark only emits posts updated since
+        emit_since = last_updated if last_updated and start_date != last_updated else None
+
+        # A resumed listing is partial, so it cannot be shared with later streams
+        post_index = None if resume else self._begin_post_index(start_date)
+        insights_metrics = post_index.requested_metrics if post_index is not None else None
+
+        # Fetch posts from Facebook API, one result page at a time
+        pages = self.client.get_page_post_pages(
             page_id=page_id,
-            fields=fields,
-            since=start_date
+            fields=self._get_fields(indexing=post_index is not None),
+            since=start_date,
+            resume_params=resume.get('params'),
+            insights_metrics=insights_metrics
         )
 
-        max_updated_time = start_date
+        for posts, next_params in pages:
+            for post in posts:
+                if post_index is not None:
+                    self._index_post(post_index, post)
+
+                # Transform post data
+                record = self._transform_post(post, page_id)
+
+                if emit_since and (record.get('updated_time') or '') < emit_since:
+                    continue
+
+                # Track the latest updated_time for state
+                if record.get('updated_time') and record['updated_time'] > max_updated_time:
+                    max_updated_time = record['updated_time']
+
+                yield record
+                self.count_record()
+
+            # Posts arrive newest first, so the bookmark can only advance once
+            # the whole window is done; until then save the cursor instead
+            if next_params and self.checkpoint_due():
+                stream_state = {
+                    self.replication_key: last_updated,
+                    'resume': {
+                        'since': start_date,
+                        'params': next_params,
+                        'max_updated_time': max_updated_time
+                    }
+                }
+                self.checkpoint(state, stream_state)
+
+        if post_index is not None:
+            post_index.complete()
+
+        # Update state with latest bookmark
+        if max_updated_time:
+            self.checkpoint(state, {self.replication_key: max_updated_time})
+
+    def _begin_post_index(self, since: Optional[str]) -> Optional[PostIndex]:
+        """
+        Start filling the run's shared post index, if the listing can serve it.
+
+        Readers need every post since start_date, so only a full listing
+        fills the index. get_records lists from start_date whenever the
+        index has a reader, also once the stream has a bookmark; only a
+        resumed listing, which is partial, leaves the index empty.
+
+        Args:
+            since: Start date of the listing about to run
+
+        Returns:
+            The post index to fill, or None
+        """
+        post_index = self.context.post_index if self.context else None
+
+        if post_index is None:
+            return None
+
+        if since != self.config.get('start_date'):
+            LOGGER.info(f"Not sharing the posts listing since {since}: it does not start at start_date")
+            return None
+
+        post_index.begin(since, insights_metrics=post_index.requested_metrics)
+        return post_index
+
+    def _index_post(self, post_index: PostIndex, post: Dict) -> None:
+        """
+        Add a raw post, with any inline insights, to the shared post index.
+
+        Args:
+            post_index: Index being filled
+            post: Raw post data from API
+        """
+        insights = None
+        if post_index.requested_metrics:
+            insights = post.get('insights', {}).get('data', [])
+
+        post_index.add(post['id'], post.get('created_time'), insights)
+
+    def _get_records_backfill(
+        self,
+        state: Dict,
+        page_id: str,
+        start_date: str,
+        window_days: int
+    ) -> Iterator[Dict]:
+        """
+        Retrieve posts by paginating since/until windows concurrently.
+
+        Each window is an independent cursor chain, so several run at once.
+        Per-window cursors and maxima are checkpointed under a 'backfill' key;
+        the bookmark is only set once every window has finished.
+
+        Args:
+            state: Full state dictionary
+            page_id: Facebook Page ID
+            start_date: Start of the backfill
+            window_days: Length of each window in days
+
+        Yields:
+            Post record dictionaries
+        """
+        windows = self.get_stream_state(state).get('backfill', {}).get('windows')
+
+        if windows:
+            remaining = sum(1 for window in windows if not window['done'])
+            LOGGER.info(f"Resuming posts backfill for page {page_id}: {remaining} of {len(windows)} windows left")
+            post_index = None
+        else:
+            windows = self._split_windows(start_date, window_days)
+            LOGGER.info(f"Backfilling posts for page {page_id} since {start_date} in {len(windows)} windows")
+            post_index = self._begin_post_index(start_date)
+
+        pending = [window for window in windows if not window['done']]
+        insights_metrics = post_index.requested_metrics if post_index is not None else None
+        sources = [
+            functools.partial(self._fetch_window_pages, page_id, window, insights_metrics, post_index is not None)
+            for window in pending
+        ]
+        max_workers = int(self.config.get('posts_backfill_workers', self.config.get('max_workers', 1)))
+
+        for index, (posts, next_params) in parallel_iterate(sources, max_workers=max_workers):
+            window = pending[index]
+
+            for post in posts:
+                if post_index is not None:
+                    self._index_post(post_index, post)
 
-        for post in posts:
-            # Transform post data
-            record = self._transform_post(post, page_id)
+                record = self._transform_post(post, page_id)
 
-            # Track the latest updated_time for state
-            if record.get('updated_time') and record['updated_time'] > max_updated_time:
-                max_updated_time = record['updated_time']
+                # Track the latest updated_time per window for state
+                if record.get('updated_time') and record['updated_time'] > (window['max_updated_time'] or ''):
+                    window['max_updated_time'] = record['updated_time']
 
-            yield record
+                yield record
+                self.count_record()
+
+            window['params'] = next_params
+            window['done'] = next_params is None
+
+            if self.checkpoint_due():
+                self.checkpoint(state, {'backfill': {'windows': windows}})
+
+        if post_index is not None:
+            post_index.complete()
+
+        max_updated_time = max(
+            (window['max_updated_time'] for window in windows if window['max_updated_time']),
+            default=start_date
+        )
 
         # Update state with latest bookmark
         if max_updated_time:
-            state[self.name] = {self.replication_key: max_updated_time}
-            self.write_state(state)
+            self.checkpoint(state, {self.replication_key: max_updated_time})
+
+    def _fetch_window_pages(
+        self,
+        page_id: str,
+        window: Dict,
+        insights_metrics: Optional[List[str]] = None,
+        indexing: bool = False
+    ) -> Iterator:
+        """
+        Paginate the posts of one backfill window.
+
+        Args:
+            page_id: Facebook Page ID
+            window: Backfill window state
+            insights_metrics: Post insight metrics to expand inline
+            indexing: Whether the posts fill the shared post index
+
+        Yields:
+            Tuples of (posts, next-page params or None)
+        """
+        return self.client.get_page_post_pages(
+            page_id=page_id,
+            fields=self._get_fields(indexing=indexing),
+            since=window['since'],
+            until=window['until'],
+            resume_params=window['params'],
+            insights_metrics=insights_metrics
+        )
+
+    def _split_windows(self, start_date: str, window_days: int) -> List[Dict]:
+        """
+        Split start_date..now into consecutive backfill windows.
+
+        Graph treats since and until as inclusive, so each window ends one
+        second before the next one starts; a post created on a boundary is
+        listed by exactly one window.
+
+        Args:
+            start_date: Start of the backfill (ISO 8601)
+            window_days: Length of each window in days
+
+        Returns:
+            Window state dictionaries; the last window is open-ended
+        """
+        start = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=timezone.utc)
+
+        now = datetime.now(timezone.utc)
+        windows = []
+        current = start
+
+        while True:
+            end = current + timedelta(days=window_days)
+            windows.append({
+                'since': current.isoformat(),
+                'until': (end - timedelta(seconds=1)).isoformat() if end < now else None,
+                'params': None,
+                'done': False,
+                'max_updated_time': None
+            })
+
+            if end >= now:
+                return windows
+
+            current = end
+
+    def _get_fields(self, indexing: bool = False) -> List[str]:
+        """
+        Build the Graph API fields list from the selected properties.
+
+        Unselected properties are not requested, which drops the summary
+        edges and message bodies for narrow catalogs.
+
+        Args:
+            indexing: Whether the listing fills the shared post index, whose
+                readers need created_time even when it is not selected
+
+        Returns:
+            Graph API field names
+        """
+        fields = []
+
+        for prop, prop_fields in self.FIELD_MAP.items():
+            if self.is_property_selected(prop):
+                fields.extend(field for field in prop_fields if field not in fields)
+
+        if indexing and 'created_time' not in fields:
+            fields.append('created_time')
+
+        return fields
 
     def _transform_post(self, post: Dict, page_id: str) -> Dict:
         """
@@ -7,12 +7,22 @@ This is the entry point for the Singer tap.
 import json
 import sys
 import singer
-from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from singer import metadata
+from typing import Dict, List, Union
 import argparse
 
 from tap_facebook.auth import FacebookOAuthAuthenticator
 from tap_facebook.client import FacebookClient
-from tap_facebook.streams import PostsStream, PostInsightsStream, PageInsightsStream
+from tap_facebook.concurrency import max_concurrent_pages
+from tap_facebook.context import SyncContext
+from tap_facebook.fingerprints import FingerprintStore
+from tap_facebook.metric_catalog import MetricCatalog
+from tap_facebook.retry import RetryPolicy
+from tap_facebook.transport import HTTPTransport
+from tap_facebook.writer import MessageWriter, get_writer
+from tap_facebook.streams import PostsStream, PostInsightsStream, PageInsightsStream, InsightMetricsStream
+from tap_facebook.streams.base import FacebookStream
 
 LOGGER = singer.get_logger()
 
@@ -21,6 +31,7 @@ AVAILABLE_STREAMS = {
     'posts': PostsStream,
     'post_insights': PostInsightsStream,
     'page_insights': PageInsightsStream,
+    'insight_metrics': InsightMetricsStream,
 }
 
 
@@ -34,6 +45,28 @@ def load_json_file(path: str) -> Dict:
         raise
 
 
+def is_stream_selected(stream_entry: Dict) -> bool:
+    """
+    Check whether a catalog entry is selected for sync.
+
+    Supports both Singer breadcrumb metadata (a list) and the legacy
+    stream-level metadata dictionary. Streams are selected by default.
+
+    Args:
+        stream_entry: Catalog stream entry
+
+    Returns:
+        True if the stream should be synced
+    """
+    raw_metadata = stream_entry.get('metadata', {})
+
+    if isinstance(raw_metadata, list):
+        stream_metadata = metadata.to_map(raw_metadata).get((), {})
+        return stream_metadata.get('selected', stream_metadata.get('selected-by-default', True))
+
+    return raw_metadata.get('selected', True)
+
+
 def discover(client: FacebookClient, config: Dict) -> Dict:
     """
     Run discovery mode to generate catalog of available streams.
@@ -75,7 +108,7 @@ def sync(client: FacebookClient, config: Dict, catalog: Dict, state: Dict) -> No
     # Get selected streams from catalog
     selected_streams = [
         stream for stream in catalog.get('streams', [])
-        if stream.get('metadata', {}).get('selected', True)
+        if is_stream_selected(stream)
     ]
 
     if not selected_streams:
@@ -84,32 +117,396 @@ def sync(client: FacebookClient, config: Dict, catalog: Dict, state: Dict) -> No
 
     LOGGER.info(f"Syncing {len(selected_streams)} streams")
 
+    # Streams that fill the shared post index run before the streams reading it
+    stream_order = list(AVAILABLE_STREAMS)
+    selected_streams.sort(
+        key=lambda entry: stream_order.index(entry.get('tap_stream_id'))
+        if entry.get('tap_stream_id') in stream_order else len(stream_order)
+    )
+
+    selected_streams = [entry for entry in selected_streams if _is_known_stream(entry)]
+    writer = get_writer(config)
+
+    # Streams synced once per run, after every page
+    run_streams = [
+        entry for entry in selected_streams
+        if AVAILABLE_STREAMS[entry['tap_stream_id']].ONCE_PER_RUN
+    ]
+    page_streams = [entry for entry in selected_streams if entry not in run_streams]
+
+    # Shared by every page so insight_metrics covers all of them
+    metric_catalog = None
+    if any(entry['tap_stream_id'] == 'insight_metrics' for entry in run_streams):
+        metric_catalog = MetricCatalog()
+
+    # Fingerprints are trusted up to the input STATE's generation and
+    # committed whenever the writer has emitted a STATE covering them
+    fingerprints = FingerprintStore.from_config(config)
+    if fingerprints is not None:
+        fingerprints.start(state)
+        writer.add_state_listener(fingerprints.commit)
+
+    try:
+        # Schemas are written once, whatever the number of pages
+        for stream_entry in selected_streams:
+            stream = AVAILABLE_STREAMS[stream_entry['tap_stream_id']](client, config, catalog_entry=stream_entry)
+            writer.write_schema(stream.name, stream.get_selected_schema(), stream.key_properties)
+
+        if page_streams and config.get('page_ids'):
+            _sync_pages(client, config, page_streams, state, writer, metric_catalog, fingerprints)
+        elif page_streams:
+            _sync_page(
+                client, config, page_streams, state,
+                writer=writer, metric_catalog=metric_catalog, fingerprints=fingerprints
+            )
+
+        if run_streams:
+            context = SyncContext(
+                config,
+                [entry.get('tap_stream_id') for entry in run_streams],
+                writer=writer,
+                metric_catalog=metric_catalog,
+                fingerprints=fingerprints
+            )
+            try:
+                _sync_streams(client, config, run_streams, state, context)
+            finally:
+                context.close()
+    finally:
+        writer.close()
+
+        if fingerprints is not None:
+            fingerprints.close()
+
+    output_stats = writer.stats()
+    LOGGER.info(
+        f"Wrote {output_stats['messages']} messages "
+        f"({output_stats['bytes'] / 1024 / 1024:.1f} MiB in {output_stats['flushes']} flushes)"
+    )
+
+    if 'batch_files' in output_stats:
+        LOGGER.info(f"Wrote {output_stats['batch_records']} records to {output_stats['batch_files']} batch files")
+
+    if fingerprints is not None:
+        fingerprint_stats = fingerprints.stats()
+        LOGGER.info(
+            f"Suppressed {fingerprint_stats['unchanged']} unchanged records "
+            f"({fingerprint_stats['changed']} new or changed)"
+        )
+
+    retry_stats = client.retry_policy.stats()
+    LOGGER.info(
+        f"Sync complete. Retries: {retry_stats['retries']} "
+        f"({retry_stats['backoff_seconds']}s backing off) {retry_stats['by_reason']}"
+    )
+
+    if client.response_cache is not None:
+        cache_stats = client.response_cache.stats()
+        LOGGER.info(
+            f"Response cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+            f"({cache_stats['expired']} expired), {cache_stats['stores']} stored, "
+            f"{cache_stats['evictions']} evicted; {cache_stats['entries']} entries, "
+            f"{cache_stats['bytes'] / 1024 / 1024:.1f} MiB"
+        )
+
+    for listing, page_stats in client.page_sizer.stats().items():
+        LOGGER.info(
+            f"Paginated {listing}: {page_stats['pages']} pages, {page_stats['records']} records, "
+            f"final page size {page_stats['page_size']}"
+        )
+
+
+def _is_known_stream(stream_entry: Dict) -> bool:
+    """Whether a catalog entry names a stream of this tap, warning if not."""
+    stream_name = stream_entry.get('tap_stream_id')
+
+    if stream_name not in AVAILABLE_STREAMS:
+        LOGGER.warning(f"Unknown stream: {stream_name}")
+        return False
+
+    return True
+
+
+def parse_page_ids(page_ids) -> Union[List[str], str]:
+    """
+    Normalize the page_ids config option.
+
+    Args:
+        page_ids: A list of Page IDs, "all", or a comma-separated string of
+            Page IDs
+
+    Returns:
+        Page IDs as strings, or "all"
+
+    Raises:
+        ValueError: If page_ids is of any other type, or lists no Page ID
+    """
+    if page_ids == 'all':
+        return page_ids
+
+    if isinstance(page_ids, str):
+        page_ids = page_ids.split(',')
+    elif not isinstance(page_ids, list):
+        raise ValueError(f"page_ids must be a list of Page IDs, \"all\" or a comma-separated string, got {page_ids!r}")
+
+    page_ids = [str(page_id).strip() for page_id in page_ids]
+    if not page_ids:
+        raise ValueError("page_ids lists no Page ID")
+    if not all(page_ids):
+        raise ValueError(f"page_ids contains an empty Page ID: {page_ids!r}")
+
+    return page_ids
+
+
+def get_page_clients(client: FacebookClient, config: Dict) -> Dict[str, FacebookClient]:
+    """
+    Resolve the pages listed in page_ids to clients using their Page tokens.
+
+    page_ids is a list of Page IDs, a comma-separated string of them, or
+    "all" for every Page the user token can manage. Page access tokens come from /me/accounts; a listed
+    page missing there is synced with the user token.
+
+    Args:
+        client: Facebook API client authenticated with the user token
+        config: Tap configuration
+
+    Returns:
+        Clients by Page ID, in page_ids order
+    """
+    accounts = {page['id']: page for page in client.get_managed_pages()}
+    page_ids = parse_page_ids(config['page_ids'])
+
+    if page_ids == 'all':
+        page_ids = list(accounts)
+        LOGGER.info(f"Found {len(page_ids)} pages managed by the access token")
+
+    page_clients = {}
+
+    for page_id in page_ids:
+        access_token = accounts.get(page_id, {}).get('access_token')
+
+        if access_token:
+            page_clients[page_id] = client.for_page(access_token)
+        else:
+            LOGGER.warning(f"No Page access token for page {page_id}; using the user access token")
+            page_clients[page_id] = client
+
+    return page_clients
+
+
+def _sync_pages(
+    client: FacebookClient,
+    config: Dict,
+    selected_streams: List[Dict],
+    state: Dict,
+    writer: MessageWriter,
+    metric_catalog: MetricCatalog = None,
+    fingerprints: FingerprintStore = None
+) -> None:
+    """
+    Sync several pages concurrently, each with its own Page token.
+
+    Up to max_concurrent_pages pages sync at once. All of them share the
+    client's rate-limit scheduler and connection pool, output is serialized
+    through one writer, and state is kept per page so a slow page never
+    holds back the bookmarks of the others.
+
+    Args:
+        client: Facebook API client authenticated with the user token
+        config: Tap configuration
+        selected_streams: Selected catalog entries, in sync order
+        state: Current state for incremental syncing
+        writer: Message writer shared by all pages
+        metric_catalog: Insight metric catalog shared by all pages
+        fingerprints: Fingerprint store shared by all pages
+
+    Raises:
+        RuntimeError: If any page failed, after the other pages finished
+    """
+    page_clients = get_page_clients(client, config)
+    max_pages = max_concurrent_pages(config)
+    failed = []
+
+    LOGGER.info(f"Syncing {len(page_clients)} pages, up to {max_pages} at a time")
+
+    with ThreadPoolExecutor(max_workers=max_pages) as executor:
+        futures = {
+            executor.submit(
+                _sync_page,
+                page_client,
+                dict(config, page_id=page_id),
+                selected_streams,
+                state,
+                page_id,
+                writer,
+                metric_catalog,
+                fingerprints
+            ): page_id
+            for page_id, page_client in page_clients.items()
+        }
+
+        for future in as_completed(futures):
+            page_id = futures[future]
+            try:
+                future.result()
+                LOGGER.info(f"Finished syncing page {page_id}")
+            except Exception as e:
+                LOGGER.error(f"Error syncing page {page_id}: {str(e)}")
+                failed.append(page_id)
+
+    if failed:
+        raise RuntimeError(f"Sync failed for {len(failed)} of {len(page_clients)} pages: {sorted(failed)}")
+
+
+def _sync_page(
+    client: FacebookClient,
+    config: Dict,
+    selected_streams: List[Dict],
+    state: Dict,
+    page_id: str = None,
+    writer: MessageWriter = None,
+    metric_catalog: MetricCatalog = None,
+    fingerprints: FingerprintStore = None
+) -> None:
+    """
+    Sync the selected streams of one page.
+
+    Args:
+        client: Facebook API client for the page
+        config: Tap configuration, with the page's page_id
+        selected_streams: Selected catalog entries, in sync order
+        state: Current state for incremental syncing
+        page_id: Page ID when several pages are synced (keys state per page)
+        writer: Message writer shared by pages synced concurrently
+        metric_catalog: Insight metric catalog shared by all pages
+        fingerprints: Fingerprint store shared by all pages
+    """
+    context = SyncContext(
+        config,
+        [entry.get('tap_stream_id') for entry in selected_streams],
+        page_id=page_id,
+        writer=writer,
+        metric_catalog=metric_catalog,
+        fingerprints=fingerprints
+    )
+
+    try:
+        _sync_streams(client, config, selected_streams, state, context)
+    finally:
+        context.close()
+
+
+def _sync_streams(
+    client: FacebookClient,
+    config: Dict,
+    selected_streams: List[Dict],
+    state: Dict,
+    context: SyncContext
+) -> None:
+    """
+    Sync the selected streams, one after another or concurrently.
+
+    With parallel_streams, streams run on separate threads, except that a
+    stream runs after the streams in its SYNC_AFTER (on the same thread)
+    when they are selected too. All of them share the client's rate-limit
+    budget and the context's writer.
+
+    Args:
+        client: Facebook API client
+        config: Tap configuration
+        selected_streams: Selected catalog entries, in sync order
+        state: Current state for incremental syncing
+        context: Objects shared between the streams of this run
+    """
+    streams = []
+
+    # Instantiate every stream before syncing any, so later streams can
+    # register what they need from earlier ones in the shared context
     for stream_entry in selected_streams:
-        stream_name = stream_entry.get('tap_stream_id')
+        stream_class = AVAILABLE_STREAMS[stream_entry['tap_stream_id']]
+        streams.append(stream_class(client, config, catalog_entry=stream_entry, context=context))
 
-        if stream_name not in AVAILABLE_STREAMS:
-            LOGGER.warning(f"Unknown stream: {stream_name}")
-            continue
+    chains = _stream_chains(streams)
 
-        LOGGER.info(f"Syncing stream: {stream_name}")
+    if not config.get('parallel_streams') or len(chains) < 2:
+        for stream in streams:
+            _sync_stream(stream, state, context)
+        return
 
-        # Instantiate stream
-        stream_class = AVAILABLE_STREAMS[stream_name]
-        stream = stream_class(client, config)
+    LOGGER.info(f"Syncing {len(chains)} groups of streams concurrently")
+
+    if client.scheduler.max_concurrency < len(chains):
+        LOGGER.warning(
+            f"max_concurrent_requests ({client.scheduler.max_concurrency}) is lower than the "
+            f"{len(chains)} groups of streams running at once; they will wait on each other's requests"
+        )
 
-        # Write schema
-        stream.write_schema()
+    with ThreadPoolExecutor(max_workers=len(chains)) as executor:
+        futures = [executor.submit(_sync_chain, chain, state, context) for chain in chains]
+        errors = [future.exception() for future in futures]
 
-        # Sync records
-        try:
-            for record in stream.get_records(state):
-                stream.write_record(record)
+    for error in errors:
+        if error is not None:
+            raise error
 
-        except Exception as e:
-            LOGGER.error(f"Error syncing stream {stream_name}: {str(e)}")
-            raise
 
-    LOGGER.info("Sync complete")
+def _stream_chains(streams: List[FacebookStream]) -> List[List[FacebookStream]]:
+    """
+    Group streams into chains that must run in order.
+
+    Args:
+        streams: Streams in sync order
+
+    Returns:
+        Lists of streams; each stream is in the chain of the first stream
+        of its SYNC_AFTER that is present, or starts a new chain
+    """
+    chains = []
+    chain_of = {}
+
+    for stream in streams:
+        chain = next((chain_of[name] for name in stream.SYNC_AFTER if name in chain_of), None)
+
+        if chain is None:
+            chain = []
+            chains.append(chain)
+
+        chain.append(stream)
+        chain_of[stream.name] = chain
+
+    return chains
+
+
+def _sync_chain(chain: List[FacebookStream], state: Dict, context: SyncContext) -> None:
+    """Sync a chain of streams in order (see _stream_chains)."""
+    for stream in chain:
+        _sync_stream(stream, state, context)
+
+
+def _sync_stream(stream: FacebookStream, state: Dict, context: SyncContext) -> None:
+    """
+    Sync one stream's records.
+
+    Args:
+        stream: Stream to sync
+        state: Current state for incremental syncing
+        context: Objects shared between the streams of this run
+    """
+    stream_name = stream.name
+
+    LOGGER.info(f"Syncing stream: {stream_name}" + (f" for page {context.page_id}" if context.page_id else ""))
+
+    # Sync records
+    try:
+        for record in stream.get_records(state):
+            stream.write_record(record)
+
+        if stream.fingerprints is not None:
+            stream.commit_fingerprints(state)
+
+    except Exception as e:
+        LOGGER.error(f"Error syncing stream {stream_name}: {str(e)}")
+        raise
 
 
 def main():
@@ -144,28 +541,39 @@ def main():
     config = load_json_file(args.config)
 
     # Validate required config fields
-    required_fields = ['client_id', 'client_secret', 'page_id']
+    required_fields = ['client_id', 'client_secret']
     for field in required_fields:
         if field not in config:
             raise ValueError(f"Missing required config field: {field}")
 
-    # Initialize authenticator and client
-    authenticator = FacebookOAuthAuthenticator(config)
-    client = FacebookClient(authenticator)
+    if 'page_id' not in config and 'page_ids' not in config:
+        raise ValueError("Missing required config field: page_id (or page_ids)")
+
+    if 'page_ids' in config:
+        config['page_ids'] = parse_page_ids(config['page_ids'])
+
+    # Initialize the shared transport, retry policy, authenticator and client
+    transport = HTTPTransport.from_config(config)
+    retry_policy = RetryPolicy.from_config(config)
+    authenticator = FacebookOAuthAuthenticator(config, transport=transport, retry_policy=retry_policy)
+    client = FacebookClient(authenticator, config=config, transport=transport, retry_policy=retry_policy)
 
     # Run in discovery or sync mode
-    if args.discover:
-        catalog = discover(client, config)
-        print(json.dumps(catalog, indent=2))
+    try:
+        if args.discover:
+            catalog = discover(client, config)
+            print(json.dumps(catalog, indent=2))
 
-    else:
-        if not args.catalog:
-            raise ValueError("--catalog is required for sync mode")
+        else:
+            if not args.catalog:
+                raise ValueError("--catalog is required for sync mode")
 
-        catalog = load_json_file(args.catalog)
-        state = load_json_file(args.state) if args.state else {}
+            catalog = load_json_file(args.catalog)
+            state = load_json_file(args.state) if args.state else {}
 
-        sync(client, config, catalog, state)
+            sync(client, config, catalog, state)
+    finally:
+        transport.close()
 
 
 if __name__ == '__main__':
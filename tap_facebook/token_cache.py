@@ -0,0 +1,194 @@
+"""
+Access token caches shared between runs, processes and threads.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class TokenCache(ABC):
+    """
+    Store of access tokens by credential key.
+
+    Tokens are dictionaries with 'access_token' and 'token_expiry' (epoch
+    seconds). Refreshing happens under lock(), so of several runs needing
+    a token at once only one refreshes and the others pick its token up
+    from the cache.
+    """
+
+    @staticmethod
+    def key(client_id: Optional[str], refresh_token: Optional[str]) -> str:
+        """
+        Cache key for a set of credentials.
+
+        Hashed, so the cache file never holds the refresh token, and a
+        changed refresh token never reuses a token cached for the old one.
+
+        Args:
+            client_id: Facebook App ID
+            refresh_token: Token the access token is exchanged from
+
+        Returns:
+            Hex digest identifying the credentials
+        """
+        return hashlib.sha256(f"{client_id}:{refresh_token}".encode('utf-8')).hexdigest()
+
+    @abstractmethod
+    def load(self, key: str) -> Optional[Dict]:
+        """
+        Get the cached token for a key.
+
+        Args:
+            key: Credential key (see key())
+
+        Returns:
+            Token dictionary, or None when nothing is cached
+        """
+        pass
+
+    @abstractmethod
+    def store(self, key: str, token: Dict) -> None:
+        """
+        Cache a token. Called while holding lock(key).
+
+        Args:
+            key: Credential key (see key())
+            token: Token dictionary
+        """
+        pass
+
+    @abstractmethod
+    def lock(self, key: str) -> contextlib.AbstractContextManager:
+        """
+        Lock a key's token against concurrent refreshes.
+
+        Args:
+            key: Credential key (see key())
+
+        Returns:
+            Context manager holding the lock
+        """
+        pass
+
+
+class MemoryTokenCache(TokenCache):
+    """In-process token cache, e.g. for authenticators built per page or in tests."""
+
+    def __init__(self):
+        """Initialize an empty cache."""
+        self._lock = threading.RLock()
+        self._tokens: Dict[str, Dict] = {}
+
+    def load(self, key: str) -> Optional[Dict]:
+        """Get the cached token for a key (see TokenCache.load)."""
+        with self._lock:
+            token = self._tokens.get(key)
+            return dict(token) if token else None
+
+    def store(self, key: str, token: Dict) -> None:
+        """Cache a token (see TokenCache.store)."""
+        with self._lock:
+            self._tokens[key] = dict(token)
+
+    @contextlib.contextmanager
+    def lock(self, key: str) -> Iterator[None]:
+        """Lock the cache against concurrent refreshes (see TokenCache.lock)."""
+        with self._lock:
+            yield
+
+
+class FileTokenCache(TokenCache):
+    """
+    Token cache in a JSON file, shared by every run on the machine.
+
+    The file is replaced atomically and readable by its owner only. Refreshes
+    are serialized with an exclusive flock() on a sibling '.lock' file (one
+    lock for the whole file), which also covers threads of one process.
+    Expired tokens are dropped whenever a token is stored.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the cache.
+
+        Args:
+            path: Cache file path (its directory is created when needed)
+        """
+        self.path = os.path.abspath(os.path.expanduser(path))
+        self._lock_path = self.path + '.lock'
+        self._thread_lock = threading.RLock()
+
+    def load(self, key: str) -> Optional[Dict]:
+        """Get the cached token for a key (see TokenCache.load)."""
+        return self._read().get(key)
+
+    def store(self, key: str, token: Dict) -> None:
+        """Cache a token (see TokenCache.store)."""
+        now = time.time()
+        tokens = {
+            cached_key: cached for cached_key, cached in self._read().items()
+            if cached.get('token_expiry', 0) > now
+        }
+        tokens[key] = dict(token)
+
+        directory = os.path.dirname(self.path)
+        fd, temp_path = tempfile.mkstemp(prefix='.token_cache_', dir=directory)
+
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(tokens, f)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    @contextlib.contextmanager
+    def lock(self, key: str) -> Iterator[None]:
+        """Lock the cache file against concurrent refreshes (see TokenCache.lock)."""
+        with self._thread_lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            fd = os.open(self._lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                yield
+            finally:
+                # Closing the descriptor releases the flock
+                os.close(fd)
+
+    def _read(self) -> Dict[str, Dict]:
+        """Read every cached token (empty when the file is missing or unreadable)."""
+        try:
+            with open(self.path, 'r') as f:
+                tokens = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        return tokens if isinstance(tokens, dict) else {}
+
+
+def get_token_cache(config: Dict) -> Optional[TokenCache]:
+    """
+    Build the token cache configured with token_cache_path.
+
+    Args:
+        config: Tap configuration
+
+    Returns:
+        FileTokenCache when token_cache_path is set, else None
+    """
+    path = config.get('token_cache_path')
+    return FileTokenCache(path) if path else None
@@ -0,0 +1,147 @@
+"""
+Shared HTTP transport for Facebook Graph API calls.
+"""
+
+import requests
+import singer
+from requests.adapters import HTTPAdapter
+from typing import Dict, Optional
+from tap_facebook.concurrency import max_concurrent_requests
+from tap_facebook.recorder import RecordingAdapter, ReplayAdapter
+
+LOGGER = singer.get_logger()
+
+
+def parse_bool(name: str, value) -> bool:
+    """
+    Parse a boolean config option.
+
+    Args:
+        name: Option name, for the error message
+        value: A bool, or one of the strings "true", "false", "1" and "0"
+
+    Returns:
+        Parsed value
+
+    Raises:
+        ValueError: For any other value
+    """
+    if isinstance(value, bool):
+        return value
+
+    if isinstance(value, str) and value.strip().lower() in ('true', '1'):
+        return True
+    if isinstance(value, str) and value.strip().lower() in ('false', '0'):
+        return False
+
+    raise ValueError(f"{name} must be true or false, got {value!r}")
+
+
+class HTTPTransport:
+    """Pooled, keep-alive HTTP transport shared by the client, pagination and auth."""
+
+    DEFAULT_POOL_CONNECTIONS = 4
+    DEFAULT_POOL_MAXSIZE = 10
+    DEFAULT_TIMEOUT = 30
+
+    def __init__(
+        self,
+        pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        pool_block: bool = True,
+        timeout: float = DEFAULT_TIMEOUT,
+        adapter: Optional[HTTPAdapter] = None
+    ):
+        """
+        Initialize the transport.
+
+        Args:
+            pool_connections: Number of per-host connection pools to cache
+            pool_maxsize: Maximum open connections kept per host
+            pool_block: Block instead of opening extra connections when a
+                host's pool is exhausted, enforcing the per-host limit
+            timeout: Default request timeout in seconds
+            adapter: Custom adapter to mount for https:// and http:// instead
+                of the default pooled HTTPAdapter
+        """
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({'Connection': 'keep-alive'})
+
+        if adapter is None:
+            adapter = HTTPAdapter(
+                pool_connections=pool_connections,
+                pool_maxsize=pool_maxsize,
+                pool_block=pool_block
+            )
+
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+
+    @classmethod
+    def from_config(cls, config: Dict, adapter: Optional[HTTPAdapter] = None) -> 'HTTPTransport':
+        """
+        Build a transport from tap configuration.
+
+        Without a custom adapter, http_replay_path serves responses from a
+        fixture file and http_record_path records the session to one.
+
+        Args:
+            config: Tap configuration
+            adapter: Optional custom adapter overriding the pooled default
+
+        Returns:
+            Configured transport instance
+        """
+        pool_options = {
+            'pool_connections': int(config.get('http_pool_connections', cls.DEFAULT_POOL_CONNECTIONS)),
+            'pool_maxsize': int(config.get(
+                'http_pool_maxsize',
+                max(cls.DEFAULT_POOL_MAXSIZE, max_concurrent_requests(config))
+            )),
+            'pool_block': parse_bool('http_pool_block', config.get('http_pool_block', True))
+        }
+
+        if adapter is None and config.get('http_replay_path'):
+            adapter = ReplayAdapter(config['http_replay_path'])
+        elif adapter is None and config.get('http_record_path'):
+            adapter = RecordingAdapter(config['http_record_path'], **pool_options)
+
+        return cls(
+            timeout=float(config.get('http_timeout', cls.DEFAULT_TIMEOUT)),
+            adapter=adapter,
+            **pool_options
+        )
+
+    def mount(self, prefix: str, adapter: HTTPAdapter) -> None:
+        """
+        Mount an adapter for all URLs starting with prefix.
+
+        Args:
+            prefix: URL prefix (e.g. "https://graph.facebook.com/")
+            adapter: Adapter handling matching requests
+        """
+        self.session.mount(prefix, adapter)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request over the pooled session.
+
+        Args:
+            method: HTTP method
+            url: Absolute URL
+            **kwargs: Extra arguments passed to requests.Session.request
+
+        Returns:
+            Response object
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.request(method=method, url=url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """Send a GET request over the pooled session."""
+        return self.request('GET', url, **kwargs)
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        self.session.close()
@@ -0,0 +1,748 @@
+"""
+Serialized, buffered Singer message output shared by concurrently syncing streams.
+"""
+
+import decimal
+import gzip
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import date, datetime
+from typing import IO, Any, Callable, Dict, List, Optional, TextIO
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# Turns one message dictionary into its JSON line (without the newline)
+Serializer = Callable[[Dict], bytes]
+
+
+def _json_default(value: Any) -> Any:
+    """Serialize the non-JSON types records may carry."""
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _serialize_json(message: Dict) -> bytes:
+    """Serialize a message with the standard library json module."""
+    return json.dumps(message, default=_json_default).encode('utf-8')
+
+
+def _serialize_orjson(message: Dict) -> bytes:
+    """Serialize a message with orjson."""
+    return orjson.dumps(message, default=_json_default)
+
+
+def get_serializer(name: str = 'auto') -> Serializer:
+    """
+    Get a message serializer by name.
+
+    Args:
+        name: 'orjson', 'json', or 'auto' (orjson when installed, else json)
+
+    Returns:
+        Serializer function
+
+    Raises:
+        ValueError: For an unknown name, or 'orjson' when it is not installed
+    """
+    if name == 'auto':
+        name = 'orjson' if orjson is not None else 'json'
+
+    if name == 'orjson':
+        if orjson is None:
+            raise ValueError("json_serializer 'orjson' requires the orjson package")
+        return _serialize_orjson
+
+    if name == 'json':
+        return _serialize_json
+
+    raise ValueError(f"Unknown json_serializer: {name}")
+
+
+class MessageWriter:
+    """
+    Writes SCHEMA, RECORD and STATE messages to stdout one at a time.
+
+    Streams (and pages) syncing on different threads all write through one
+    writer, so messages never interleave mid-line and each stream's messages
+    keep the order they were written in. The lock is reentrant and exposed
+    so a state update and the STATE message written for it can be made
+    atomic with respect to the other writers.
+
+    Messages are serialized with a pluggable serializer and collected in a
+    buffer that is written out in one call once it holds buffer_size bytes.
+    The buffer is always flushed right after a STATE message, so a STATE is
+    never emitted ahead of the records it covers nor held back after them.
+    With buffer_size 0 every message is flushed as it is written. State
+    listeners are called (with the lock held) each time a STATE has been
+    written out.
+    """
+
+    DEFAULT_BUFFER_SIZE = 1024 * 1024
+
+    def __init__(
+        self,
+        output: Optional[TextIO] = None,
+        buffer_size: int = 0,
+        serializer: Optional[Serializer] = None
+    ):
+        """
+        Initialize the writer.
+
+        Args:
+            output: Text stream to write to (sys.stdout at flush time if omitted)
+            buffer_size: Bytes to collect before writing them out
+            serializer: Message serializer (see get_serializer; stdlib json if omitted)
+        """
+        self.lock = threading.RLock()
+        self.output = output
+        self.buffer_size = max(0, buffer_size)
+        self.serialize = serializer or _serialize_json
+
+        self._buffer: List[bytes] = []
+        self._buffered = 0
+        self._messages = 0
+        self._bytes = 0
+        self._flushes = 0
+        self._state_listeners: List[Callable[[], None]] = []
+
+    @classmethod
+    def from_config(cls, config: Dict) -> 'MessageWriter':
+        """
+        Build a writer from tap configuration.
+
+        Args:
+            config: Tap configuration
+
+        Returns:
+            Writer using output_buffer_size and json_serializer
+        """
+        return cls(
+            buffer_size=int(config.get('output_buffer_size', cls.DEFAULT_BUFFER_SIZE)),
+            serializer=get_serializer(config.get('json_serializer', 'auto'))
+        )
+
+    def add_state_listener(self, listener: Callable[[], None]) -> None:
+        """
+        Register a callback run each time a STATE message has been written out.
+
+        Args:
+            listener: Zero-argument callable, run with the writer's lock held
+        """
+        with self.lock:
+            self._state_listeners.append(listener)
+
+    def write_schema(self, stream_name: str, schema: Dict, key_properties: List[str]) -> None:
+        """
+        Write a SCHEMA message.
+
+        Args:
+            stream_name: Stream name
+            schema: JSON schema of the stream's records
+            key_properties: Primary key properties
+        """
+        self._write({
+            'type': 'SCHEMA',
+            'stream': stream_name,
+            'schema': schema,
+            'key_properties': key_properties
+        })
+
+    def write_record(self, stream_name: str, record: Dict) -> None:
+        """
+        Write a RECORD message.
+
+        Args:
+            stream_name: Stream name
+            record: Record dictionary
+        """
+        self._write({'type': 'RECORD', 'stream': stream_name, 'record': record})
+
+    def write_state(self, state: Dict) -> None:
+        """
+        Write a STATE message and flush everything written so far.
+
+        Args:
+            state: Full state dictionary
+        """
+        with self.lock:
+            self._write({'type': 'STATE', 'value': state})
+            self.flush()
+            self._state_written()
+
+    def _state_written(self) -> None:
+        """Run the state listeners after a STATE was written out. Caller holds the lock."""
+        for listener in self._state_listeners:
+            listener()
+
+    def _write(self, message: Dict) -> None:
+        """Serialize a message into the buffer, writing the buffer out when full."""
+        line = self.serialize(message) + b'\n'
+
+        with self.lock:
+            self._buffer.append(line)
+            self._buffered += len(line)
+            self._messages += 1
+
+            if self._buffered >= self.buffer_size:
+                self.flush()
+
+    def flush(self) -> None:
+        """Write out and flush all buffered messages."""
+        with self.lock:
+            if not self._buffer:
+                return
+
+            data = b''.join(self._buffer)
+            self._buffer.clear()
+            self._buffered = 0
+            self._bytes += len(data)
+            self._flushes += 1
+
+            output = self.output or sys.stdout
+            binary = getattr(output, 'buffer', None)
+
+            if binary is not None:
+                # Anything printed through the text layer goes first
+                output.flush()
+                binary.write(data)
+                binary.flush()
+            else:
+                output.write(data.decode('utf-8'))
+                output.flush()
+
+    def close(self) -> None:
+        """Flush the remaining messages at the end of the sync."""
+        self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get output counters for the run.
+
+        Returns:
+            Dictionary with messages written, bytes written and flushes
+        """
+        with self.lock:
+            return {'messages': self._messages, 'bytes': self._bytes, 'flushes': self._flushes}
+
+
+class BatchMessageWriter(MessageWriter):
+    """
+    Writes records to compressed JSONL batch files and emits Singer BATCH messages.
+
+    Each stream's records go to its own file in batch_dir, one JSON record
+    per line, compressed with gzip or zstd. A file is closed once it holds
+    max_records records or max_bytes uncompressed bytes, and a BATCH
+    message pointing at it is written to stdout:
+
+        {"type": "BATCH", "stream": "posts",
+         "encoding": {"format": "jsonl", "compression": "gzip"},
+         "manifest": ["file:///.../posts-<run>-00001.jsonl.gz"]}
+
+    STATE messages are held back until every open file has been closed,
+    fsynced and announced, so a target never sees a bookmark for records
+    that are not yet durable on disk. A held STATE is released, finishing
+    the open files early, once it is max_state_age seconds old, so
+    checkpoints still reach the target on that cadence. SCHEMA and STATE
+    messages still go to stdout.
+    """
+
+    COMPRESSIONS = {'gzip': '.gz', 'zstd': '.zst', 'none': ''}
+
+    def __init__(
+        self,
+        directory: str,
+        compression: str = 'gzip',
+        max_records: int = 100000,
+        max_bytes: int = 100 * 1024 * 1024,
+        max_state_age: float = 60,
+        **kwargs
+    ):
+        """
+        Initialize the writer.
+
+        Args:
+            directory: Directory for batch files (created if missing)
+            compression: 'gzip', 'zstd' (needs the zstandard package) or 'none'
+            max_records: Records per batch file
+            max_bytes: Uncompressed bytes per batch file
+            max_state_age: Seconds a STATE may be held before the open
+                batch files are finished to release it
+            **kwargs: Arguments for MessageWriter
+
+        Raises:
+            ValueError: For an unknown or unavailable compression
+        """
+        if compression not in self.COMPRESSIONS:
+            raise ValueError(f"Unknown batch_compression: {compression}")
+
+        if compression == 'zstd' and zstandard is None:
+            raise ValueError("batch_compression 'zstd' requires the zstandard package")
+
+        super().__init__(**kwargs)
+        self.directory = os.path.abspath(directory)
+        self.compression = compression
+        self.max_records = max(1, max_records)
+        self.max_bytes = max(1, max_bytes)
+        self.max_state_age = max_state_age
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._run_id = uuid.uuid4().hex[:12]
+        self._files: Dict[str, Dict] = {}
+        self._pending_state: Optional[bytes] = None
+        self._pending_since = 0.0
+        self._sequence = 0
+        self._batch_files = 0
+        self._batch_records = 0
+
+    @classmethod
+    def from_config(cls, config: Dict) -> 'BatchMessageWriter':
+        """
+        Build a batch writer from tap configuration.
+
+        Args:
+            config: Tap configuration
+
+        Returns:
+            Writer using batch_dir, batch_compression, batch_max_records,
+            batch_max_bytes, state_checkpoint_seconds, output_buffer_size
+            and json_serializer
+        """
+        return cls(**cls._batch_options(config))
+
+    @classmethod
+    def _batch_options(cls, config: Dict) -> Dict:
+        """Constructor arguments shared by the batch writers."""
+        return {
+            'directory': config.get('batch_dir') or os.path.join(tempfile.gettempdir(), 'tap_facebook_batches'),
+            'compression': config.get('batch_compression', 'gzip'),
+            'max_records': int(config.get('batch_max_records', 100000)),
+            'max_bytes': int(config.get('batch_max_bytes', 100 * 1024 * 1024)),
+            'max_state_age': float(config.get('state_checkpoint_seconds', 60)),
+            'buffer_size': int(config.get('output_buffer_size', cls.DEFAULT_BUFFER_SIZE)),
+            'serializer': get_serializer(config.get('json_serializer', 'auto'))
+        }
+
+    def write_record(self, stream_name: str, record: Dict) -> None:
+        """
+        Append a record to the stream's current batch file.
+
+        Args:
+            stream_name: Stream name
+            record: Record dictionary
+        """
+        line = self.serialize(record) + b'\n'
+
+        with self.lock:
+            batch = self._files.get(stream_name) or self._open(stream_name)
+            batch['stream'].write(line)
+            batch['records'] += 1
+            batch['bytes'] += len(line)
+            self._rotate_if_full(stream_name, batch)
+
+    def _rotate_if_full(self, stream_name: str, batch: Dict) -> None:
+        """
+        Finish a batch file that reached max_records or max_bytes, or release
+        a held STATE that is max_state_age old. Caller holds the lock.
+        """
+        if self._pending_state is not None and self._state_expired():
+            self._write_pending_state()
+        elif batch['records'] >= self.max_records or batch['bytes'] >= self.max_bytes:
+            if self._pending_state is not None:
+                self._write_pending_state()
+            else:
+                self._finish(stream_name)
+
+    def _state_expired(self) -> bool:
+        """Check whether the held STATE is max_state_age seconds old. Caller holds the lock."""
+        return time.monotonic() - self._pending_since >= self.max_state_age
+
+    def write_state(self, state: Dict) -> None:
+        """
+        Write STATE once the records it covers are in durable batch files.
+
+        Without open batch files the STATE is written right away. Otherwise
+        it is held (a newer STATE replaces it) until a batch file fills up,
+        the held STATE is max_state_age seconds old or the writer is
+        closed; then every open file is finished first. Checkpoints
+        therefore cut batch files short at most once per max_state_age.
+
+        Args:
+            state: Full state dictionary
+        """
+        with self.lock:
+            # The age counts from the oldest STATE held, not the newest
+            if self._pending_state is None:
+                self._pending_since = time.monotonic()
+
+            # Serialized now: the state dictionary keeps changing afterwards
+            self._pending_state = self.serialize({'type': 'STATE', 'value': state}) + b'\n'
+
+            if not self._files or self._state_expired():
+                self._write_pending_state()
+
+    def close(self) -> None:
+        """Finish all open batch files and write the last held STATE."""
+        with self.lock:
+            if self._pending_state is not None:
+                self._write_pending_state()
+            else:
+                self.finish_batches()
+            self.flush()
+
+    def _write_pending_state(self) -> None:
+        """Finish all open batch files, then write the held STATE. Caller holds the lock."""
+        self.finish_batches()
+
+        self._buffer.append(self._pending_state)
+        self._buffered += len(self._pending_state)
+        self._messages += 1
+        self._pending_state = None
+        self.flush()
+        self._state_written()
+
+    def finish_batches(self) -> None:
+        """Close, fsync and announce every open batch file."""
+        with self.lock:
+            for stream_name in list(self._files):
+                self._finish(stream_name)
+
+    def _open(self, stream_name: str) -> Dict:
+        """Open a new batch file for a stream. Caller holds the lock."""
+        self._sequence += 1
+        filename = f"{stream_name}-{self._run_id}-{self._sequence:05d}.jsonl{self.COMPRESSIONS[self.compression]}"
+        path = os.path.join(self.directory, filename)
+        raw = open(path, 'wb')
+
+        if self.compression == 'gzip':
+            stream: IO[bytes] = gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6)
+        elif self.compression == 'zstd':
+            stream = zstandard.ZstdCompressor().stream_writer(raw, closefd=False)
+        else:
+            stream = raw
+
+        batch = {
+            'path': path,
+            'raw': raw,
+            'stream': stream,
+            'format': 'jsonl',
+            'compression': self.compression,
+            'records': 0,
+            'bytes': 0
+        }
+        self._files[stream_name] = batch
+        return batch
+
+    def _close_batch(self, batch: Dict) -> None:
+        """Write out the end of a batch file's encoding. Caller holds the lock."""
+        if batch['stream'] is not batch['raw']:
+            batch['stream'].close()
+
+    def _finish(self, stream_name: str) -> None:
+        """Close, fsync and announce one stream's batch file. Caller holds the lock."""
+        batch = self._files.pop(stream_name)
+        self._close_batch(batch)
+
+        batch['raw'].flush()
+        os.fsync(batch['raw'].fileno())
+        batch['raw'].close()
+        self._fsync_directory()
+
+        self._batch_files += 1
+        self._batch_records += batch['records']
+
+        self._write({
+            'type': 'BATCH',
+            'stream': stream_name,
+            'encoding': {
+                'format': batch['format'],
+                'compression': batch['compression']
+            },
+            'manifest': ['file://' + batch['path']]
+        })
+
+    def _fsync_directory(self) -> None:
+        """Persist the batch directory's entries (where the platform supports it)."""
+        try:
+            fd = os.open(self.directory, os.O_RDONLY)
+        except OSError:
+            return
+
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get output counters for the run.
+
+        Returns:
+            MessageWriter counters plus batch files and records written
+        """
+        with self.lock:
+            return dict(
+                super().stats(),
+                batch_files=self._batch_files,
+                batch_records=self._batch_records
+            )
+
+
+class ParquetMessageWriter(BatchMessageWriter):
+    """
+    Writes insights records to Parquet batch files through columnar buffers.
+
+    Insights rows are narrow and repetitive, so for the streams in
+    parquet_streams each record's values are appended straight to per-column
+    lists instead of being serialized to JSON. Every row_group_size rows the
+    columns become an Arrow table, written as one Parquet row group. Columns
+    in DICTIONARY_COLUMNS are dictionary-encoded, so a metric's name, title,
+    description and period are stored once per row group rather than once
+    per row.
+
+    The Arrow schema of a stream comes from its SCHEMA message: integer,
+    number and boolean properties map to int64, float64 and bool, date
+    strings to date32 and everything else to strings (objects and arrays as
+    JSON text). Files rotate and are announced with BATCH messages
+    ({"format": "parquet"}) exactly like JSONL batch files, and other
+    streams are written as JSONL batch files.
+    """
+
+    DEFAULT_STREAMS = ['post_insights', 'page_insights']
+    DICTIONARY_COLUMNS = {'metric_name', 'metric_title', 'metric_description', 'period'}
+
+    def __init__(
+        self,
+        directory: str,
+        parquet_streams: Optional[List[str]] = None,
+        parquet_compression: str = 'snappy',
+        row_group_size: int = 100000,
+        **kwargs
+    ):
+        """
+        Initialize the writer.
+
+        Args:
+            directory: Directory for batch files (created if missing)
+            parquet_streams: Streams written as Parquet (insights streams if omitted)
+            parquet_compression: Parquet codec ('snappy', 'zstd', 'gzip', 'none', ...)
+            row_group_size: Rows buffered per Parquet row group
+            **kwargs: Arguments for BatchMessageWriter
+
+        Raises:
+            ValueError: When pyarrow is not installed
+        """
+        if pyarrow is None:
+            raise ValueError("output_mode 'parquet' requires the pyarrow package")
+
+        super().__init__(directory, **kwargs)
+        self.parquet_streams = set(self.DEFAULT_STREAMS if parquet_streams is None else parquet_streams)
+        self.parquet_compression = parquet_compression
+        self.row_group_size = max(1, row_group_size)
+
+        self._schemas: Dict[str, Any] = {}
+        self._json_columns: Dict[str, set] = {}
+
+    @classmethod
+    def from_config(cls, config: Dict) -> 'ParquetMessageWriter':
+        """
+        Build a Parquet writer from tap configuration.
+
+        Args:
+            config: Tap configuration
+
+        Returns:
+            Writer using parquet_streams, parquet_compression,
+            parquet_row_group_size and the batch writer options
+        """
+        return cls(
+            parquet_streams=config.get('parquet_streams'),
+            parquet_compression=config.get('parquet_compression', 'snappy'),
+            row_group_size=int(config.get('parquet_row_group_size', 100000)),
+            **cls._batch_options(config)
+        )
+
+    def write_schema(self, stream_name: str, schema: Dict, key_properties: List[str]) -> None:
+        """
+        Write a SCHEMA message, deriving the Arrow schema of Parquet streams.
+
+        Args:
+            stream_name: Stream name
+            schema: JSON schema of the stream's records
+            key_properties: Primary key properties
+        """
+        with self.lock:
+            if stream_name in self.parquet_streams:
+                self._schemas[stream_name] = self._arrow_schema(stream_name, schema)
+
+            super().write_schema(stream_name, schema, key_properties)
+
+    def write_record(self, stream_name: str, record: Dict) -> None:
+        """
+        Append a record to the stream's columns, or its JSONL batch file.
+
+        Args:
+            stream_name: Stream name
+            record: Record dictionary
+        """
+        if stream_name not in self._schemas:
+            super().write_record(stream_name, record)
+            return
+
+        json_columns = self._json_columns[stream_name]
+
+        with self.lock:
+            batch = self._files.get(stream_name) or self._open_parquet(stream_name)
+
+            for name, column in batch['columns'].items():
+                value = record.get(name)
+                if value is not None and name in json_columns:
+                    value = self.serialize(value).decode('utf-8')
+                column.append(value)
+
+            batch['records'] += 1
+            batch['buffered'] += 1
+
+            if batch['buffered'] >= self.row_group_size:
+                self._write_row_group(batch)
+
+            self._rotate_if_full(stream_name, batch)
+
+    def _arrow_schema(self, stream_name: str, schema: Dict) -> Any:
+        """Map a stream's JSON schema to an Arrow schema."""
+        fields = []
+        json_columns = set()
+
+        for name, definition in schema.get('properties', {}).items():
+            types = definition.get('type', [])
+            types = [types] if isinstance(types, str) else types
+            types = [t for t in types if t != 'null']
+
+            if types == ['integer']:
+                arrow_type = pyarrow.int64()
+            elif types == ['number']:
+                arrow_type = pyarrow.float64()
+            elif types == ['boolean']:
+                arrow_type = pyarrow.bool_()
+            elif types == ['string'] and definition.get('format') == 'date':
+                arrow_type = pyarrow.date32()
+            elif types == ['string'] and name in self.DICTIONARY_COLUMNS:
+                arrow_type = pyarrow.dictionary(pyarrow.int32(), pyarrow.string())
+            elif types == ['string']:
+                arrow_type = pyarrow.string()
+            else:
+                arrow_type = pyarrow.string()
+                json_columns.add(name)
+
+            fields.append(pyarrow.field(name, arrow_type))
+
+        self._json_columns[stream_name] = json_columns
+        return pyarrow.schema(fields)
+
+    def _open_parquet(self, stream_name: str) -> Dict:
+        """Open a new Parquet batch file for a stream. Caller holds the lock."""
+        self._sequence += 1
+        schema = self._schemas[stream_name]
+        path = os.path.join(self.directory, f"{stream_name}-{self._run_id}-{self._sequence:05d}.parquet")
+        raw = open(path, 'wb')
+
+        batch = {
+            'path': path,
+            'raw': raw,
+            'writer': pyarrow.parquet.ParquetWriter(raw, schema, compression=self.parquet_compression),
+            'schema': schema,
+            'columns': {name: [] for name in schema.names},
+            'format': 'parquet',
+            'compression': self.parquet_compression,
+            'records': 0,
+            'buffered': 0,
+            'bytes': 0
+        }
+        self._files[stream_name] = batch
+        return batch
+
+    def _write_row_group(self, batch: Dict) -> None:
+        """Write the buffered columns as one row group. Caller holds the lock."""
+        arrays = []
+
+        for field in batch['schema']:
+            values = batch['columns'][field.name]
+
+            if pyarrow.types.is_dictionary(field.type):
+                array = pyarrow.array(values, pyarrow.string()).dictionary_encode()
+            elif pyarrow.types.is_date32(field.type):
+                array = pyarrow.array(values, pyarrow.string()).cast(field.type)
+            else:
+                array = pyarrow.array(values, field.type)
+
+            arrays.append(array)
+            values.clear()
+
+        table = pyarrow.Table.from_arrays(arrays, schema=batch['schema'])
+        batch['writer'].write_table(table)
+        batch['bytes'] += table.nbytes
+        batch['buffered'] = 0
+
+    def _close_batch(self, batch: Dict) -> None:
+        """Write the last row group and Parquet footer. Caller holds the lock."""
+        if batch['format'] != 'parquet':
+            super()._close_batch(batch)
+            return
+
+        if batch['buffered']:
+            self._write_row_group(batch)
+
+        batch['writer'].close()
+
+
+def get_writer(config: Dict) -> MessageWriter:
+    """
+    Build the message writer for the configured output_mode.
+
+    Args:
+        config: Tap configuration
+
+    Returns:
+        BatchMessageWriter for output_mode 'batch', ParquetMessageWriter
+        for 'parquet', else a MessageWriter
+
+    Raises:
+        ValueError: For an unknown output_mode
+    """
+    output_mode = config.get('output_mode', 'records')
+
+    if output_mode == 'batch':
+        return BatchMessageWriter.from_config(config)
+
+    if output_mode == 'parquet':
+        return ParquetMessageWriter.from_config(config)
+
+    if output_mode == 'records':
+        return MessageWriter.from_config(config)
+
+    raise ValueError(f"Unknown output_mode: {output_mode}")
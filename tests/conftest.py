@@ -0,0 +1,66 @@
+"""Shared fixtures: a local Graph API stand-in and clients pointed at it."""
+
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from tap_facebook.auth import FacebookOAuthAuthenticator
+from tap_facebook.client import FacebookClient
+from tap_facebook.fake_graph import FakeGraphAPI, FakeGraphServer, SyntheticPage
+from tap_facebook.retry import RetryPolicy
+from tap_facebook.transport import HTTPTransport
+
+PAGE_ID = '100000'
+POST_COUNT = 120
+
+
+@pytest.fixture(scope='session')
+def fake_graph():
+    """Fake Graph server with one page of POST_COUNT hourly posts."""
+    newest = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    api = FakeGraphAPI({PAGE_ID: SyntheticPage(PAGE_ID, POST_COUNT, newest, 3600)})
+    server = FakeGraphServer(api).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def config(fake_graph):
+    """Tap configuration for the fake server, with a long-lived token."""
+    return {
+        'client_id': 'id',
+        'client_secret': 'secret',
+        'refresh_token': 'refresh',
+        'access_token': 'token',
+        'token_expiry': time.time() + 86400,
+        'graph_base_url': fake_graph.url,
+        'page_id': PAGE_ID,
+        'start_date': '2000-01-01T00:00:00Z',
+        'retry_base_delay': 0.01,
+        'retry_max_delay': 0.05
+    }
+
+
+@pytest.fixture
+def make_client():
+    """Build blocking clients for a configuration, as tap.main does."""
+    transports = []
+
+    def build(config):
+        transport = HTTPTransport.from_config(config)
+        transports.append(transport)
+        retry_policy = RetryPolicy.from_config(config)
+        authenticator = FacebookOAuthAuthenticator(config, transport=transport, retry_policy=retry_policy)
+        return FacebookClient(authenticator, config=config, transport=transport, retry_policy=retry_policy)
+
+    yield build
+
+    for transport in transports:
+        transport.close()
+
+
+@pytest.fixture
+def client(config, make_client):
+    """Blocking client for the fake server."""
+    return make_client(config)
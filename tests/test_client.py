@@ -0,0 +1,111 @@
+"""Tests for the Graph API client's batch calls."""
+
+import json
+
+import pytest
+
+from tap_facebook.exceptions import RateLimitError
+
+from conftest import PAGE_ID
+
+
+def _sub_response(code, body, headers=None):
+    return {
+        'code': code,
+        'headers': [{'name': name, 'value': value} for name, value in (headers or {}).items()],
+        'body': json.dumps(body)
+    }
+
+
+def _graph_error(code, message='error', **fields):
+    return {'error': dict({'code': code, 'message': message}, **fields)}
+
+
+def test_parse_batch_response_success(client):
+    response = _sub_response(200, {'data': [{'name': 'post_clicks'}]})
+
+    result, error = client._parse_batch_response('1_1', response)
+
+    assert error is None
+    assert result == {'post_id': '1_1', 'data': [{'name': 'post_clicks'}], 'error': None, 'retryable': False}
+
+
+def test_parse_batch_response_permanent_error(client):
+    response = _sub_response(400, _graph_error(100, 'Unsupported get request'))
+
+    result, error = client._parse_batch_response('1_1', response)
+
+    assert result['data'] is None
+    assert 'Unsupported get request' in result['error']
+    assert result['retryable'] is False
+    assert error.code == 100
+
+
+def test_parse_batch_response_throttled(client):
+    response = _sub_response(400, _graph_error(80001, 'Too many calls'), {'Retry-After': '7'})
+
+    result, error = client._parse_batch_response('1_1', response)
+
+    assert result['retryable'] is True
+    assert isinstance(error, RateLimitError)
+    assert client._retry_after(error.response) == 7
+
+
+@pytest.mark.parametrize('response', [
+    None,
+    _sub_response(500, _graph_error(2, 'Service temporarily unavailable')),
+    _sub_response(400, _graph_error(1, 'An unknown error occurred', is_transient=True)),
+])
+def test_parse_batch_response_transient(client, response):
+    result, _ = client._parse_batch_response('1_1', response)
+
+    assert result['retryable'] is True
+
+
+def test_parse_batch_response_oversize_is_not_retried(client):
+    response = _sub_response(500, _graph_error(1, 'Please reduce the amount of data you are asking for'))
+
+    result, _ = client._parse_batch_response('1_1', response)
+
+    assert result['retryable'] is False
+
+
+def test_insights_batch_retries_failed_sub_requests(client, monkeypatch):
+    throttled = _sub_response(400, _graph_error(80001, 'Too many calls'), {'Retry-After': '0.01'})
+    rounds = []
+
+    def batch(sub_requests):
+        rounds.append([request['relative_url'].split('/')[0] for request in sub_requests])
+        if len(rounds) == 1:
+            return [_sub_response(200, {'data': []}), throttled, None]
+        return [_sub_response(200, {'data': [{'name': 'post_clicks'}]}) for _ in sub_requests]
+
+    monkeypatch.setattr(client, 'batch', batch)
+
+    results = client.get_post_insights_batch(['1_1', '1_2', '1_3'])
+
+    assert rounds == [['1_1', '1_2', '1_3'], ['1_2', '1_3']]
+    assert [result['post_id'] for result in results] == ['1_1', '1_2', '1_3']
+    assert all(result['error'] is None for result in results)
+    assert client.retry_policy.stats()['retries'] == 1
+    assert client.get_rate_limit_budget()['throttle_count'] == 1
+
+
+def test_insights_batch_gives_up_after_retries(client, monkeypatch):
+    client.retry_policy.max_retries = 2
+    monkeypatch.setattr(client, 'batch', lambda sub_requests: [None for _ in sub_requests])
+
+    results = client.get_post_insights_batch(['1_1'])
+
+    assert results[0]['retryable'] is True
+    assert results[0]['data'] is None
+    assert client.retry_policy.stats()['retries'] == 2
+
+
+def test_insights_batch_from_fake_graph(client):
+    post_ids = [f"{PAGE_ID}_{index}" for index in range(5)]
+
+    results = client.get_post_insights_batch(post_ids, metrics=['post_clicks'])
+
+    assert [result['post_id'] for result in results] == post_ids
+    assert all(result['data'] for result in results)
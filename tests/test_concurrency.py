@@ -0,0 +1,80 @@
+"""Tests for the bounded worker pool helpers."""
+
+import threading
+import time
+
+import pytest
+
+from tap_facebook.concurrency import (
+    DEFAULT_MAX_CONCURRENT_PAGES,
+    PARALLEL_STREAM_CHAINS,
+    max_concurrent_pages,
+    max_concurrent_requests,
+    ordered_map
+)
+
+
+def test_ordered_map_keeps_input_order():
+    # Later items finish first, results still come out in input order
+    def slow_for_small(value):
+        time.sleep(0.01 * (5 - value))
+        return value * 10
+
+    assert list(ordered_map(slow_for_small, range(5), max_workers=4)) == [0, 10, 20, 30, 40]
+
+
+def test_ordered_map_serial_when_single_worker():
+    threads = set()
+
+    def record_thread(value):
+        threads.add(threading.current_thread().name)
+        return value
+
+    assert list(ordered_map(record_thread, range(3), max_workers=1)) == [0, 1, 2]
+    assert threads == {threading.current_thread().name}
+
+
+def test_ordered_map_raises_first_error_in_input_order():
+    def fail_on_two(value):
+        if value == 2:
+            raise ValueError("boom")
+        return value
+
+    results = ordered_map(fail_on_two, range(10), max_workers=3)
+
+    assert next(results) == 0
+    assert next(results) == 1
+    with pytest.raises(ValueError, match="boom"):
+        next(results)
+
+
+def test_ordered_map_consumes_lazily():
+    consumed = []
+
+    def items():
+        for value in range(100):
+            consumed.append(value)
+            yield value
+
+    results = ordered_map(lambda value: value, items(), max_workers=2, max_pending=4)
+    next(results)
+    results.close()
+
+    assert len(consumed) < 100
+
+
+def test_max_concurrent_pages_default():
+    assert max_concurrent_pages({'page_id': '1'}) == 1
+    assert max_concurrent_pages({'page_ids': ['1', '2']}) == DEFAULT_MAX_CONCURRENT_PAGES
+    assert max_concurrent_pages({'page_ids': 'all', 'max_concurrent_pages': 2}) == 2
+
+
+def test_max_concurrent_requests_defaults():
+    assert max_concurrent_requests({}) == 1
+    assert max_concurrent_requests({'page_ids': ['1', '2']}) == DEFAULT_MAX_CONCURRENT_PAGES
+    assert max_concurrent_requests({'max_workers': 3, 'max_concurrent_requests': 2}) == 2
+
+
+def test_max_concurrent_requests_covers_parallel_stream_chains():
+    assert max_concurrent_requests({'max_workers': 3, 'parallel_streams': True}) == 3 * PARALLEL_STREAM_CHAINS
+    assert max_concurrent_requests({'parallel_streams': True, 'max_concurrent_requests': 2}) == 2
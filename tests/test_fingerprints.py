@@ -0,0 +1,115 @@
+"""Tests for the record fingerprint store."""
+
+import io
+import sqlite3
+
+import pytest
+
+from tap_facebook.fingerprints import FingerprintStore
+from tap_facebook.writer import BatchMessageWriter
+
+RECORD = {'post_id': '1_1', 'metric_name': 'post_clicks', 'metric_value': 3}
+
+
+def _run(path, state):
+    store = FingerprintStore(str(path))
+    store.start(state)
+    return store
+
+
+def test_start_records_new_generation_in_state(tmp_path):
+    state = {}
+    store = _run(tmp_path / 'fp.db', state)
+    store.close()
+
+    assert state[FingerprintStore.STATE_KEY] == 1
+
+    store = _run(tmp_path / 'fp.db', state)
+    store.close()
+    assert state[FingerprintStore.STATE_KEY] == 2
+
+
+def test_changed_requires_start(tmp_path):
+    store = FingerprintStore(str(tmp_path / 'fp.db'))
+
+    with pytest.raises(RuntimeError):
+        store.changed('post_insights', ['1_1', 'post_clicks'], RECORD)
+
+
+def test_committed_fingerprints_suppress_records_of_later_runs(tmp_path):
+    state = {}
+    store = _run(tmp_path / 'fp.db', state)
+    assert store.changed('post_insights', ['1_1', 'post_clicks'], RECORD)
+    store.commit()
+    store.close()
+
+    store = _run(tmp_path / 'fp.db', dict(state))
+    assert not store.changed('post_insights', ['1_1', 'post_clicks'], RECORD)
+    assert store.changed('post_insights', ['1_1', 'post_clicks'], dict(RECORD, metric_value=4))
+    assert store.stats() == {'changed': 1, 'unchanged': 1}
+    store.close()
+
+
+def test_uncommitted_fingerprints_are_discarded(tmp_path):
+    state = {}
+    store = _run(tmp_path / 'fp.db', state)
+    store.changed('post_insights', ['1_1', 'post_clicks'], RECORD)
+    store.close()
+
+    store = _run(tmp_path / 'fp.db', dict(state))
+    assert store.changed('post_insights', ['1_1', 'post_clicks'], RECORD)
+    store.close()
+
+
+def test_fingerprints_newer_than_input_state_are_ignored(tmp_path):
+    first_state = {}
+    store = _run(tmp_path / 'fp.db', first_state)
+    store.commit()
+    store.close()
+
+    # A second run commits, but its STATE never reached the target
+    store = _run(tmp_path / 'fp.db', dict(first_state))
+    store.changed('post_insights', ['1_1', 'post_clicks'], RECORD)
+    store.commit()
+    store.close()
+
+    # Rerun from the first run's STATE: the record must be emitted again
+    store = _run(tmp_path / 'fp.db', dict(first_state))
+    assert store.changed('post_insights', ['1_1', 'post_clicks'], RECORD)
+    store.close()
+
+
+def test_tracks_configured_streams(tmp_path):
+    store = FingerprintStore.from_config({'fingerprint_db': str(tmp_path / 'fp.db'), 'fingerprint_streams': ['posts']})
+
+    assert store.tracks('posts')
+    assert not store.tracks('post_insights')
+    assert FingerprintStore.from_config({}) is None
+    store.close()
+
+
+def test_commit_waits_for_batch_writer_to_emit_state(tmp_path):
+    state = {}
+    store = _run(tmp_path / 'fp.db', state)
+    writer = BatchMessageWriter(str(tmp_path / 'batches'), max_records=2, output=io.StringIO())
+    writer.add_state_listener(store.commit)
+
+    def committed():
+        reader = sqlite3.connect(str(tmp_path / 'fp.db'))
+        try:
+            return reader.execute('SELECT COUNT(*) FROM fingerprints').fetchone()[0] == 1
+        finally:
+            reader.close()
+
+    store.changed('post_insights', ['1_1', 'post_clicks'], RECORD)
+    writer.write_record('post_insights', RECORD)
+    writer.write_state(state)
+
+    # The STATE is held until the batch file is announced
+    assert not committed()
+
+    writer.write_record('post_insights', dict(RECORD, post_id='1_2'))
+    assert committed()
+
+    writer.close()
+    store.close()
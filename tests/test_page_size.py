@@ -0,0 +1,135 @@
+"""Tests for adaptive page sizing of paginated listings."""
+
+import json
+
+import requests
+
+from tap_facebook.base_client import Listing
+from tap_facebook.exceptions import FacebookAPIError
+from tap_facebook.page_size import PageSizer
+
+KEY = ('100000/posts', 'id,message')
+
+
+def _full_fast_page(sizer, key=KEY):
+    size = sizer.size(key)
+    sizer.record(key, size, size, elapsed=0.1, size_bytes=1024)
+    return size
+
+
+def _graph_error(status, code, message):
+    response = requests.Response()
+    response.status_code = status
+    response._content = json.dumps({'error': {'code': code, 'message': message}}).encode('utf-8')
+    return FacebookAPIError.from_response(response)
+
+
+def test_from_config():
+    sizer = PageSizer.from_config({'page_size': 40, 'page_size_min': 10, 'page_size_max': 200})
+
+    assert (sizer.initial_size, sizer.min_size, sizer.max_size) == (40, 10, 200)
+    assert sizer.size(KEY) == 40
+
+
+def test_initial_size_is_clamped_to_bounds():
+    assert PageSizer(initial_size=1000, max_size=500).size(KEY) == 500
+    assert PageSizer(initial_size=1, min_size=5).size(KEY) == 5
+
+
+def test_grows_toward_max_size_on_full_fast_pages():
+    sizer = PageSizer(initial_size=100, max_size=200)
+
+    sizes = [_full_fast_page(sizer) for _ in range(4)]
+
+    assert sizes == [100, 150, 200, 200]
+
+
+def test_does_not_grow_on_short_slow_or_large_pages():
+    sizer = PageSizer(initial_size=100)
+
+    sizer.record(KEY, 100, 60, elapsed=0.1, size_bytes=1024)
+    sizer.record(KEY, 100, 100, elapsed=PageSizer.FAST_SECONDS, size_bytes=1024)
+    sizer.record(KEY, 100, 100, elapsed=0.1, size_bytes=PageSizer.SMALL_BYTES)
+
+    assert sizer.size(KEY) == 100
+
+
+def test_shrink_halves_down_to_min_size():
+    sizer = PageSizer(initial_size=40, min_size=10)
+
+    assert sizer.shrink(KEY, 'timeout')
+    assert sizer.size(KEY) == 20
+    assert sizer.shrink(KEY, 'timeout')
+    assert sizer.size(KEY) == 10
+    assert not sizer.shrink(KEY, 'timeout')
+    assert sizer.size(KEY) == 10
+
+
+def test_shrink_respects_explicit_floor():
+    sizer = PageSizer(initial_size=4, min_size=5)
+
+    # The floor overrides min_size for "reduce the amount of data" errors
+    assert sizer.shrink(KEY, 'reduce the amount of data', floor=1)
+    assert sizer.size(KEY) == 2
+    assert sizer.shrink(KEY, 'reduce the amount of data', floor=1)
+    assert not sizer.shrink(KEY, 'reduce the amount of data', floor=1)
+    assert sizer.size(KEY) == 1
+
+
+def test_never_grows_back_to_a_failed_size():
+    sizer = PageSizer(initial_size=100, max_size=500)
+    sizer.shrink(KEY, 'timeout')
+
+    sizes = [_full_fast_page(sizer) for _ in range(5)]
+
+    assert sizes[0] == 50
+    assert max(sizes) <= 99
+    assert sizer.size(KEY) == 99
+
+
+def test_sizes_are_kept_per_key():
+    sizer = PageSizer(initial_size=100)
+    sizer.shrink(KEY, 'timeout')
+
+    assert sizer.size(KEY) == 50
+    assert sizer.size(('100000/posts', 'id')) == 100
+
+
+def test_stats_report_pages_records_and_size():
+    sizer = PageSizer(initial_size=10, max_size=10)
+    _full_fast_page(sizer)
+    sizer.record(KEY, 10, 3, elapsed=0.1, size_bytes=100)
+
+    assert sizer.stats() == {'100000/posts [id,message]': {'pages': 2, 'records': 13, 'page_size': 10}}
+
+
+def test_listing_shrinks_on_reduce_the_amount_of_data():
+    sizer = PageSizer(initial_size=100)
+    listing = Listing('100000/posts', sizer, params={'fields': 'id,message'})
+    oversize = _graph_error(500, 1, 'Please reduce the amount of data you are asking for, then retry your request')
+
+    assert listing.shrink_for(oversize)
+    assert listing.limit() == 50
+
+
+def test_listing_raises_other_errors():
+    listing = Listing('100000/posts', PageSizer(initial_size=100), params={'fields': 'id'})
+
+    assert not listing.shrink_for(_graph_error(400, 100, 'Unsupported get request'))
+    assert listing.limit() == 100
+
+
+def test_listing_limit_caps_page_size():
+    sizer = PageSizer(initial_size=100)
+    listing = Listing('100000/posts', sizer, params={'fields': 'id', 'limit': 25})
+
+    assert listing.limit() == 25
+    assert 'limit' not in listing.params
+
+
+def test_listing_timeout_lowers_retry_size():
+    sizer = PageSizer(initial_size=100, min_size=60)
+    listing = Listing('100000/posts', sizer, params={'fields': 'id'})
+
+    assert listing.timed_out(100) == 60
+    assert listing.timed_out(60) == 60
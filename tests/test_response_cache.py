@@ -0,0 +1,64 @@
+"""Tests for the on-disk Graph response cache."""
+
+from datetime import datetime, timedelta, timezone
+
+import requests
+
+from tap_facebook.response_cache import ResponseCache
+
+OLD_UNTIL = '2024-01-08'
+
+
+def _recent_until():
+    return (datetime.now(timezone.utc) - timedelta(days=1)).date().isoformat()
+
+
+def test_endpoint_pattern_wins_over_settled_window(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+
+    assert cache.ttl('/100000/posts', {'until': OLD_UNTIL}) == 300
+
+
+def test_settled_ttl_only_for_insights(tmp_path):
+    cache = ResponseCache(str(tmp_path), default_ttl=3600, settled_ttl=604800)
+
+    assert cache.ttl('/100000/insights', {'until': OLD_UNTIL}) == 604800
+    assert cache.ttl('/100000_1/insights', {'until': OLD_UNTIL}) == 604800
+    assert cache.ttl('/100000/feed', {'until': OLD_UNTIL}) == 3600
+
+
+def test_recent_insights_window_uses_default_ttl(tmp_path):
+    cache = ResponseCache(str(tmp_path), default_ttl=3600, settled_ttl=604800)
+
+    assert cache.ttl('/100000/insights', {'until': _recent_until()}) == 3600
+    assert cache.ttl('/100000/insights') == 3600
+
+
+def test_explicit_insights_pattern_wins_over_settled_window(tmp_path):
+    cache = ResponseCache(str(tmp_path), ttls={'*/insights': 60}, settled_ttl=604800)
+
+    assert cache.ttl('/100000/insights', {'until': OLD_UNTIL}) == 60
+
+
+def test_key_ignores_access_token(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+
+    assert cache.key('GET', '/100000/posts', {'fields': 'id', 'access_token': 'a'}) == \
+        cache.key('GET', '100000/posts', {'access_token': 'b', 'fields': 'id'})
+
+
+def test_put_and_get_round_trip(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    response = requests.Response()
+    response.status_code = 200
+    response.url = 'http://graph/v18.0/100000/posts?access_token=x'
+    response._content = b'{"data": []}'
+    key = cache.key('GET', '/100000/posts', {'fields': 'id'})
+
+    cache.put(key, response, ttl=60)
+
+    assert cache.get(key).json() == {'data': []}
+    assert cache.stats()['hits'] == 1
+
+    # Entries on disk are served to later runs
+    assert ResponseCache(str(tmp_path)).get(key).json() == {'data': []}
@@ -0,0 +1,115 @@
+"""Tests for resuming an interrupted sync from a mid-run STATE."""
+
+import json
+from datetime import datetime, timedelta, timezone
+
+from tap_facebook.tap import discover, sync
+
+from conftest import PAGE_ID, POST_COUNT
+
+
+def _catalog(client, config, *stream_names):
+    catalog = discover(client, config)
+
+    for entry in catalog['streams']:
+        for item in entry['metadata']:
+            if not item['breadcrumb']:
+                item['metadata']['selected'] = entry['tap_stream_id'] in stream_names
+
+    return catalog
+
+
+def _sync(client, config, catalog, state, capsys):
+    sync(client, config, catalog, state)
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+def _records(messages, stream_name):
+    return [message['record'] for message in messages if message['type'] == 'RECORD' and message['stream'] == stream_name]
+
+
+def _states(messages):
+    return [message['value'] for message in messages if message['type'] == 'STATE']
+
+
+def test_posts_resume_from_mid_run_state(make_client, config, capsys):
+    config = dict(config, page_size=40, page_size_max=40, state_checkpoint_records=1)
+    client = make_client(config)
+    catalog = _catalog(client, config, 'posts')
+
+    full = _sync(client, config, catalog, {}, capsys)
+    posts = [record['id'] for record in _records(full, 'posts')]
+    assert len(posts) == POST_COUNT
+
+    # The first checkpoint saves the listing's cursor instead of a bookmark
+    mid_run = next(state for state in _states(full) if 'resume' in state.get('posts', {}))
+    assert mid_run['posts']['updated_time'] is None
+
+    resumed = _sync(client, config, catalog, json.loads(json.dumps(mid_run)), capsys)
+
+    # Only the posts after the saved page are listed again, and the run
+    # ends with the same bookmark as the uninterrupted one
+    assert [record['id'] for record in _records(resumed, 'posts')] == posts[40:]
+    assert _states(resumed)[-1]['posts'] == _states(full)[-1]['posts']
+
+
+def test_incremental_run_after_complete_state_lists_no_old_posts(client, config, capsys):
+    catalog = _catalog(client, config, 'posts')
+
+    full = _sync(client, config, catalog, {}, capsys)
+    final_state = _states(full)[-1]
+
+    # The listing restarts from the bookmark, so at most the newest posts come back
+    incremental = _sync(client, config, catalog, final_state, capsys)
+    assert len(_records(incremental, 'posts')) < POST_COUNT
+    assert 'resume' not in _states(incremental)[-1]['posts']
+
+
+def test_paginate_pages_yields_resume_params(client):
+    pages = list(client.paginate_pages(f"{PAGE_ID}/posts", params={'fields': 'id', 'limit': 25}))
+
+    assert sum(len(records) for records, _ in pages) == POST_COUNT
+    assert all(next_params for _, next_params in pages[:-1])
+    assert pages[-1][1] is None
+
+    # The params saved after the first page fetch the rest
+    resumed = list(client.paginate_pages(f"{PAGE_ID}/posts", resume_params=pages[0][1]))
+    assert [post['id'] for records, _ in resumed for post in records] == \
+        [post['id'] for records, _ in pages[1:] for post in records]
+
+
+def test_backfill_windows_list_boundary_posts_once(make_client, config, capsys):
+    # Daily windows starting at midnight end exactly on an hourly post
+    newest = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    config = dict(config, start_date=(newest - timedelta(days=3)).isoformat())
+    client = make_client(config)
+    catalog = _catalog(client, config, 'posts')
+
+    listed = [record['id'] for record in _records(_sync(client, config, catalog, {}, capsys), 'posts')]
+
+    config = dict(config, posts_backfill_window_days=1)
+    windowed = [record['id'] for record in _records(_sync(make_client(config), config, catalog, {}, capsys), 'posts')]
+
+    assert len(windowed) == len(set(windowed))
+    assert sorted(windowed) == sorted(listed)
+
+
+def test_incremental_run_shares_posts_listing_with_post_insights(fake_graph, make_client, config, capsys):
+    config = dict(config, page_size=40, page_size_max=40)
+    client = make_client(config)
+    catalog = _catalog(client, config, 'posts', 'post_insights')
+
+    def listing_calls(state):
+        before = fake_graph.api.stats().get('posts', 0)
+        messages = _sync(client, config, catalog, state, capsys)
+        return messages, fake_graph.api.stats().get('posts', 0) - before
+
+    full, full_calls = listing_calls({})
+    incremental, incremental_calls = listing_calls(_states(full)[-1])
+
+    # post_insights reuses the posts listing, which still starts at
+    # start_date, but only the posts updated since the bookmark are emitted
+    assert incremental_calls == full_calls == POST_COUNT // 40
+    assert len(_records(incremental, 'posts')) < POST_COUNT
+    assert _records(incremental, 'post_insights')
+    assert _states(incremental)[-1]['posts'] == _states(full)[-1]['posts']
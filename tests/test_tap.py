@@ -0,0 +1,21 @@
+"""Tests for tap configuration handling."""
+
+import pytest
+
+from tap_facebook.tap import parse_page_ids
+
+
+def test_parse_page_ids_accepts_lists_and_all():
+    assert parse_page_ids(['123', 456]) == ['123', '456']
+    assert parse_page_ids('all') == 'all'
+
+
+def test_parse_page_ids_splits_comma_separated_string():
+    assert parse_page_ids('123, 456') == ['123', '456']
+    assert parse_page_ids('123') == ['123']
+
+
+@pytest.mark.parametrize('page_ids', [123, {'id': '123'}, None, [], '123,,456'])
+def test_parse_page_ids_rejects_other_values(page_ids):
+    with pytest.raises(ValueError):
+        parse_page_ids(page_ids)
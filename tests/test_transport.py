@@ -0,0 +1,31 @@
+"""Tests for the shared HTTP transport."""
+
+import pytest
+
+from tap_facebook.transport import HTTPTransport, parse_bool
+
+
+def _pool_block(config):
+    transport = HTTPTransport.from_config(config)
+    try:
+        return transport.session.get_adapter('https://graph.facebook.com/')._pool_block
+    finally:
+        transport.close()
+
+
+@pytest.mark.parametrize('value, expected', [
+    (True, True), (False, False), ('true', True), ('False', False), ('1', True), ('0', False)
+])
+def test_parse_bool(value, expected):
+    assert parse_bool('option', value) is expected
+
+
+@pytest.mark.parametrize('value', ['no', '', 1, None])
+def test_parse_bool_rejects_other_values(value):
+    with pytest.raises(ValueError):
+        parse_bool('option', value)
+
+
+def test_pool_block_from_config():
+    assert _pool_block({}) is True
+    assert _pool_block({'http_pool_block': 'false'}) is False
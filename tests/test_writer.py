@@ -0,0 +1,115 @@
+"""Tests for the Singer message writers."""
+
+import gzip
+import io
+import json
+import os
+
+from tap_facebook.writer import BatchMessageWriter, MessageWriter
+
+
+def _messages(output):
+    return [json.loads(line) for line in output.getvalue().splitlines()]
+
+
+def test_state_flushes_buffered_records():
+    output = io.StringIO()
+    writer = MessageWriter(output=output, buffer_size=1024 * 1024)
+
+    writer.write_record('posts', {'id': '1'})
+    assert output.getvalue() == ''
+
+    writer.write_state({'posts': {'updated_time': '2024-01-01'}})
+    assert [message['type'] for message in _messages(output)] == ['RECORD', 'STATE']
+
+
+def test_state_listeners_run_after_state_is_written():
+    output = io.StringIO()
+    writer = MessageWriter(output=output)
+    seen = []
+    writer.add_state_listener(lambda: seen.append(output.getvalue().count('"STATE"')))
+
+    writer.write_state({'a': 1})
+    writer.write_state({'a': 2})
+
+    assert seen == [1, 2]
+
+
+def test_batch_writer_holds_state_until_files_are_announced(tmp_path):
+    output = io.StringIO()
+    writer = BatchMessageWriter(str(tmp_path), compression='gzip', max_records=3, output=output)
+    written = []
+    writer.add_state_listener(lambda: written.append(len(_messages(output))))
+
+    writer.write_record('posts', {'id': '1'})
+    writer.write_state({'posts': {'updated_time': '1'}})
+
+    # The record is still in an open file, so the STATE waits for it
+    assert _messages(output) == []
+    assert written == []
+
+    writer.write_record('posts', {'id': '2'})
+    writer.write_state({'posts': {'updated_time': '2'}})
+    writer.write_record('posts', {'id': '3'})
+
+    messages = _messages(output)
+    assert [message['type'] for message in messages] == ['BATCH', 'STATE']
+    assert messages[1]['value'] == {'posts': {'updated_time': '2'}}
+    assert written == [2]
+
+    manifest = messages[0]['manifest']
+    assert len(manifest) == 1
+    with gzip.open(manifest[0][len('file://'):], 'rt') as f:
+        assert [json.loads(line)['id'] for line in f] == ['1', '2', '3']
+
+
+def test_batch_writer_writes_held_state_on_close(tmp_path):
+    output = io.StringIO()
+    writer = BatchMessageWriter(str(tmp_path), compression='none', output=output)
+
+    writer.write_record('posts', {'id': '1'})
+    writer.write_state({'posts': {'updated_time': '1'}})
+    writer.close()
+
+    messages = _messages(output)
+    assert [message['type'] for message in messages] == ['BATCH', 'STATE']
+    assert os.path.exists(messages[0]['manifest'][0][len('file://'):])
+
+
+def test_batch_writer_writes_state_at_once_without_open_files(tmp_path):
+    output = io.StringIO()
+    writer = BatchMessageWriter(str(tmp_path), output=output)
+
+    writer.write_state({'a': 1})
+
+    assert _messages(output) == [{'type': 'STATE', 'value': {'a': 1}}]
+
+
+def test_batch_writer_releases_state_held_for_max_state_age(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr('tap_facebook.writer.time.monotonic', lambda: clock[0])
+    output = io.StringIO()
+    writer = BatchMessageWriter(str(tmp_path), compression='none', max_state_age=60, output=output)
+
+    writer.write_record('posts', {'id': '1'})
+    writer.write_state({'posts': {'updated_time': '1'}})
+    clock[0] += 30
+    writer.write_state({'posts': {'updated_time': '2'}})
+    writer.write_record('posts', {'id': '2'})
+    assert _messages(output) == []
+
+    # Age counts from the first held STATE, so the next record releases it
+    clock[0] += 30
+    writer.write_record('posts', {'id': '3'})
+
+    messages = _messages(output)
+    assert [message['type'] for message in messages] == ['BATCH', 'STATE']
+    assert messages[1]['value'] == {'posts': {'updated_time': '2'}}
+    with open(messages[0]['manifest'][0][len('file://'):]) as f:
+        assert [json.loads(line)['id'] for line in f] == ['1', '2', '3']
+
+
+def test_batch_writer_takes_max_state_age_from_checkpoint_seconds(tmp_path):
+    writer = BatchMessageWriter.from_config({'batch_dir': str(tmp_path), 'state_checkpoint_seconds': 15})
+
+    assert writer.max_state_age == 15